@@ -0,0 +1,129 @@
+import hashlib
+import json
+import os
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# --- Statistiques du marché, calculées une fois par version des données ---
+# État persistant (data/agregats/<nom>.parquet) : pour chaque type de transaction
+# (vente, location : loyers et prix de vente ne se mélangent pas), mesure (prix,
+# prix au m²), dimension (commune, ville, nombre de pièces, tout) et groupe, le
+# nombre d'annonces par valeur. Cet état se fusionne par simple somme : quand
+# des lignes sont ajoutées à la fin des données (nouveau crawl), seules les
+# nouvelles lignes sont agrégées. Médiane et quantiles sont exacts, lus sur les
+# effectifs cumulés.
+# L'état est gardé avec la signature de sa source et la version du nettoyage, et
+# une empreinte des lignes agrégées (URL et toutes les colonnes comptées) : un prix
+# corrigé sur place ou un nouveau nettoyage le fait recalculer.
+
+SOUS_DOSSIER = 'agregats'
+CLE_SOURCE = b'coinafrique_agregats'
+VERSION_AGREGATS = 2 # À incrémenter quand le contenu de l'état change
+DIMENSIONS = ['commune', 'ville', 'nombre_de_pieces']
+QUANTILES = {'q25': 0.25, 'mediane': 0.5, 'q75': 0.75}
+CLES = ['transaction', 'mesure', 'dimension', 'groupe', 'valeur']
+NON_PRECISEE = 'non précisée' # Transaction absente du titre de l'annonce
+COLONNES_EMPREINTE = ['url', 'transaction', 'prix', 'superficie', *DIMENSIONS]
+
+
+def chemin_agregats(chemin_csv):
+    dossier, nom = os.path.split(chemin_csv)
+    return os.path.join(dossier, SOUS_DOSSIER, os.path.splitext(nom)[0] + '.parquet')
+
+
+def _mesures(df):
+    mesures = {}
+    if 'prix' in df:
+        mesures['prix'] = df['prix'].astype('float64')
+        if 'superficie' in df:
+            # Prix au m² (terrains surtout) : seulement si la superficie est connue et non nulle
+            mesures['prix_m2'] = mesures['prix'] / df['superficie'].where(df['superficie'] > 0)
+    return mesures
+
+
+def compter(df):
+    # Effectifs par (transaction, mesure, dimension, groupe, valeur) ; valeur NA = annonce sans la mesure
+    if 'transaction' in df:
+        transaction = df['transaction'].astype('string').fillna(NON_PRECISEE)
+    else:
+        transaction = pd.Series(NON_PRECISEE, index=df.index, dtype='string')
+    morceaux = []
+    for dimension in DIMENSIONS + ['tout']:
+        if dimension != 'tout' and dimension not in df:
+            continue
+        groupe = pd.Series('Toutes', index=df.index) if dimension == 'tout' else df[dimension].astype('string')
+        for mesure, valeurs in _mesures(df).items():
+            morceaux.append(pd.DataFrame({
+                'transaction': transaction, 'mesure': mesure, 'dimension': dimension, 'groupe': groupe, 'valeur': valeurs,
+            }))
+    if not morceaux:
+        return pd.DataFrame({colonne: [] for colonne in [*CLES, 'n']})
+    longue = pd.concat(morceaux, ignore_index=True).dropna(subset=['groupe'])
+    return longue.groupby(CLES, dropna=False).size().rename('n').reset_index()
+
+
+def fusionner(*etats):
+    return pd.concat(etats, ignore_index=True).groupby(CLES, dropna=False)['n'].sum().reset_index()
+
+
+def statistiques(etat):
+    # Une ligne par (transaction, mesure, dimension, groupe) : annonces, annonces avec la mesure, quartiles
+    groupes = CLES[:-1]
+    resultat = etat.groupby(groupes)['n'].sum().rename('annonces').to_frame()
+    valeurs = etat.dropna(subset=['valeur']).sort_values(CLES)
+    cumul = valeurs.groupby(groupes)['n'].cumsum()
+    total = valeurs.groupby(groupes)['n'].transform('sum')
+    resultat['avec_valeur'] = valeurs.groupby(groupes)['n'].sum()
+    for nom, q in QUANTILES.items():
+        # Plus petite valeur dont l'effectif cumulé atteint q * total
+        resultat[nom] = valeurs[cumul >= q * total].groupby(groupes)['valeur'].first()
+    resultat['avec_valeur'] = resultat['avec_valeur'].fillna(0).astype('int64')
+    return resultat.reset_index()
+
+
+def _empreinte(df, nb_lignes):
+    # Empreinte des 'nb_lignes' premières lignes, sur toutes les colonnes agrégées : détecte un fichier
+    # réécrit comme une valeur corrigée sur place
+    colonnes = [colonne for colonne in COLONNES_EMPREINTE if colonne in df]
+    lignes = df[colonnes].iloc[:nb_lignes].astype({colonne: 'string' for colonne in colonnes})
+    hachages = pd.util.hash_pandas_object(lignes, index=False).to_numpy()
+    return hashlib.sha256(hachages.tobytes()).hexdigest()
+
+
+def _lire_etat(chemin):
+    try:
+        table = pq.read_table(chemin)
+    except (FileNotFoundError, pa.ArrowInvalid):
+        return None, {}
+    return table.to_pandas(), json.loads((table.schema.metadata or {}).get(CLE_SOURCE, b'{}'))
+
+
+def mettre_a_jour(df, chemin, source=None, version=None):
+    # Renvoie l'état à jour pour 'df' (données nettoyées). 'source' : signature du fichier des données,
+    # l'état est réutilisé sans relire les lignes tant qu'elle ne change pas ; 'version' : version du
+    # nettoyage, un changement fait tout recompter. Sinon, seules les lignes ajoutées à la fin sont
+    # agrégées, à condition que les lignes déjà comptées soient inchangées (même empreinte).
+    source = json.loads(json.dumps(source))
+    etat, meta = _lire_etat(chemin)
+    if meta.get('versions') != [VERSION_AGREGATS, version]:
+        etat = None
+    if etat is not None and source is not None and meta.get('source') == source and meta.get('nb_lignes') == len(df):
+        return etat
+    deja = meta.get('nb_lignes', 0)
+    if etat is not None and deja <= len(df) and meta.get('empreinte') == _empreinte(df, deja):
+        if deja < len(df):
+            etat = fusionner(etat, compter(df.iloc[deja:]))
+    else:
+        etat = compter(df)
+    table = pa.Table.from_pandas(etat, preserve_index=False)
+    meta = {
+        'versions': [VERSION_AGREGATS, version], 'source': source, 'nb_lignes': len(df), 'empreinte': _empreinte(df, len(df)),
+    }
+    table = table.replace_schema_metadata({**table.schema.metadata, CLE_SOURCE: json.dumps(meta)})
+    os.makedirs(os.path.dirname(chemin), exist_ok=True)
+    temporaire = f"{chemin}.{os.getpid()}.tmp"
+    pq.write_table(table, temporaire)
+    os.replace(temporaire, chemin)
+    return etat
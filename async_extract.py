@@ -0,0 +1,150 @@
+import asyncio
+import time
+from urllib.parse import urlparse
+
+import aiohttp
+
+from coinafrique_fields import ligne_vide
+from retry_scheduler import LimiteurDebit, classer
+from scrape_metrics import Chrono, nom_erreur
+from static_extract import HEADERS, TIMEOUT, parser_detail
+
+# --- Récupération concurrente des pages de détail (asyncio + aiohttp) ---
+# N requêtes en vol au maximum (plafond global) et un nombre maximal de
+# requêtes par seconde par hôte, pour ne pas surcharger sn.coinafrique.com.
+# Avec 'reprises' (retry_scheduler.Reprises), une page en échec passager est mise
+# de côté puis retentée par passe_differee(), et le disjoncteur de l'hôte peut
+# suspendre toutes les requêtes.
+
+CONCURRENCE = 8
+DEBIT_PAR_HOTE = {'sn.coinafrique.com': 4.0} # requêtes par seconde
+
+
+def url_a_recuperer(url, base_url):
+    # Permet de viser une doublure locale (local_server.servir_pages) en gardant l'URL d'origine dans les lignes
+    if not base_url:
+        return url
+    parsed_url = urlparse(url)
+    return base_url.rstrip('/') + parsed_url._replace(scheme='', netloc='').geturl()
+
+
+class ClientDetails:
+    # Session aiohttp, plafond de concurrence et limiteurs par hôte partagés par toutes les requêtes
+    def __init__(self, concurrence=CONCURRENCE, debit_par_hote=None, base_url=None, timeout=TIMEOUT, cache=None,
+                 reprises=None, limiteurs=None):
+        # 'limiteurs' : {hôte: limiteur} fournis par l'appelant (ex. work_queue.DebitPartage, plafond commun
+        # à plusieurs processus), prioritaires sur les limiteurs locaux de 'debit_par_hote'
+        debit_par_hote = DEBIT_PAR_HOTE if debit_par_hote is None else debit_par_hote
+        self.concurrence = concurrence
+        self.base_url = base_url
+        self.timeout = timeout
+        self.cache = cache
+        self.reprises = reprises
+        self.limiteurs = {hote: LimiteurDebit(debit) for hote, debit in debit_par_hote.items()}
+        self.limiteurs.update(limiteurs or {})
+        self.semaphore = asyncio.Semaphore(concurrence)
+        self.session = None
+
+    async def __aenter__(self):
+        self.session = aiohttp.ClientSession(
+            headers=HEADERS, connector=aiohttp.TCPConnector(limit=self.concurrence),
+            timeout=aiohttp.ClientTimeout(total=self.timeout),
+        )
+        return self
+
+    async def __aexit__(self, type_exc, exc, tb):
+        await self.session.close()
+
+    async def telecharger(self, url, mesure=None):
+        # 'mesure' : attente d'un créneau (concurrence, débit) et téléchargement, comptés à part
+        cache = self.cache
+        if cache is not None:
+            html = cache.lire(url)
+            if html is not None:
+                if mesure is not None:
+                    mesure['cache'] = True
+                return html
+        debut = time.perf_counter()
+        disjoncteurs = self.reprises.disjoncteurs if self.reprises is not None else None
+        if disjoncteurs is not None:
+            await asyncio.sleep(disjoncteurs.attente(url))
+        async with self.semaphore:
+            limiteur = self.limiteurs.get(urlparse(url).hostname)
+            if limiteur:
+                await limiteur.attendre()
+            if mesure is not None:
+                mesure['attente_ms'] = (time.perf_counter() - debut) * 1000
+            entetes = cache.entetes_revalidation(url) if cache is not None else None
+            try:
+                with Chrono(mesure, 'telechargement_ms'):
+                    async with self.session.get(url_a_recuperer(url, self.base_url), headers=entetes) as reponse:
+                        revalidee = cache is not None and reponse.status == 304
+                        if not revalidee:
+                            reponse.raise_for_status()
+                            html = await reponse.text()
+            except Exception as e:
+                if disjoncteurs is not None:
+                    disjoncteurs.noter(url, classer(e))
+                raise
+            # Une revalidation (304) est aussi une réponse saine de l'hôte pour le disjoncteur
+            if disjoncteurs is not None:
+                disjoncteurs.noter(url)
+            if revalidee:
+                return cache.revalidee(url)
+            if cache is not None:
+                cache.ecrire(url, html, reponse.headers)
+            return html
+
+    async def scraper(self, url, champs, mesure=None):
+        # En cas d'échec, la ligne est vide ; si self.reprises la met de côté, reprises.en_attente(url) est vrai
+        try:
+            html = await self.telecharger(url, mesure)
+        except Exception as e:
+            classe = classer(e)
+            differee = self.reprises is not None and self.reprises.differer(url, classe, e)
+            print(f"  Erreur lors de la récupération de {url} : {e!r}{' (nouvel essai plus tard)' if differee else ''}")
+            if mesure is not None:
+                mesure.update(erreur=nom_erreur(e), classe=classe)
+            return ligne_vide(url, champs)
+        if self.reprises is not None:
+            self.reprises.succes(url)
+        return parser_detail(html, url, champs, mesure)
+
+    async def scraper_mesure(self, url, champs, mesures=None, moteur='async'):
+        if mesures is None:
+            return await self.scraper(url, champs)
+        mesure = mesures.debut(url, moteur)
+        ligne = await self.scraper(url, champs, mesure)
+        mesures.terminer(mesure, ligne, champs)
+        return ligne
+
+    async def passe_differee(self, champs_de, mesures=None):
+        # Retente chaque URL mise de côté quand son délai est écoulé, jusqu'à ce que la file soit vide.
+        # Renvoie {url: ligne} des URLs réussies ou abandonnées.
+        lignes = {}
+        reprises = self.reprises
+        if reprises:
+            print(f"\nPasse différée : {len(reprises)} page(s) de détail à retenter.")
+        while reprises:
+            await asyncio.sleep(reprises.attente())
+            urls = reprises.dues()
+            resultats = await asyncio.gather(*(self.scraper_mesure(url, champs_de(url), mesures, 'async_reprise') for url in urls))
+            for url, ligne in zip(urls, resultats):
+                if not reprises.en_attente(url):
+                    lignes[url] = ligne
+        return lignes
+
+
+async def scraper_details_async(urls, champs, mesures=None, **options):
+    # 'champs' : spécification commune à toutes les URLs, ou fonction url -> spécification.
+    # 'mesures' : scrape_metrics.MesuresCrawl optionnel (une mesure par URL)
+    champs_de = champs if callable(champs) else (lambda url: champs)
+    async with ClientDetails(**options) as client:
+        # gather conserve l'ordre des URLs : mêmes lignes que la boucle séquentielle
+        lignes = await asyncio.gather(*(client.scraper_mesure(url, champs_de(url), mesures) for url in urls))
+        differees = await client.passe_differee(champs_de, mesures)
+    return [differees.get(url, ligne) for url, ligne in zip(urls, lignes)]
+
+
+def scraper_details(urls, champs, mesures=None, **options):
+    return asyncio.run(scraper_details_async(urls, champs, mesures, **options))
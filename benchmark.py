@@ -0,0 +1,374 @@
+import argparse
+import asyncio
+import glob
+import json
+import os
+import platform
+import random
+import subprocess
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+from bs4 import BeautifulSoup
+
+from async_extract import ClientDetails
+from cleaning import DOSSIER_DONNEES, nettoyer
+from coinafrique_fields import CATEGORIES, champs_manquants, extraire_ligne
+from local_server import chemin_local, sauvegarder_page, servir_pages
+from page_cache import DOSSIER_CACHE, CachePages
+from static_extract import creer_session, parser_liste, scraper_detail_statique, valeurs_brutes
+
+# --- Banc d'essai hors ligne ---
+# Un corpus de pages coinafrique (listes + détails) servi par la doublure locale
+# (local_server.py), puis mesure de :
+#   - chaque moteur (statique, async, Selenium si Chrome est disponible) : pages/s, latence p50/p95 ;
+#     Selenium avec ses deux profils de navigateur (complet / léger) et les octets reçus par page
+#   - le coût d'analyse : BeautifulSoup, puis chaque champ de la spécification
+#   - le chargement des données du tableau de bord (CSV vs Parquet) et le rendu de f_main.py
+# Résultats en JSON dans benchmarks/ ; chaque run est comparé au précédent.
+#
+# Corpus : les pages du cache disque d'un vrai crawl (--depuis-cache), sinon des
+# pages générées avec le balisage coinafrique et les valeurs réelles de data/*.csv.
+#
+#   python benchmark.py                          # corpus généré, 200 pages de détail
+#   python benchmark.py --depuis-cache cache_pages --latence 0.05
+#   python benchmark.py --selenium --pages 50       # profils 'complet' et 'leger' du navigateur
+
+DOSSIER_RESULTATS = 'benchmarks'
+NB_PAGES = 200
+ANNONCES_PAR_LISTE = 20
+REPETITIONS = 5
+TAILLE_REMPLISSAGE = 40_000 # Octets de scripts / menus ajoutés aux pages générées (taille proche d'une vraie page)
+# Ressources des pages générées pour Selenium : photos propres à chaque annonce, police et
+# traqueur communs au site (ce que le profil léger du navigateur ne télécharge pas)
+IMAGES_PAR_ANNONCE = 3
+TAILLE_IMAGE = 60_000
+TAILLE_POLICE = 80_000
+TAILLE_TRAQUEUR = 90_000
+RESSOURCES = """<link rel="stylesheet" href="/static/site.css"><script async src="/gtag/js?id=G-BANC"></script>"""
+FEUILLE_DE_STYLE = "@font-face { font-family: Site; src: url(/static/police.woff2); } body { font-family: Site; }"
+
+MODELE_DETAIL = """<html><head><title>{titre}</title><script>{remplissage}</script>{ressources}</head><body>
+<nav class="menu">{menu}</nav>
+<div class="ad-details"><h1 class="title">{titre}</h1><p class="price">{prix}</p>
+<div class="hide-on-med-and-down"><ul>
+<li><span class="qt">{quantite}</span> {unite}</li><li><span class="qt">{salles}</span> Salle(s) de bain</li>
+</ul></div>
+<div class="extra-info-ad-detail"><p>Publié il y a 3 jours</p><p>{adresse}</p></div>
+<div class="swiper-slide swiper-slide-active" style='{image}'></div>{galerie}</div>
+</body></html>"""
+
+MODELE_CARTE = """<div class="col s6 m4 l3"><div class="card ad__card">
+<a class="card-image ad__card-image" href="{chemin}"><img class="ad__card-img" src="{image}"></a>
+<div class="card-content"><p class="ad__card-price">{prix}</p><p class="ad__card-description">{titre}</p>
+<p class="ad__card-location"><span>{adresse}</span></p></div></div></div>"""
+
+
+def _valeur(valeur, defaut=''):
+    return defaut if pd.isna(valeur) else str(valeur)
+
+
+def _generer_ressources(dossier, hasard):
+    # Une seule photo sur disque, liée (lien physique) sous le nom de chaque photo d'annonce
+    photo = sauvegarder_page(dossier, '/static/photo.jpg', hasard.randbytes(TAILLE_IMAGE))
+    sauvegarder_page(dossier, '/static/police.woff2', hasard.randbytes(TAILLE_POLICE))
+    sauvegarder_page(dossier, '/static/site.css', FEUILLE_DE_STYLE)
+    sauvegarder_page(dossier, '/gtag/js?id=G-BANC', 'var gtag;' + ' ' * TAILLE_TRAQUEUR)
+    return photo
+
+
+def _galerie(dossier, photo, numero):
+    chemins = [f"/static/photos/{numero}-{rang}.jpg" for rang in range(IMAGES_PAR_ANNONCE)]
+    for chemin in chemins:
+        fichier = chemin_local(dossier, chemin)
+        os.makedirs(os.path.dirname(fichier), exist_ok=True)
+        os.link(photo, fichier)
+    return ''.join(f'<div class="swiper-slide" style="background-image: url({chemin})"></div>' for chemin in chemins)
+
+
+def generer_corpus(dossier, nb_pages=NB_PAGES, graine=0, ressources=False):
+    # Pages de détail et de liste au balisage coinafrique, remplies avec les lignes de data/*.csv.
+    # 'ressources' : photos, police et traqueur servis en local (mesure des profils du navigateur)
+    hasard = random.Random(graine)
+    remplissage = ''.join(hasard.choice('abcdefghij;(){} ') for _ in range(TAILLE_REMPLISSAGE))
+    menu = ''.join(f'<a href="/categorie/{i}">Catégorie {i}</a>' for i in range(200))
+    photo = _generer_ressources(dossier, hasard) if ressources else None
+    urls = []
+    for categorie in CATEGORIES:
+        chemin_csv = os.path.join(DOSSIER_DONNEES, f"{categorie}.csv")
+        brut = pd.read_csv(chemin_csv).head(nb_pages // len(CATEGORIES) + 1)
+        propre = nettoyer(brut)
+        colonnes = brut.columns
+        cartes = []
+        for (_, ligne), (_, nette) in zip(brut.iterrows(), propre.iterrows()):
+            chemin = '/' + nette['url'].split('/', 3)[3]
+            titre = _valeur(nette.get('type_annonce'), chemin.rsplit('/', 1)[-1].replace('-', ' '))
+            quantite = ligne[[c for c in colonnes if c in ('nombre_de_pieces', 'superficie')][0]]
+            valeurs = {
+                'titre': titre,
+                'prix': _valeur(ligne[[c for c in colonnes if c.startswith('prix')][0]]),
+                'quantite': _valeur(quantite).replace(' m2', ''),
+                'unite': 'm²' if categorie == 'terrains' else 'Pièces',
+                'salles': hasard.randint(1, 4),
+                'adresse': _valeur(ligne[[c for c in colonnes if c.startswith('adresse')][0]]),
+                'image': _valeur(ligne[[c for c in colonnes if c.startswith('image')][0]]),
+            }
+            galerie = _galerie(dossier, photo, len(urls)) if ressources else ''
+            sauvegarder_page(dossier, chemin, MODELE_DETAIL.format(
+                remplissage=remplissage, menu=menu, ressources=RESSOURCES if ressources else '', galerie=galerie, **valeurs,
+            ))
+            cartes.append(MODELE_CARTE.format(chemin=chemin, **{**valeurs, 'image': _valeur(nette['image'])}))
+            urls.append(chemin)
+        for numero in range(0, len(cartes), ANNONCES_PAR_LISTE):
+            page = numero // ANNONCES_PAR_LISTE + 1
+            contenu = f"<html><body><nav>{menu}</nav>{''.join(cartes[numero:numero + ANNONCES_PAR_LISTE])}</body></html>"
+            sauvegarder_page(dossier, f"{CATEGORIES[categorie]['chemin']}?page={page}", contenu)
+    return urls[:nb_pages]
+
+
+def exporter_cache(dossier_cache, dossier, nb_pages=NB_PAGES):
+    # Corpus réel : les pages d'un cache page_cache.CachePages (crawl lancé avec --cache)
+    cache = CachePages(dossier_cache, rejouer=True)
+    urls = []
+    for fichier in sorted(glob.glob(os.path.join(dossier_cache, 'index', '*.json'))):
+        with open(fichier, encoding='utf-8') as f:
+            url = json.load(f)['url']
+        chemin = '/' + url.split('/', 3)[3]
+        sauvegarder_page(dossier, chemin, cache.lire(url))
+        if '/annonce/' in chemin:
+            urls.append(chemin)
+    return urls[:nb_pages]
+
+
+def categorie_de(url):
+    for categorie in CATEGORIES:
+        if f"/{categorie}/" in url:
+            return categorie
+    return next(iter(CATEGORIES))
+
+
+def _resume(latences, duree):
+    latences = np.asarray(latences) * 1000
+    return {
+        'pages': len(latences),
+        'pages_par_seconde': round(len(latences) / duree, 1) if duree else None,
+        'latence_p50_ms': round(float(np.percentile(latences, 50)), 2),
+        'latence_p95_ms': round(float(np.percentile(latences, 95)), 2),
+    }
+
+
+def mesurer_statique(urls):
+    session = creer_session()
+    latences = []
+    debut = time.perf_counter()
+    for url in urls:
+        depart = time.perf_counter()
+        scraper_detail_statique(session, url, CATEGORIES[categorie_de(url)]['champs'])
+        latences.append(time.perf_counter() - depart)
+    return _resume(latences, time.perf_counter() - debut)
+
+
+def mesurer_async(urls, concurrence):
+    latences = []
+
+    async def une_page(client, url):
+        # Latence vue par l'appelant : attente d'une place parmi les 'concurrence' requêtes en vol comprise
+        depart = time.perf_counter()
+        await client.scraper(url, CATEGORIES[categorie_de(url)]['champs'])
+        latences.append(time.perf_counter() - depart)
+
+    async def tout():
+        async with ClientDetails(concurrence=concurrence, debit_par_hote={}) as client:
+            await asyncio.gather(*(une_page(client, url) for url in urls))
+
+    debut = time.perf_counter()
+    asyncio.run(tout())
+    return {**_resume(latences, time.perf_counter() - debut), 'concurrence': concurrence}
+
+
+def mesurer_selenium(urls, chemin_driver=None, profil='complet'):
+    from selenium.common.exceptions import WebDriverException
+
+    from readiness import AttenteAdaptative
+    from selenium_extract import creer_driver, octets_page, scraper_detail_selenium
+
+    try:
+        driver = creer_driver(chemin_driver, profil=profil)
+    except WebDriverException as e:
+        return {'ignore': f"navigateur indisponible : {e.msg}"}
+    attente = AttenteAdaptative()
+    latences = []
+    octets = []
+    manquants = 0
+    try:
+        debut = time.perf_counter()
+        for url in urls:
+            depart = time.perf_counter()
+            champs = CATEGORIES[categorie_de(url)]['champs']
+            ligne = scraper_detail_selenium(driver, url, champs, attente=attente)
+            latences.append(time.perf_counter() - depart)
+            # Octets reçus quand l'extraction est finie (le profil léger n'attend pas la fin du chargement)
+            octets.append(octets_page(driver))
+            manquants += len(champs_manquants(ligne, champs))
+        return {
+            **_resume(latences, time.perf_counter() - debut), 'profil': profil,
+            'ko_par_page': round(sum(octets) / len(octets) / 1024, 1), 'champs_manquants': manquants,
+        }
+    finally:
+        driver.quit()
+
+
+def mesurer_analyse(dossier, urls):
+    # Coût par page : construction de l'arbre BeautifulSoup, puis chaque champ de la spécification
+    pages = []
+    for url in urls:
+        with open(os.path.join(dossier, *url.strip('/').split('/')) + '.html', encoding='utf-8') as f:
+            pages.append((url, f.read()))
+    debut = time.perf_counter()
+    soupes = [(url, BeautifulSoup(html, 'html.parser')) for url, html in pages]
+    resultat = {'bs4_ms_par_page': round((time.perf_counter() - debut) * 1000 / len(pages), 3), 'champs_us': {}}
+    for categorie, definition in CATEGORIES.items():
+        soupes_categorie = [(url, soupe) for url, soupe in soupes if categorie_de(url) == categorie]
+        if not soupes_categorie:
+            continue
+        for champ in definition['champs']:
+            debut = time.perf_counter()
+            for url, soupe in soupes_categorie:
+                extraire_ligne(url, [champ], lambda strategie: valeurs_brutes(soupe, strategie))
+            duree = (time.perf_counter() - debut) * 1e6 / len(soupes_categorie)
+            resultat['champs_us'][f"{categorie}.{champ['nom']}"] = round(duree, 1)
+    listes = glob.glob(os.path.join(dossier, 'categorie', '*.html'))
+    if listes:
+        debut = time.perf_counter()
+        for fichier in listes:
+            with open(fichier, encoding='utf-8') as f:
+                html = f.read()
+            categorie = categorie_de(f"/{os.path.basename(fichier).split('__')[0]}/") # categorie/villas__page=1.html
+            parser_liste(html, 'http://127.0.0.1', CATEGORIES[categorie]['champs_carte'])
+        resultat['liste_avec_cartes_ms_par_page'] = round((time.perf_counter() - debut) * 1000 / len(listes), 3)
+    return resultat
+
+
+def _meilleur_temps(fonction, repetitions=REPETITIONS):
+    durees = []
+    for _ in range(repetitions):
+        debut = time.perf_counter()
+        fonction()
+        durees.append(time.perf_counter() - debut)
+    return round(min(durees) * 1000, 2)
+
+
+def mesurer_chargement():
+    import columnar_store
+
+    resultat = {}
+    for chemin_csv in sorted(glob.glob(os.path.join(DOSSIER_DONNEES, '*.csv'))):
+        nom = os.path.splitext(os.path.basename(chemin_csv))[0]
+        if not columnar_store.est_a_jour(chemin_csv):
+            columnar_store.construire(chemin_csv)
+        resultat[nom] = {
+            'csv_ms': _meilleur_temps(lambda: pd.read_csv(chemin_csv)),
+            'csv_nettoye_ms': _meilleur_temps(lambda: nettoyer(pd.read_csv(chemin_csv))),
+            'parquet_ms': _meilleur_temps(lambda: columnar_store.charger(chemin_csv)),
+            'parquet_2_colonnes_ms': _meilleur_temps(lambda: columnar_store.charger(chemin_csv, ['prix', 'commune'])),
+        }
+    return resultat
+
+
+def mesurer_rendu():
+    # Rendu complet de f_main.py (premier run : chargements ; rerun : caches chauds)
+    from streamlit.testing.v1 import AppTest
+
+    application = AppTest.from_file('f_main.py', default_timeout=120)
+    debut = time.perf_counter()
+    application.run()
+    premier = time.perf_counter() - debut
+    rerun = _meilleur_temps(application.run, repetitions=3)
+    return {'premier_run_ms': round(premier * 1000, 1), 'rerun_ms': rerun, 'erreurs': len(application.exception)}
+
+
+def _commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _aplatir(donnees, prefixe=''):
+    for cle, valeur in donnees.items():
+        if isinstance(valeur, dict):
+            yield from _aplatir(valeur, f"{prefixe}{cle}.")
+        elif isinstance(valeur, (int, float)) and not isinstance(valeur, bool):
+            yield f"{prefixe}{cle}", valeur
+
+
+def comparer(precedent, actuel):
+    anciens = dict(_aplatir(precedent['mesures']))
+    for cle, valeur in _aplatir(actuel['mesures']):
+        if anciens.get(cle):
+            ecart = (valeur - anciens[cle]) / anciens[cle]
+            if abs(ecart) >= 0.1:
+                print(f"  {cle} : {anciens[cle]} -> {valeur} ({ecart:+.0%})")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Banc d'essai hors ligne des moteurs de scraping et du tableau de bord")
+    parser.add_argument('--pages', type=int, default=NB_PAGES, help="nombre de pages de détail mesurées")
+    parser.add_argument('--depuis-cache', nargs='?', const=DOSSIER_CACHE, help="corpus tiré du cache disque d'un crawl")
+    parser.add_argument('--latence', type=float, default=0.0, help="latence simulée du serveur local (s)")
+    parser.add_argument('--concurrence', type=int, default=8)
+    parser.add_argument('--selenium', action='store_true', help="mesurer aussi Selenium, profils 'complet' et 'leger' (Chrome requis)")
+    parser.add_argument('--chemin-driver')
+    parser.add_argument('--sans-tableau-de-bord', action='store_true', help="ne pas mesurer le chargement / rendu de f_main.py")
+    parser.add_argument('--sortie', default=DOSSIER_RESULTATS)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as dossier:
+        if args.depuis_cache:
+            chemins = exporter_cache(args.depuis_cache, dossier, args.pages)
+        else:
+            chemins = generer_corpus(dossier, args.pages, ressources=args.selenium)
+        print(f"Corpus : {len(chemins)} pages de détail ({'cache ' + args.depuis_cache if args.depuis_cache else 'généré'}).")
+        mesures = {'analyse': mesurer_analyse(dossier, chemins), 'moteurs': {}}
+        with servir_pages(dossier, latence=args.latence) as base:
+            urls = [base + chemin for chemin in chemins]
+            mesures['moteurs']['statique'] = mesurer_statique(urls)
+            mesures['moteurs']['async'] = mesurer_async(urls, args.concurrence)
+            if args.selenium:
+                for profil in ('complet', 'leger'):
+                    mesures['moteurs'][f"selenium_{profil}"] = mesurer_selenium(urls, args.chemin_driver, profil)
+    if not args.sans_tableau_de_bord:
+        mesures['chargement'] = mesurer_chargement()
+        mesures['rendu'] = mesurer_rendu()
+
+    resultat = {
+        'date': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'commit': _commit(),
+        'python': platform.python_version(),
+        'parametres': {
+            'pages': len(chemins), 'latence': args.latence, 'concurrence': args.concurrence,
+            'corpus': args.depuis_cache or ('genere_avec_ressources' if args.selenium else 'genere'),
+        },
+        'mesures': mesures,
+    }
+    print(json.dumps(mesures, indent=2, ensure_ascii=False))
+
+    os.makedirs(args.sortie, exist_ok=True)
+    # Comparaison avec le dernier run aux mêmes paramètres
+    for chemin_precedent in sorted(glob.glob(os.path.join(args.sortie, '*.json')), reverse=True):
+        with open(chemin_precedent, encoding='utf-8') as f:
+            precedent = json.load(f)
+        if precedent.get('parametres') == resultat['parametres']:
+            print(f"\n--- Écarts de plus de 10 % depuis {os.path.basename(chemin_precedent)} ---")
+            comparer(precedent, resultat)
+            break
+    chemin = os.path.join(args.sortie, f"{time.strftime('%Y%m%d-%H%M%S')}_{resultat['commit'] or 'local'}.json")
+    with open(chemin, 'w', encoding='utf-8') as f:
+        json.dump(resultat, f, indent=2, ensure_ascii=False)
+    print(f"\nRésultats enregistrés dans {chemin}")
+
+
+if __name__ == '__main__':
+    main()
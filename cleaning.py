@@ -0,0 +1,142 @@
+import argparse
+import os
+
+import pandas as pd
+
+from coinafrique_fields import REGEX_IMAGE, VALEUR_MANQUANTE
+
+# --- Nettoyage des données immobilières (villas, appartements, terrains) ---
+# Entrée : les exports Web Scraper de data/*.csv ou les sorties *_coinafrique.csv
+# des scripts de scraping. Sortie : un schéma commun aux trois catégories, typé :
+#   transaction      category : 'vente' ou 'location', lue dans le titre de l'URL (NA si non précisée)
+#   prix             Int64 (NA pour "Prix sur demande")
+#   superficie       float (m²)
+#   nombre_de_pieces UInt8
+#   commune / ville  category, tirées de l'adresse ("Ouakam, Dakar, Sénégal")
+#   image            URL seule (sans "background-image: url(...)")
+# Tout est vectorisé (méthodes .str de pandas, pas de boucle Python par ligne).
+#
+#   python cleaning.py                 # nettoie data/*.csv et affiche le gain mémoire
+
+DOSSIER_DONNEES = 'data'
+DOSSIER_IMAGES = os.path.join(DOSSIER_DONNEES, 'images') # Stock des photos (image_store.py)
+PIECES_MAX = 30 # Au-delà, le "nombre de pièces" lu sur la page est en fait une superficie
+
+# Noms des colonnes brutes -> schéma commun
+RENOMMAGE = {
+    'containers_villas-href': 'url',
+    'containers_appartements-href': 'url',
+    'containers_terrains-href': 'url',
+    'prix_building': 'prix',
+    'prix_appartement': 'prix',
+    'prix_terrain': 'prix',
+    'price': 'prix',
+    'adresse_building': 'adresse',
+    'adresse_appartement': 'adresse',
+    'adresse_terrain': 'adresse',
+    'image_lien': 'image',
+    'image_appartement': 'image',
+    'image_terrain': 'image',
+}
+COLONNES = [
+    'url', 'type_annonce', 'transaction', 'prix', 'nombre_de_pieces', 'nombre_de_salles_de_bain', 'superficie',
+    'adresse', 'commune', 'ville', 'image',
+]
+REGEX_LOCATION = r'\b(?:location|louer)\b'
+REGEX_VENTE = r'\b(?:vente|vendre)\b'
+REGEX_ADRESSE = r'^\s*(?P<commune>[^,]+?)\s*(?:,\s*(?P<ville>[^,]+?)\s*)?,\s*[^,]+$' # "Commune[, Ville], Pays"
+
+
+def _texte(serie):
+    # Chaînes sans espaces superflus, valeurs manquantes du scraper ('N/A', '') -> NA
+    serie = serie.astype('string').str.strip()
+    return serie.mask(serie.isin(['', VALEUR_MANQUANTE]))
+
+
+def _prix(serie):
+    # "350 000 CFA" -> 350000 ; "Prix sur demande" -> NA
+    chiffres = serie.str.replace(r'\D', '', regex=True)
+    return pd.to_numeric(chiffres.mask(chiffres == ''), errors='coerce').astype('Int64')
+
+
+def _nombre(serie):
+    # Premier nombre de la chaîne ("150 m2" -> 150.0, "1,5" -> 1.5)
+    return pd.to_numeric(serie.str.extract(r'(\d+(?:[.,]\d+)?)', expand=False).str.replace(',', '.'), errors='coerce')
+
+
+def _petit_entier(valeurs):
+    return valeurs.round().astype('UInt8')
+
+
+def nettoyer(df):
+    brut = df.rename(columns=RENOMMAGE)
+    propre = pd.DataFrame(index=brut.index)
+    for colonne in ('url', 'type_annonce', 'adresse'):
+        if colonne in brut:
+            propre[colonne] = _texte(brut[colonne])
+
+    if 'url' in propre:
+        # ".../annonce/villas/location-villa-4-pieces-ouakam-2228050" -> location : loyers et prix de vente
+        # ne se mélangent pas dans les statistiques (aggregates.py)
+        titre = propre['url'].str.replace(r'^.*/annonce/[^/]+/', '', regex=True)
+        transaction = pd.Series(pd.NA, index=brut.index, dtype='string')
+        transaction = transaction.mask(titre.str.contains(REGEX_VENTE).fillna(False).astype(bool), 'vente')
+        propre['transaction'] = transaction.mask(titre.str.contains(REGEX_LOCATION).fillna(False).astype(bool), 'location').astype('category')
+
+    if 'prix' in brut:
+        propre['prix'] = _prix(_texte(brut['prix']))
+
+    superficie = pd.Series(float('nan'), index=brut.index)
+    if 'superficie' in brut:
+        superficie = _nombre(_texte(brut['superficie']))
+    if 'nombre_de_pieces' in brut:
+        # Chez les villas/appartements, le premier champ chiffré est parfois une superficie ("250 m2", "300")
+        texte = _texte(brut['nombre_de_pieces'])
+        valeurs = _nombre(texte)
+        est_superficie = texte.str.contains(r'm\s*(?:2|²)', case=False, regex=True).fillna(False) | (valeurs > PIECES_MAX)
+        propre['nombre_de_pieces'] = _petit_entier(valeurs.mask(est_superficie))
+        superficie = superficie.fillna(valeurs.where(est_superficie))
+    if 'nombre_de_salles_de_bain' in brut:
+        salles = _nombre(_texte(brut['nombre_de_salles_de_bain']))
+        propre['nombre_de_salles_de_bain'] = _petit_entier(salles.mask(salles > PIECES_MAX))
+    if 'superficie' in brut or 'nombre_de_pieces' in brut:
+        propre['superficie'] = superficie.astype('float64')
+
+    if 'adresse' in propre:
+        parties = propre['adresse'].str.extract(REGEX_ADRESSE)
+        propre['commune'] = parties['commune'].astype('category')
+        # "Saly, Sénégal" : la commune est aussi la ville
+        propre['ville'] = parties['ville'].fillna(parties['commune']).astype('category')
+
+    if 'image' in brut:
+        image = _texte(brut['image'])
+        propre['image'] = image.str.extract(REGEX_IMAGE, expand=True)[1].fillna(image.where(image.str.startswith('http')))
+
+    return propre[[colonne for colonne in COLONNES if colonne in propre]]
+
+
+def memoire(df):
+    return int(df.memory_usage(deep=True).sum())
+
+
+def rapport_memoire(avant, apres):
+    return f"{memoire(avant) / 1e6:.1f} Mo -> {memoire(apres) / 1e6:.1f} Mo ({memoire(apres) / max(memoire(avant), 1):.0%})"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Nettoyage et typage des données immobilières")
+    parser.add_argument('fichiers', nargs='*', help=f"CSV à nettoyer (par défaut : {DOSSIER_DONNEES}/*.csv)")
+    args = parser.parse_args(argv)
+    fichiers = args.fichiers or sorted(
+        os.path.join(DOSSIER_DONNEES, nom) for nom in os.listdir(DOSSIER_DONNEES) if nom.endswith('.csv')
+    )
+    for chemin in fichiers:
+        brut = pd.read_csv(chemin)
+        propre = nettoyer(brut)
+        print(f"\n--- {chemin} : {len(propre)} lignes, mémoire {rapport_memoire(brut, propre)} ---")
+        print(propre.dtypes.to_string())
+        print(propre.head())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,694 @@
+import argparse
+import asyncio
+import time
+from collections import Counter
+from urllib.parse import urljoin, urlparse, parse_qs, urlencode
+
+import pandas as pd
+from selenium.common.exceptions import WebDriverException
+from selenium.webdriver.common.by import By
+
+from async_extract import ClientDetails, scraper_details
+from coinafrique_fields import (
+    BASE_URL, CATEGORIES, SELECTEUR_LIENS, champs_manquants, colonnes, completer_ligne, est_annonce, ligne_vide,
+)
+from cleaning import nettoyer
+from crawl_store import CHEMIN_ETAT, OK, EtatCrawl, id_annonce, statut_ligne
+from dedup_index import CHEMIN_DOUBLONS, IndexDoublons, empreintes
+from output_sink import EcrivainFlux
+from page_cache import DOSSIER_CACHE, CachePages
+from pool_extract import scraper_details_pool
+from readiness import AttenteAdaptative
+from retry_scheduler import DISPARUE, ECHECS_HOTE, SELECTEUR, Reprises, classer
+from scrape_metrics import CHEMIN_MESURES, Chrono, MesuresCrawl, nom_erreur
+from selenium_extract import PROFIL, PROFILS, creer_driver, scraper_detail_selenium
+from static_extract import creer_session, parser_liste, scraper_detail_statique, telecharger_page
+
+# --- Moteur de scraping commun à toutes les catégories coinafrique ---
+# Les catégories (chemin, filtre des liens, champs) sont déclarées dans
+# coinafrique_fields.CATEGORIES. Un run peut crawler plusieurs catégories :
+# leurs pages de liste et leurs files d'annonces sont entrelacées, et la session
+# HTTP comme le navigateur ne sont démarrés qu'une fois.
+#
+#   python coinafrique_extract.py                      # toutes les catégories
+#   python coinafrique_extract.py villas --pages 10
+#   python coinafrique_extract.py --pages 119 --rejouer  # re-parse hors ligne depuis le cache
+
+PAGES_MAX = 119 # La limite max du site est 119 (page=119)
+CHEMIN_DRIVER = r'C:\chrome-win64\chromedriver-win64\chromedriver.exe'
+
+MOTEUR_STATIQUE = True # requests + BeautifulSoup avant Selenium
+MOTEUR_ASYNC = True # Pages de détail récupérées en parallèle (asyncio)
+PIPELINE = True # Pages de détail scrapées pendant la pagination (sinon deux phases)
+TAILLE_FILE = 200 # Annonces en attente entre la pagination et les workers de détail
+LIRE_CARTES = True # Annonces complètes dès la carte de la page de liste : pas de page de détail
+CONCURRENCE = 8
+REQUETES_PAR_SECONDE = 4.0
+POOL_NAVIGATEURS = 0 # Chrome headless en parallèle pour les pages incomplètes (0 = un seul navigateur)
+SCRIPT_UNIQUE = True # Tous les champs lus en un seul execute_script
+ARRET_SI_PAGE_CONNUE = True # Fin de pagination dès qu'une page ne contient que des annonces connues
+REPRENDRE_ECHECS = True # Échecs passagers retentés plus tard (retry_scheduler.py)
+ECHECS_CONSECUTIFS_MAX = 3 # Pages de liste en échec d'affilée avant d'abandonner la catégorie
+TAILLE_LOT_SORTIE = 100
+
+
+# --- Fonction pour construire l'URL de la page ---
+def get_page_url(base_url, page_number):
+    parsed_url = urlparse(base_url)
+    query_params = parse_qs(parsed_url.query)
+    query_params['page'] = [str(page_number)]
+    new_query = urlencode(query_params, doseq=True)
+    return parsed_url._replace(query=new_query).geturl()
+
+
+def entrelacer(listes):
+    # [a1, a2], [b1] -> [a1, b1, a2] : les catégories avancent ensemble
+    resultat = []
+    for rang in range(max((len(liste) for liste in listes), default=0)):
+        for liste in listes:
+            if rang < len(liste):
+                resultat.append(liste[rang])
+    return resultat
+
+
+class Navigateur:
+    # Un seul Chrome partagé par toutes les catégories, démarré à la première page qui en a besoin
+    def __init__(self, chemin_driver=CHEMIN_DRIVER, headless=True, profil=PROFIL, limiteur=None):
+        self.chemin_driver = chemin_driver
+        self.headless = headless
+        self.profil = profil
+        self.attente = AttenteAdaptative(limiteur=limiteur)
+        self._driver = None
+
+    @property
+    def driver(self):
+        if self._driver is None:
+            print("  Démarrage du navigateur...")
+            self._driver = creer_driver(self.chemin_driver, self.headless, self.profil)
+        return self._driver
+
+    def fermer(self):
+        if self._driver is not None:
+            try:
+                self._driver.quit()
+            except Exception:
+                pass
+            self._driver = None
+
+
+# --- Collecte des URLs des annonces ---
+
+def _hors_ligne(cache):
+    return cache is not None and cache.rejouer
+
+
+def _liens_page_liste(url, session, navigateur, cache, champs_carte, mesure, disjoncteurs):
+    # Renvoie (liens, cartes, classe) ; 'classe' : classe de l'échec (retry_scheduler) quand il n'y a aucun lien
+    classe_statique = None
+    if session is not None:
+        try:
+            with Chrono(mesure, 'telechargement_ms'):
+                html = telecharger_page(session, url, cache=cache, disjoncteurs=disjoncteurs)
+            with Chrono(mesure, 'analyse_ms'):
+                liens, cartes = parser_liste(html, BASE_URL, champs_carte)
+            if liens or _hors_ligne(cache):
+                return liens, cartes, None if liens else SELECTEUR
+            classe_statique = SELECTEUR
+            print("  Aucun lien trouvé sans navigateur. Passage à Selenium.")
+        except Exception as e:
+            classe_statique = classer(e)
+            if mesure is not None:
+                mesure['erreur'] = nom_erreur(e)
+            if _hors_ligne(cache):
+                print(f"  Page de liste absente du cache : {url}")
+                return [], {}, classe_statique
+            print(f"  Erreur du moteur statique sur la page de liste : {e}. Passage à Selenium.")
+    if mesure is not None:
+        mesure['moteur'] = 'liste_selenium'
+        if session is not None:
+            mesure['repli'] = mesure.pop('erreur', 'aucun_lien') # Pourquoi le moteur statique a passé la main
+    try:
+        driver = navigateur.driver
+        with Chrono(mesure, 'navigation_ms'):
+            navigateur.attente.naviguer(driver, url)
+        with Chrono(mesure, 'attente_ms'):
+            present = navigateur.attente.attendre(driver, SELECTEUR_LIENS, tous=True)
+        if not present:
+            return [], {}, classe_statique or SELECTEUR
+        liens = [element.get_attribute('href') for element in driver.find_elements(By.CSS_SELECTOR, SELECTEUR_LIENS)]
+        # Les cartes sont lues dans le HTML rendu, comme pour le moteur statique
+        with Chrono(mesure, 'analyse_ms'):
+            cartes = parser_liste(driver.page_source, BASE_URL, champs_carte)[1] if champs_carte else {}
+    except WebDriverException as e:
+        print(f"  Erreur du navigateur sur la page de liste : {e.msg}")
+        if mesure is not None:
+            mesure['erreur'] = nom_erreur(e)
+        return [], {}, classe_statique or classer(e)
+    liens = [urljoin(BASE_URL, lien) for lien in liens if lien]
+    return liens, cartes, None if liens else classe_statique or SELECTEUR
+
+
+def liens_page_liste(url, session, navigateur, cache=None, champs_carte=None, mesures=None, disjoncteurs=None):
+    # Renvoie (liens, cartes, classe) : 'cartes' = lignes lues sur les cartes si 'champs_carte' ({url: ligne}),
+    # 'classe' = classe de l'échec si la page n'a donné aucun lien (None sinon)
+    if mesures is None:
+        return _liens_page_liste(url, session, navigateur, cache, champs_carte, None, disjoncteurs)
+    mesure = mesures.debut(url, 'liste')
+    liens, cartes, classe = _liens_page_liste(url, session, navigateur, cache, champs_carte, mesure, disjoncteurs)
+    mesure.update(nb_liens=len(liens), nb_cartes=len(cartes))
+    if classe:
+        mesure['classe'] = classe
+    if not liens and not mesure.get('erreur'):
+        mesure['issue'] = 'vide'
+    mesures.terminer(mesure)
+    return liens, cartes, classe
+
+
+def lire_page_liste(categorie, url_page, session, navigateur, cache, champs_carte, mesures, reprises):
+    # Annonces de la page de liste ; une page vide ou en erreur est retentée après un délai (si 'reprises')
+    disjoncteurs = reprises.disjoncteurs if reprises is not None else None
+    while True:
+        liens, cartes, classe = liens_page_liste(url_page, session, navigateur, cache, champs_carte, mesures, disjoncteurs)
+        urls_page = list(dict.fromkeys(url for url in liens if est_annonce(categorie, url)))
+        if urls_page:
+            if reprises is not None:
+                reprises.succes(url_page)
+            return urls_page, cartes, None
+        classe = classe or SELECTEUR # Des liens, mais aucun de la catégorie
+        attente = reprises.echec(url_page, classe) if reprises is not None else None
+        if attente is None:
+            return [], {}, classe
+        print(f"  Page sans annonce ({classe}) : nouvel essai dans {attente:.1f} s.")
+        time.sleep(attente)
+
+
+def _ajouter_page(categorie, urls_page, cartes, etat, publier):
+    nouvelles = etat.ajouter_urls(categorie, urls_page)
+    print(f"  {len(urls_page)} annonces sur la page ({nouvelles} nouvelles).")
+    if publier is not None:
+        publier(categorie, urls_page, cartes)
+    return nouvelles
+
+
+def collecter_urls(categories, max_pages, etat, session, navigateur, arret_si_page_connue=ARRET_SI_PAGE_CONNUE,
+                   cache=None, publier=None, lire_cartes=LIRE_CARTES, mesures=None, reprises=None):
+    # 'publier(categorie, urls_page, cartes)' : appelé à chaque page de liste (pipeline vers les pages de détail)
+    # 'reprises' : retry_scheduler.Reprises des pages de liste. Une page encore en échec passager
+    # (timeout, 429, 5xx) après ses nouveaux essais ne termine pas la catégorie : elle est
+    # reprise une dernière fois à la fin de la pagination.
+    # 'arret_si_page_connue' ne vaut que si le parcours précédent de la catégorie est allé à son terme
+    # (jusqu'à la dernière page de la liste, ou au moins jusqu'à 'max_pages') : après un crash, les pages
+    # déjà vues ne disent rien des pages suivantes, jamais parcourues.
+    actives = list(categories)
+    echecs_consecutifs = Counter()
+    differees = []
+    precedents = {} # catégorie -> (dernière page, dernière page de la liste atteinte) du parcours précédent terminé
+    fins = {} # Idem pour ce parcours
+    for categorie in categories:
+        derniere_page, terminee, fin_atteinte = etat.pagination(categorie)
+        if terminee and (fin_atteinte or derniere_page >= max_pages):
+            precedents[categorie] = (derniere_page, fin_atteinte)
+        elif arret_si_page_connue and derniere_page:
+            print(f"  [{categorie}] Pagination précédente interrompue à la page {derniere_page} : parcours complet.")
+        etat.noter_pagination(categorie, 0) # Parcours en cours jusqu'à sa fin
+    for page_num in range(1, max_pages + 1):
+        for categorie in list(actives):
+            url_page = get_page_url(urljoin(BASE_URL, CATEGORIES[categorie]['chemin']), page_num)
+            print(f"\n --- [{categorie}] Navigation vers la page {page_num}/{max_pages} : {url_page} ---")
+            champs_carte = CATEGORIES[categorie].get('champs_carte') if lire_cartes else None
+            urls_page, cartes, classe = lire_page_liste(
+                categorie, url_page, session, navigateur, cache, champs_carte, mesures, reprises,
+            )
+            if not urls_page:
+                if reprises is not None and classe in ECHECS_HOTE and echecs_consecutifs[categorie] < ECHECS_CONSECUTIFS_MAX:
+                    echecs_consecutifs[categorie] += 1
+                    differees.append((categorie, page_num, url_page))
+                    print(f"  Page {page_num} en échec ({classe}) : reprise à la fin de la pagination.")
+                    continue
+                # Si aucune annonce n'est trouvée sur la page actuelle, on arrête cette catégorie
+                print(f"  Aucune annonce trouvée sur la page {page_num}. Fin de la collecte des pages de {categorie}.")
+                actives.remove(categorie)
+                if classe not in ECHECS_HOTE: # Sinon la fin de la liste n'est pas sûre : parcours à refaire
+                    fins[categorie] = (page_num - 1, True)
+                continue
+            echecs_consecutifs[categorie] = 0
+            nouvelles = _ajouter_page(categorie, urls_page, cartes, etat, publier)
+            etat.noter_pagination(categorie, page_num)
+            if arret_si_page_connue and categorie in precedents and not nouvelles:
+                print(f"  La page {page_num} ne contient que des annonces déjà connues. Fin de la collecte des pages de {categorie}.")
+                actives.remove(categorie)
+                # Les pages suivantes ont été vues par le parcours précédent
+                derniere_page, fin_atteinte = precedents[categorie]
+                fins[categorie] = (max(derniere_page, page_num), fin_atteinte)
+        if not actives:
+            break
+    for categorie in actives:
+        fins[categorie] = (max_pages, False)
+
+    if differees:
+        print(f"\n{len(differees)} page(s) de liste en échec à reprendre.")
+    for categorie, page_num, url_page in differees:
+        print(f"\n --- [{categorie}] Reprise de la page {page_num} : {url_page} ---")
+        champs_carte = CATEGORIES[categorie].get('champs_carte') if lire_cartes else None
+        liens, cartes, classe = liens_page_liste(
+            url_page, session, navigateur, cache, champs_carte, mesures, reprises.disjoncteurs,
+        )
+        urls_page = list(dict.fromkeys(url for url in liens if est_annonce(categorie, url)))
+        if urls_page:
+            _ajouter_page(categorie, urls_page, cartes, etat, publier)
+        else:
+            print(f"  Page {page_num} toujours sans annonce ({classe or SELECTEUR}).")
+            fins.pop(categorie, None) # Page manquée : le prochain parcours ira jusqu'au bout
+
+    for categorie, (page_num, fin_atteinte) in fins.items():
+        etat.noter_pagination(categorie, page_num, terminee=True, fin_atteinte=fin_atteinte)
+
+
+# --- Scraping des pages de détail ---
+
+class Resultats:
+    # Destination des lignes : état persistant ('ok', ou 'echec' pour retenter au prochain run)
+    # et sortie en flux de la catégorie de l'annonce. Les annonces réussies sont aussi
+    # ajoutées à l'index des doublons (dedup_index.py) pour repérer les reposts.
+    # 'mesures' : scrape_metrics.MesuresCrawl partagé par les moteurs des pages de détail,
+    # 'reprises' : retry_scheduler.Reprises des pages de détail en échec passager.
+    def __init__(self, etat, sorties, doublons=None, mesures=None, reprises=None, taille_lot=TAILLE_LOT_SORTIE):
+        self.etat = etat
+        self.sorties = sorties
+        self.doublons = doublons
+        self.taille_lot = taille_lot
+        self._a_indexer = {} # catégorie -> [(url, ligne)] en attente de l'index des doublons
+        self.mesures = mesures
+        self.reprises = reprises
+        self.nb_reposts = 0
+        self.categorie_de = {}
+        self.cartes = {} # Lignes incomplètes lues sur les cartes, en attente de leur page de détail
+        self.nb_lignes = 0
+        self.nb_cartes = 0
+
+    def champs_de(self, url):
+        return CATEGORIES[self.categorie_de[url]]['champs']
+
+    def retiree(self, url):
+        # Annonce retirée du site (404, 410) : enregistrée en échec sans passer par le navigateur
+        return self.reprises is not None and self.reprises.classes.get(url) == DISPARUE
+
+    def carte(self, categorie, url, ligne):
+        # Ligne lue sur la carte de la page de liste : enregistrée tout de suite si elle est complète,
+        # sinon gardée pour compléter la page de détail. Renvoie True si la page de détail est inutile.
+        self.categorie_de[url] = categorie
+        ligne = completer_ligne(ligne_vide(url, self.champs_de(url)), ligne)
+        if champs_manquants(ligne, self.champs_de(url)):
+            self.cartes[url] = ligne
+            return False
+        self.enregistrer(url, ligne)
+        self.nb_cartes += 1
+        return True
+
+    def avec_carte(self, url, ligne):
+        # Les champs absents de la page de détail sont repris de la carte
+        carte = self.cartes.pop(url, None)
+        if ligne is None:
+            return carte
+        return completer_ligne(ligne, carte)
+
+    def publier_cartes(self, categorie, urls_page, cartes):
+        # Pour collecter_urls en deux phases : les annonces complètes sur leur carte sont enregistrées
+        # pendant la pagination et ne seront pas dans etat.urls_a_scraper()
+        for url in urls_page:
+            if url in cartes and not self.etat.est_fait(url):
+                self.carte(categorie, url, cartes[url])
+
+    def enregistrer(self, url, ligne):
+        categorie = self.categorie_de[url]
+        statut = statut_ligne(ligne, self.champs_de(url))
+        self.etat.enregistrer(categorie, ligne, statut)
+        self.sorties[categorie].ecrire(ligne)
+        self.nb_lignes += 1
+        if self.doublons is not None and statut == OK:
+            lot = self._a_indexer.setdefault(categorie, [])
+            lot.append((url, ligne))
+            if len(lot) >= self.taille_lot:
+                self._indexer(categorie)
+
+    def indexer(self):
+        # Vide les lots en attente (fin de crawl)
+        for categorie in list(self._a_indexer):
+            self._indexer(categorie)
+
+    def _indexer(self, categorie):
+        # Un nettoyage et une écriture SQLite par lot (les colonnes brutes diffèrent d'une catégorie à l'autre)
+        lot = [(id_annonce(url), url, ligne) for url, ligne in self._a_indexer.pop(categorie, [])]
+        lot = [(identifiant, url, ligne) for identifiant, url, ligne in lot if identifiant is not None]
+        if not lot:
+            return
+        ids = [identifiant for identifiant, _, _ in lot]
+        contenus = empreintes(nettoyer(pd.DataFrame([ligne for _, _, ligne in lot])))
+        self.doublons.enregistrer(categorie, ids, [url for _, url, _ in lot], contenus)
+        originaux = self.doublons.originaux(ids)
+        for identifiant, url, _ in lot:
+            original = originaux.get(identifiant, identifiant)
+            if original != identifiant:
+                self.nb_reposts += 1
+                print(f"  Repost de l'annonce {original} : {url}")
+
+
+def _est_terminee(ligne, champs, cache):
+    # Selenium seulement pour les annonces où des champs manquent (jamais hors ligne)
+    return _hors_ligne(cache) or (ligne is not None and not champs_manquants(ligne, champs))
+
+
+def scraper_avec_navigateur(navigateur, url, champs, un_seul_script, mesures=None, reprises=None):
+    # None si la page n'a rien donné et que 'reprises' la remet à plus tard
+    for tentative in range(2):
+        mesure = mesures.debut(url, 'selenium') if mesures is not None else None
+        try:
+            ligne = scraper_detail_selenium(
+                navigateur.driver, url, champs, attente=navigateur.attente, un_seul_script=un_seul_script, mesure=mesure,
+            )
+            if mesures is not None:
+                mesures.terminer(mesure, ligne, champs)
+            if reprises is not None and len(champs_manquants(ligne, champs)) == len(champs) and reprises.differer(url, SELECTEUR):
+                print(f"  Aucun champ lu sur {url} : nouvel essai en fin de passe.")
+                return None
+            return ligne
+        except WebDriverException as e:
+            print(f"  Erreur du navigateur sur {url} (tentative {tentative + 1}) : {e.msg}. Redémarrage.")
+            if mesures is not None:
+                mesure['erreur'] = nom_erreur(e)
+                mesures.terminer(mesure)
+            navigateur.fermer()
+    return ligne_vide(url, champs)
+
+
+def reprendre_avec_navigateur(a_reprendre, statiques, resultats, navigateur, pool_navigateurs=POOL_NAVIGATEURS,
+                              script_unique=SCRIPT_UNIQUE):
+    print(f"\n{len(a_reprendre)} annonces à reprendre avec Selenium.")
+    if not a_reprendre:
+        return
+    if pool_navigateurs:
+        lignes = scraper_details_pool(
+            a_reprendre, resultats.champs_de, nb_workers=pool_navigateurs,
+            chemin_driver=navigateur.chemin_driver, headless=navigateur.headless, profil=navigateur.profil,
+        )
+        for i, (url, ligne) in enumerate(zip(a_reprendre, lignes)):
+            print(f" --- Annonce {i+1}/{len(a_reprendre)} scrapée avec le navigateur : {url}")
+            resultats.enregistrer(url, completer_ligne(ligne, statiques.get(url)))
+        return
+
+    # Un seul navigateur : une page où rien n'a pu être lu est retentée à la fin de la passe
+    reprises = None
+    if resultats.reprises is not None:
+        reprises = Reprises(disjoncteurs=resultats.reprises.disjoncteurs)
+    lot = a_reprendre
+    numero = 0
+    while lot:
+        for url in lot:
+            numero += 1
+            ligne = scraper_avec_navigateur(navigateur, url, resultats.champs_de(url), script_unique, resultats.mesures, reprises)
+            print(f" --- Annonce {numero} scrapée avec le navigateur ({len(a_reprendre)} à reprendre) : {url}")
+            if ligne is not None:
+                resultats.enregistrer(url, completer_ligne(ligne, statiques.get(url)))
+        if reprises is None or not reprises:
+            break
+        time.sleep(reprises.attente())
+        lot = reprises.dues()
+    if reprises is not None and reprises.tentatives:
+        print(f"Navigateur : {reprises.rapport()}")
+
+
+def scraper_annonces(categories, etat, resultats, session, moteur_statique=MOTEUR_STATIQUE, moteur_async=MOTEUR_ASYNC,
+                     concurrence=CONCURRENCE, requetes_par_seconde=REQUETES_PAR_SECONDE, cache=None):
+    # Deux phases : toutes les pages de liste ont déjà été lues (collecter_urls).
+    # Annonces pas encore scrapées avec succès (celles de ce run et celles laissées par un run interrompu)
+    file = entrelacer([[(categorie, url) for url in etat.urls_a_scraper(categorie)] for categorie in categories])
+    resultats.categorie_de.update((url, categorie) for categorie, url in file)
+    urls = [url for _, url in file]
+    print(f"\n{len(urls)} annonces à scraper en détail ({', '.join(categories)}).")
+
+    statiques = {}
+    reprises = resultats.reprises
+    if moteur_statique and moteur_async:
+        print(f"Récupération concurrente des pages de détail ({concurrence} en parallèle)...")
+        lignes = scraper_details(
+            urls, resultats.champs_de, resultats.mesures, concurrence=concurrence,
+            debit_par_hote={urlparse(BASE_URL).hostname: requetes_par_seconde}, cache=cache, reprises=reprises,
+        )
+        statiques = dict(zip(urls, lignes))
+    elif moteur_statique:
+        mesures = resultats.mesures
+        disjoncteurs = reprises.disjoncteurs if reprises is not None else None
+
+        def scraper_statique(url, moteur):
+            mesure = mesures.debut(url, moteur) if mesures is not None else None
+            try:
+                statiques[url] = scraper_detail_statique(
+                    session, url, resultats.champs_de(url), cache=cache, mesure=mesure, disjoncteurs=disjoncteurs,
+                )
+                if reprises is not None:
+                    reprises.succes(url)
+            except Exception as e:
+                classe = classer(e)
+                differee = reprises is not None and reprises.differer(url, classe, e)
+                print(f"  Erreur du moteur statique sur {url} : {e}{' (nouvel essai plus tard)' if differee else ''}")
+                if mesure is not None:
+                    mesure.update(erreur=nom_erreur(e), classe=classe)
+            if mesures is not None:
+                mesures.terminer(mesure, statiques.get(url), resultats.champs_de(url))
+
+        for url in urls:
+            scraper_statique(url, 'statique')
+        while reprises:
+            time.sleep(reprises.attente())
+            for url in reprises.dues():
+                scraper_statique(url, 'statique_reprise')
+
+    a_reprendre = []
+    for url in urls:
+        ligne = statiques[url] = resultats.avec_carte(url, statiques.get(url))
+        if _est_terminee(ligne, resultats.champs_de(url), cache) or resultats.retiree(url):
+            resultats.enregistrer(url, ligne or ligne_vide(url, resultats.champs_de(url)))
+        else:
+            a_reprendre.append(url)
+    return a_reprendre, statiques
+
+
+async def _scraper_en_flux(categories, max_pages, etat, resultats, session, navigateur, concurrence, requetes_par_seconde,
+                           arret_si_page_connue, cache, taille_file, lire_cartes, reprises_listes):
+    boucle = asyncio.get_running_loop()
+    file = asyncio.Queue(maxsize=taille_file)
+    vues = set()
+    statiques = {}
+    a_reprendre = []
+    debut = time.perf_counter()
+
+    async def mettre(categorie, url, carte=None):
+        # Dédoublonnage à la volée sur l'identifiant d'annonce (la pagination se décale pendant le crawl)
+        cle = id_annonce(url) or url
+        if cle in vues:
+            return
+        vues.add(cle)
+        if carte is not None and resultats.carte(categorie, url, carte):
+            return
+        resultats.categorie_de[url] = categorie
+        await file.put(url) # Attend si la file est pleine : contre-pression sur la pagination
+
+    def publier(categorie, urls_page, cartes):
+        # Appelé depuis le thread de pagination ; les lignes sont toutes écrites depuis la boucle asyncio
+        for url in urls_page:
+            if not etat.est_fait(url):
+                asyncio.run_coroutine_threadsafe(mettre(categorie, url, cartes.get(url)), boucle).result()
+
+    async def producteur():
+        try:
+            # Les annonces laissées par un run interrompu d'abord
+            for categorie, url in entrelacer([[(categorie, url) for url in etat.urls_a_scraper(categorie)] for categorie in categories]):
+                await mettre(categorie, url)
+            await asyncio.to_thread(
+                collecter_urls, categories, max_pages, etat, session, navigateur, arret_si_page_connue, cache, publier,
+                lire_cartes, resultats.mesures, reprises_listes,
+            )
+        finally:
+            for _ in range(concurrence):
+                await file.put(None)
+
+    def traiter(url, ligne):
+        ligne = resultats.avec_carte(url, ligne)
+        if _est_terminee(ligne, resultats.champs_de(url), cache) or resultats.retiree(url):
+            if not resultats.nb_lignes:
+                print(f"  Première ligne écrite après {time.perf_counter() - debut:.1f} s.")
+            resultats.enregistrer(url, ligne)
+        else:
+            statiques[url] = ligne
+            a_reprendre.append(url)
+
+    async def consommateur(client):
+        while True:
+            url = await file.get()
+            if url is None:
+                return
+            try:
+                ligne = await client.scraper_mesure(url, resultats.champs_de(url), resultats.mesures)
+                if not (resultats.reprises is not None and resultats.reprises.en_attente(url)): # Sinon : passe différée
+                    traiter(url, ligne)
+            except Exception as e:
+                print(f"  Erreur lors du traitement de {url} : {e!r}")
+
+    async with ClientDetails(
+        concurrence=concurrence, debit_par_hote={urlparse(BASE_URL).hostname: requetes_par_seconde}, cache=cache,
+        reprises=resultats.reprises,
+    ) as client:
+        await asyncio.gather(producteur(), *(consommateur(client) for _ in range(concurrence)))
+        # Les pages en échec passager, retentées une fois la file vidée
+        for url, ligne in (await client.passe_differee(resultats.champs_de, resultats.mesures)).items():
+            try:
+                traiter(url, ligne)
+            except Exception as e:
+                print(f"  Erreur lors du traitement de {url} : {e!r}")
+    print(f"\n{len(vues)} annonces traitées en flux ({', '.join(categories)}) en {time.perf_counter() - debut:.1f} s.")
+    return a_reprendre, statiques
+
+
+def scraper_en_flux(categories, max_pages, etat, resultats, session, navigateur, concurrence=CONCURRENCE,
+                    requetes_par_seconde=REQUETES_PAR_SECONDE, arret_si_page_connue=ARRET_SI_PAGE_CONNUE, cache=None,
+                    taille_file=TAILLE_FILE, lire_cartes=LIRE_CARTES, reprises_listes=None):
+    # Pipeline : la pagination (thread de fond) alimente une file bornée que les
+    # workers de détail consomment aussitôt ; les lignes complètes sont écrites au fil de l'eau.
+    return asyncio.run(_scraper_en_flux(
+        categories, max_pages, etat, resultats, session, navigateur, concurrence, requetes_par_seconde,
+        arret_si_page_connue, cache, taille_file, lire_cartes, reprises_listes,
+    ))
+
+
+def crawler(categories, max_pages, chemin_etat=None, chemin_driver=CHEMIN_DRIVER, headless=True,
+            moteur_statique=MOTEUR_STATIQUE, moteur_async=MOTEUR_ASYNC, pipeline=PIPELINE, concurrence=CONCURRENCE,
+            requetes_par_seconde=REQUETES_PAR_SECONDE, pool_navigateurs=POOL_NAVIGATEURS, script_unique=SCRIPT_UNIQUE,
+            arret_si_page_connue=ARRET_SI_PAGE_CONNUE, lire_cartes=LIRE_CARTES, taille_lot=TAILLE_LOT_SORTIE, cache=None,
+            chemin_doublons=None, chemin_mesures=None, profil_navigateur=PROFIL, reprendre_echecs=REPRENDRE_ECHECS):
+    # Hors ligne, l'état et l'index des doublons sont en mémoire par défaut : toutes les annonces du cache sont re-parsées
+    # (les mesures par URL ne sont pas écrites, seul le résumé est affiché, et rien n'est retenté)
+    if chemin_etat is None:
+        chemin_etat = ':memory:' if _hors_ligne(cache) else CHEMIN_ETAT
+    if chemin_doublons is None:
+        chemin_doublons = ':memory:' if _hors_ligne(cache) else CHEMIN_DOUBLONS
+    if chemin_mesures is None and not _hors_ligne(cache):
+        chemin_mesures = CHEMIN_MESURES
+    etat = EtatCrawl(chemin_etat)
+    doublons = IndexDoublons(chemin_doublons)
+    mesures = MesuresCrawl(chemin_mesures)
+    reprises = reprises_listes = None
+    if reprendre_echecs and not _hors_ligne(cache):
+        # Pages de liste et pages de détail ont leurs propres tentatives, mais un disjoncteur commun par hôte
+        reprises = Reprises()
+        reprises_listes = Reprises(disjoncteurs=reprises.disjoncteurs)
+    session = creer_session() if moteur_statique else None
+    navigateur = Navigateur(chemin_driver, headless, profil_navigateur)
+    try:
+        # Sortie écrite en flux : les annonces des runs précédents d'abord, puis chaque nouvelle ligne
+        sorties = {}
+        for categorie in categories:
+            sorties[categorie] = EcrivainFlux(
+                f"{categorie}_coinafrique.csv", colonnes(CATEGORIES[categorie]['champs']),
+                chemin_parquet=f"{categorie}_coinafrique.parquet", taille_lot=taille_lot,
+            )
+            for ligne in etat.lignes(categorie, statut=OK):
+                sorties[categorie].ecrire(ligne)
+        resultats = Resultats(etat, sorties, doublons, mesures, reprises, taille_lot)
+
+        print(f"Début de la collecte des annonces ({', '.join(categories)}), jusqu'à {max_pages} pages.")
+        if pipeline and moteur_statique and moteur_async:
+            a_reprendre, statiques = scraper_en_flux(
+                categories, max_pages, etat, resultats, session, navigateur, concurrence=concurrence,
+                requetes_par_seconde=requetes_par_seconde, arret_si_page_connue=arret_si_page_connue, cache=cache,
+                lire_cartes=lire_cartes, reprises_listes=reprises_listes,
+            )
+        else:
+            collecter_urls(
+                categories, max_pages, etat, session, navigateur, arret_si_page_connue, cache,
+                publier=resultats.publier_cartes, lire_cartes=lire_cartes, mesures=mesures, reprises=reprises_listes,
+            )
+            a_reprendre, statiques = scraper_annonces(
+                categories, etat, resultats, session, moteur_statique=moteur_statique, moteur_async=moteur_async,
+                concurrence=concurrence, requetes_par_seconde=requetes_par_seconde, cache=cache,
+            )
+        if resultats.nb_cartes:
+            print(f"\n{resultats.nb_cartes} annonces complètes dès la page de liste (sans page de détail).")
+        reprendre_avec_navigateur(a_reprendre, statiques, resultats, navigateur, pool_navigateurs, script_unique)
+        resultats.indexer()
+        if resultats.nb_reposts:
+            print(f"\n{resultats.nb_reposts} reposts (même titre, prix, adresse et surface qu'une annonce plus ancienne).")
+
+        if navigateur.attente.nb_pages:
+            print("\n--- Temps d'attente et d'extraction (navigateur) ---")
+            print(navigateur.attente.rapport())
+        if reprises is not None:
+            print("\n--- Reprises des échecs ---")
+            print(f"Pages de liste : {reprises_listes.rapport()}")
+            print(f"Pages de détail : {reprises.rapport()}")
+            print(f"Ouvertures du disjoncteur : {reprises.disjoncteurs.nb_ouvertures()}")
+        print(f"\n--- Mesures par URL{f' ({mesures.chemin})' if mesures.chemin else ''} ---")
+        print(mesures.resume())
+
+        print("\n--- Scraping terminé ! Finalisation des fichiers de sortie... ---")
+        for categorie, sortie in sorties.items():
+            try:
+                sortie.finaliser()
+                print(f"\n--- Aperçu des données : {categorie} ---")
+                print(pd.DataFrame(sortie.apercu))
+                print(f"{sortie.nb_lignes} lignes sauvegardées dans {sortie.chemin_csv} et {sortie.chemin_parquet}")
+            except Exception as e:
+                print(f"Erreur lors de la sauvegarde des fichiers de {categorie} : {e}")
+    finally:
+        # --- Fermeture du navigateur ---
+        navigateur.fermer()
+        etat.fermer()
+        doublons.fermer()
+        mesures.fermer()
+
+
+def demander_nombre_pages():
+    while True:
+        try:
+            user_input = input(f"Entrez le nombre maximal de pages à scraper (max {PAGES_MAX}, 0 pour quitter) : ")
+            max_pages_to_scrape = int(user_input)
+            if 0 <= max_pages_to_scrape <= PAGES_MAX:
+                return max_pages_to_scrape
+            print(f"Veuillez entrer un nombre entre 0 et {PAGES_MAX}.")
+        except ValueError:
+            print("Entrée invalide. Veuillez entrer un nombre entier.")
+
+
+def main(categories=None, argv=None):
+    parser = argparse.ArgumentParser(description="Scraping des annonces immobilières de sn.coinafrique.com")
+    parser.add_argument('categories', nargs='*', help=f"catégories à scraper parmi {', '.join(CATEGORIES)} (toutes par défaut)")
+    parser.add_argument('--pages', type=int, help=f"nombre maximal de pages de liste par catégorie (max {PAGES_MAX}) ; demandé si absent")
+    parser.add_argument('--pool', type=int, default=POOL_NAVIGATEURS, help="nombre de Chrome headless en parallèle")
+    parser.add_argument('--visible', action='store_true', help="afficher le navigateur (mode non headless)")
+    parser.add_argument('--profil', choices=PROFILS, default=PROFIL,
+                        help="navigateur 'leger' (DOM prêt, sans images, polices ni traqueurs) ou 'complet' (page entière)")
+    parser.add_argument('--cache', nargs='?', const=DOSSIER_CACHE, help=f"cache disque des pages HTML (dossier, '{DOSSIER_CACHE}' par défaut)")
+    parser.add_argument('--rejouer', action='store_true', help="hors ligne : tout depuis le cache, sans réseau ni navigateur")
+    parser.add_argument('--etat', help=f"base SQLite de l'état du crawl ('{CHEMIN_ETAT}' par défaut, en mémoire avec --rejouer)")
+    parser.add_argument('--mesures', help=f"fichier JSONL des mesures par URL ('{CHEMIN_MESURES}' par défaut, aucun avec --rejouer)")
+    args = parser.parse_args(argv)
+
+    categories = args.categories or categories or list(CATEGORIES)
+    inconnues = [categorie for categorie in categories if categorie not in CATEGORIES]
+    if inconnues:
+        parser.error(f"catégories inconnues : {', '.join(inconnues)}")
+
+    max_pages = demander_nombre_pages() if args.pages is None else min(max(args.pages, 0), PAGES_MAX)
+    if max_pages == 0:
+        print("Scraping annulé par l'utilisateur.")
+        return
+    cache = None
+    if args.cache or args.rejouer:
+        cache = CachePages(args.cache or DOSSIER_CACHE, rejouer=args.rejouer)
+    crawler(
+        categories, max_pages, chemin_etat=args.etat, headless=not args.visible, pool_navigateurs=args.pool, cache=cache,
+        chemin_mesures=args.mesures, profil_navigateur=args.profil,
+    )
+
+
+if __name__ == '__main__':
+    main()
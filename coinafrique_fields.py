@@ -0,0 +1,207 @@
+import re
+import time
+
+# --- Spécification déclarative des champs des pages de détail coinafrique ---
+# Chaque champ est une liste de stratégies essayées dans l'ordre (comme les
+# try/except imbriqués des scripts *_extract.py). Une stratégie décrit :
+#   - 'css'       : sélecteur dont on lit le PREMIER élément
+#   - 'css_tous'  : sélecteur dont on parcourt TOUS les éléments
+#   - 'attribut'  : attribut à lire au lieu du texte (ex: 'style')
+#   - 'multiligne': conserver les retours à la ligne du texte
+#   - 'regex'     : expression appliquée à la valeur brute (en minuscules si 'minuscule')
+#   - 'groupe'    : groupe de la regex à garder (1 par défaut)
+#   - 'format'    : mise en forme de la valeur trouvée
+#   - 'traitement': post-traitement nommé (ex: 'adresse')
+# Un champ marqué 'attendre' fait attendre son sélecteur principal par le
+# navigateur avant l'extraction (voir readiness.py).
+# Les moteurs (Selenium, requests + BeautifulSoup, ...) ne font que fournir les
+# valeurs brutes ; toute la logique d'extraction vit ici.
+# Les mêmes stratégies décrivent les champs lisibles sur les cartes des pages de
+# liste ('champs_carte', sélecteurs relatifs à la carte) : une annonce dont la
+# carte donne tous les champs n'a pas besoin de sa page de détail.
+
+VALEUR_MANQUANTE = 'N/A'
+
+BASE_URL = 'https://sn.coinafrique.com'
+
+REGEX_PIECES = r'(\d+)\s*(pi[eè]ces?|chambres?)' # Titres avec ou sans accent ("4 pieces")
+REGEX_IMAGE = r'url\((["\']?)(.*?)\1\)'
+REGEX_SUPERFICIE = r'(\d+(?:[.,]\d+)?)\s*(m2|m²)'
+
+SELECTEUR_LIENS = "a.card-image" # Liens des annonces sur les pages de liste
+SELECTEUR_TITRE = "h1.title"
+SELECTEUR_IMAGE = "div.swiper-slide-active"
+SELECTEUR_CARTE = "div.ad__card" # Une carte d'annonce sur les pages de liste
+
+
+def _champ_quantite(nom, rang):
+    # Nombre de pièces / superficie / salles de bain (Stratégie de fallback améliorée)
+    return {
+        'nom': nom,
+        'strategies': [
+            {'css': f".hide-on-med-and-down li:nth-of-type({rang}) span.qt"},
+            {'css': "div.ad-details span.qt"},
+            {'css_tous': "div.ad-details ul li", 'regex': REGEX_PIECES, 'minuscule': True, 'format': "{} pièces"},
+        ],
+    }
+
+
+def _champ_adresse(suffixe):
+    return {
+        'nom': 'adresse',
+        'strategies': [{'css': "div.extra-info-ad-detail", 'multiligne': True, 'traitement': 'adresse', 'suffixe': suffixe}],
+    }
+
+
+CHAMP_TYPE_ANNONCE = {'nom': 'type_annonce', 'strategies': [{'css': SELECTEUR_TITRE}]}
+CHAMP_PRIX = {'nom': 'price', 'attendre': True, 'strategies': [{'css': "p.price"}]}
+CHAMP_IMAGE = {
+    'nom': 'image_lien',
+    'attendre': True,
+    'strategies': [{'css': SELECTEUR_IMAGE, 'attribut': 'style', 'regex': REGEX_IMAGE, 'groupe': 2}],
+}
+
+# --- Champs des cartes des pages de liste ---
+# Pas de salles de bain sur les cartes : les appartements gardent leur page de détail.
+
+def _carte_quantite(nom, regex):
+    # Nombre de pièces / superficie lus dans le titre de la carte ("Appartement 3 pièces Ouakam")
+    return {'nom': nom, 'strategies': [{'css': "p.ad__card-description", 'regex': regex, 'minuscule': True}]}
+
+
+CARTE_TYPE_ANNONCE = {'nom': 'type_annonce', 'strategies': [{'css': "p.ad__card-description"}]}
+CARTE_PRIX = {'nom': 'price', 'strategies': [{'css': "p.ad__card-price"}]}
+CARTE_ADRESSE = {'nom': 'adresse', 'strategies': [{'css': "p.ad__card-location span"}, {'css': "p.ad__card-location"}]}
+CARTE_IMAGE = {
+    'nom': 'image_lien',
+    'strategies': [
+        {'css': "img.ad__card-img", 'attribut': 'data-src'},
+        {'css': "img.ad__card-img", 'attribut': 'src'},
+        {'css': "[style*='background-image']", 'attribut': 'style', 'regex': REGEX_IMAGE, 'groupe': 2},
+    ],
+}
+
+# --- Catégories coinafrique ---
+# Ajouter une catégorie = ajouter une entrée ici : chemin de la liste, filtres des
+# liens d'annonces, champs de la page de détail et champs lisibles sur les cartes.
+# L'ordre des champs est l'ordre des colonnes des CSV *_coinafrique.csv
+CATEGORIES = {
+    'appartements': {
+        'chemin': '/categorie/appartements',
+        'filtres_url': ['/appartements/'],
+        'champs': [
+            CHAMP_PRIX,
+            _champ_quantite('nombre_de_pieces', 1),
+            _champ_adresse('Villas'),
+            _champ_quantite('nombre_de_salles_de_bain', 2),
+            CHAMP_IMAGE,
+        ],
+        'champs_carte': [CARTE_PRIX, _carte_quantite('nombre_de_pieces', REGEX_PIECES), CARTE_ADRESSE, CARTE_IMAGE],
+    },
+    'villas': {
+        'chemin': '/categorie/villas',
+        'filtres_url': ['/annonce/'],
+        'champs': [
+            CHAMP_TYPE_ANNONCE,
+            CHAMP_PRIX,
+            _champ_quantite('nombre_de_pieces', 1),
+            _champ_adresse('Villas'),
+            CHAMP_IMAGE,
+        ],
+        'champs_carte': [
+            CARTE_TYPE_ANNONCE, CARTE_PRIX, _carte_quantite('nombre_de_pieces', REGEX_PIECES), CARTE_ADRESSE, CARTE_IMAGE,
+        ],
+    },
+    'terrains': {
+        'chemin': '/categorie/terrains',
+        'filtres_url': ['/annonce/', '/terrains/'],
+        'champs': [
+            CHAMP_PRIX,
+            _champ_quantite('superficie', 1),
+            _champ_adresse('Terrains'),
+            CHAMP_IMAGE,
+        ],
+        'champs_carte': [CARTE_PRIX, _carte_quantite('superficie', REGEX_SUPERFICIE), CARTE_ADRESSE, CARTE_IMAGE],
+    },
+}
+
+
+def est_annonce(categorie, url):
+    # S'assurer que c'est bien un lien d'annonce de la catégorie
+    return all(filtre in url for filtre in CATEGORIES[categorie]['filtres_url'])
+
+
+def colonnes(champs):
+    return ['url'] + [champ['nom'] for champ in champs]
+
+
+def ligne_vide(url, champs):
+    # Dictionnaire des données d'une annonce (initialisation pour garantir toutes les clés)
+    ligne = {'url': url}
+    for champ in champs:
+        ligne[champ['nom']] = VALEUR_MANQUANTE
+    return ligne
+
+
+def traiter_adresse(adresse_text, suffixe):
+    parts = [p.strip() for p in adresse_text.split('\n') if p.strip()]
+    if len(parts) > 1:
+        return parts[1]
+    match = re.search(r'([A-Za-zÀ-ÿ\s-]+,\s*[A-Za-zÀ-ÿ\s-]+)(?:\s+' + suffixe + r')?$', adresse_text)
+    if match:
+        return match.group(1).strip()
+    return adresse_text.strip()
+
+
+def appliquer_strategie(strategie, valeurs):
+    # 'valeurs' : valeurs brutes (texte ou attribut) des éléments trouvés par le moteur
+    if 'css' in strategie:
+        valeurs = valeurs[:1]
+    for valeur in valeurs:
+        if valeur is None:
+            continue
+        valeur = valeur.strip()
+        if 'regex' in strategie:
+            match = re.search(strategie['regex'], valeur.lower() if strategie.get('minuscule') else valeur)
+            if not match:
+                continue
+            valeur = match.group(strategie.get('groupe', 1))
+        if strategie.get('traitement') == 'adresse':
+            valeur = traiter_adresse(valeur, strategie['suffixe'])
+        if 'format' in strategie:
+            valeur = strategie['format'].format(valeur)
+        return valeur
+    return None
+
+
+def extraire_ligne(url, champs, lire_valeurs, mesure=None):
+    # 'lire_valeurs(strategie)' renvoie les valeurs brutes du moteur pour une stratégie.
+    # 'mesure' (scrape_metrics) : reçoit le temps de chaque champ et le rang de la stratégie retenue
+    ligne = ligne_vide(url, champs)
+    for champ in champs:
+        debut = time.perf_counter()
+        rang_trouve = None
+        for rang, strategie in enumerate(champ['strategies']):
+            valeur = appliquer_strategie(strategie, lire_valeurs(strategie))
+            if valeur is not None:
+                ligne[champ['nom']] = valeur
+                rang_trouve = rang
+                break
+        if mesure is not None:
+            mesure.setdefault('champs', {})[champ['nom']] = {
+                'ms': (time.perf_counter() - debut) * 1000, 'strategie': rang_trouve,
+            }
+    return ligne
+
+
+def champs_manquants(ligne, champs):
+    return [champ['nom'] for champ in champs if ligne.get(champ['nom'], VALEUR_MANQUANTE) == VALEUR_MANQUANTE]
+
+
+def completer_ligne(ligne, secours):
+    # Complète les champs 'N/A' de 'ligne' avec ceux d'une autre extraction
+    if secours:
+        for cle, valeur in secours.items():
+            if ligne.get(cle, VALEUR_MANQUANTE) == VALEUR_MANQUANTE:
+                ligne[cle] = valeur
+    return ligne
@@ -0,0 +1,114 @@
+import argparse
+import json
+import os
+import sqlite3
+import time
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from cleaning import DOSSIER_DONNEES, nettoyer
+from dedup_index import IndexDoublons, dedoublonner
+
+# --- Copie en colonnes (Parquet) des données nettoyées ---
+# data/villas.csv -> data/parquet/villas.parquet : données de cleaning.py, typées,
+# dédoublonnées sur l'identifiant d'annonce (reposts signalés, voir dedup_index.py),
+# colonnes de texte répétitives (commune, ville) encodées en dictionnaire.
+# La signature du CSV source (mtime, taille) et la version du nettoyage sont
+# gardées dans les métadonnées du fichier : si le CSV change, le Parquet est
+# reconstruit automatiquement au prochain chargement.
+# Lecture en quelques ms, et seulement des colonnes demandées.
+# Les reposts sont cherchés dans un index propre aux données (data/parquet/doublons.sqlite3),
+# jamais dans celui du crawler : charger le tableau de bord ne modifie pas l'état du crawl,
+# et le résultat ne dépend pas du dossier depuis lequel l'application est lancée.
+#
+#   python columnar_store.py            # (re)construit data/parquet/*.parquet
+
+SOUS_DOSSIER = 'parquet'
+VERSION_NETTOYAGE = 5 # À incrémenter quand cleaning.py ou dedup_index.empreintes change : les fichiers seront reconstruits
+CLE_SOURCE = b'coinafrique_source'
+COMPRESSION = 'zstd'
+NOM_DOUBLONS = 'doublons.sqlite3'
+
+
+def chemin_colonnes(chemin_csv):
+    dossier, nom = os.path.split(chemin_csv)
+    return os.path.join(dossier, SOUS_DOSSIER, os.path.splitext(nom)[0] + '.parquet')
+
+
+def chemin_doublons_donnees(chemin_csv):
+    # Index des doublons des données du tableau de bord, à côté des fichiers Parquet
+    return os.path.join(os.path.dirname(chemin_colonnes(chemin_csv)), NOM_DOUBLONS)
+
+
+def _source(chemin_csv):
+    infos = os.stat(chemin_csv)
+    return {'mtime_ns': infos.st_mtime_ns, 'taille': infos.st_size, 'version': VERSION_NETTOYAGE}
+
+
+def est_a_jour(chemin_csv):
+    try:
+        metadonnees = pq.read_schema(chemin_colonnes(chemin_csv)).metadata or {}
+    except (FileNotFoundError, pa.ArrowInvalid):
+        return False
+    return metadonnees.get(CLE_SOURCE) == json.dumps(_source(chemin_csv)).encode('utf-8')
+
+
+def _donnees(chemin_csv, chemin_doublons):
+    index = IndexDoublons(chemin_doublons)
+    try:
+        return dedoublonner(nettoyer(pd.read_csv(chemin_csv)), os.path.splitext(os.path.basename(chemin_csv))[0], index)
+    finally:
+        index.fermer()
+
+
+def construire(chemin_csv, chemin_doublons=None):
+    source = _source(chemin_csv) # Avant la lecture : un CSV modifié pendant la construction sera reconstruit
+    chemin = chemin_colonnes(chemin_csv)
+    os.makedirs(os.path.dirname(chemin), exist_ok=True)
+    df = _donnees(chemin_csv, chemin_doublons or chemin_doublons_donnees(chemin_csv))
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    table = table.replace_schema_metadata({**table.schema.metadata, CLE_SOURCE: json.dumps(source)})
+    temporaire = f"{chemin}.{os.getpid()}.tmp"
+    pq.write_table(table, temporaire, compression=COMPRESSION)
+    os.replace(temporaire, chemin)
+    return chemin
+
+
+def charger(chemin_csv, colonnes=None):
+    # Données nettoyées du CSV, depuis le Parquet (reconstruit si le CSV a changé)
+    if not est_a_jour(chemin_csv):
+        try:
+            construire(chemin_csv)
+        except (OSError, sqlite3.Error) as e:
+            # Dossier en lecture seule (déploiement) : mêmes données, nettoyées et dédoublonnées en mémoire
+            print(f"Impossible d'écrire {chemin_colonnes(chemin_csv)} ou l'index des doublons : {e}")
+            df = _donnees(chemin_csv, ':memory:') # Reposts repérés dans ce fichier seulement
+            return df if colonnes is None else df[colonnes]
+    return pq.read_table(chemin_colonnes(chemin_csv), columns=colonnes).to_pandas()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Construction des fichiers Parquet des données nettoyées")
+    parser.add_argument('fichiers', nargs='*', help=f"CSV sources (par défaut : {DOSSIER_DONNEES}/*.csv)")
+    parser.add_argument('--forcer', action='store_true', help="reconstruire même si le Parquet est à jour")
+    args = parser.parse_args(argv)
+    fichiers = args.fichiers or sorted(
+        os.path.join(DOSSIER_DONNEES, nom) for nom in os.listdir(DOSSIER_DONNEES) if nom.endswith('.csv')
+    )
+    for chemin_csv in fichiers:
+        if args.forcer or not est_a_jour(chemin_csv):
+            debut = time.perf_counter()
+            chemin = construire(chemin_csv)
+            print(f"{chemin} reconstruit en {time.perf_counter() - debut:.2f} s ({os.path.getsize(chemin) / 1e6:.1f} Mo)")
+        else:
+            print(f"{chemin_colonnes(chemin_csv)} à jour")
+        for source, lire in (('CSV', lambda: pd.read_csv(chemin_csv)), ('Parquet', lambda: charger(chemin_csv))):
+            debut = time.perf_counter()
+            lire()
+            print(f"  lecture {source} : {(time.perf_counter() - debut) * 1000:.0f} ms")
+
+
+if __name__ == '__main__':
+    main()
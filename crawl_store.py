@@ -0,0 +1,148 @@
+import json
+import re
+import sqlite3
+import threading
+import time
+
+from coinafrique_fields import champs_manquants
+
+# --- État du crawl persistant (SQLite) ---
+# Une ligne par annonce, clé = identifiant numérique en fin d'URL
+# (/annonce/appartements/location-appartement-4-pieces-sud-foire-3326162 -> 3326162),
+# avec son statut et la date du dernier scraping. Un crash ne perd plus rien et
+# une relance saute les annonces déjà faites.
+# La progression de la pagination est gardée par catégorie (dernière page atteinte,
+# parcours terminé ou non) : après un crash en cours de pagination, la relance ne
+# s'arrête pas sur les pages déjà vues et va jusqu'aux pages jamais parcourues.
+# Utilisable depuis plusieurs threads (pagination en tâche de fond, voir
+# coinafrique_extract.scraper_en_flux) : les accès sont sérialisés par un verrou.
+
+CHEMIN_ETAT = 'coinafrique_crawl.sqlite3'
+
+A_FAIRE = 'a_faire'
+OK = 'ok'
+ECHEC = 'echec'
+
+REGEX_ID = re.compile(r'-(\d+)/?(?:[?#].*)?$')
+
+
+def id_annonce(url):
+    match = REGEX_ID.search(url)
+    return int(match.group(1)) if match else None
+
+
+class EtatCrawl:
+    def __init__(self, chemin=CHEMIN_ETAT):
+        self.connexion = sqlite3.connect(chemin, check_same_thread=False)
+        self._verrou = threading.Lock()
+        self.connexion.execute("PRAGMA journal_mode=WAL")
+        self.connexion.execute(
+            """CREATE TABLE IF NOT EXISTS annonces (
+                id INTEGER PRIMARY KEY,
+                categorie TEXT NOT NULL,
+                url TEXT NOT NULL,
+                statut TEXT NOT NULL DEFAULT 'a_faire',
+                tentatives INTEGER NOT NULL DEFAULT 0,
+                premiere_vue REAL NOT NULL,
+                dernier_scraping REAL,
+                donnees TEXT
+            )"""
+        )
+        self.connexion.execute("CREATE INDEX IF NOT EXISTS idx_annonces_statut ON annonces (categorie, statut)")
+        self.connexion.execute(
+            """CREATE TABLE IF NOT EXISTS pagination (
+                categorie TEXT PRIMARY KEY,
+                derniere_page INTEGER NOT NULL,
+                terminee INTEGER NOT NULL,
+                fin_atteinte INTEGER NOT NULL,
+                maj REAL NOT NULL
+            )"""
+        )
+        self.connexion.commit()
+        self.debut = time.time()
+
+    def ajouter_urls(self, categorie, urls):
+        # Renvoie le nombre d'annonces inconnues avant ce run (0 => page déjà entièrement vue)
+        ids = {}
+        for url in urls:
+            identifiant = id_annonce(url)
+            if identifiant is not None:
+                ids[identifiant] = url
+        if not ids:
+            return 0
+        marques = ','.join('?' * len(ids))
+        with self._verrou:
+            self.connexion.executemany(
+                "INSERT OR IGNORE INTO annonces (id, categorie, url, premiere_vue) VALUES (?, ?, ?, ?)",
+                [(identifiant, categorie, url, time.time()) for identifiant, url in ids.items()],
+            )
+            self.connexion.commit()
+            (nouvelles,) = self.connexion.execute(
+                f"SELECT COUNT(*) FROM annonces WHERE premiere_vue >= ? AND id IN ({marques})",
+                [self.debut, *ids],
+            ).fetchone()
+        return nouvelles
+
+    def pagination(self, categorie):
+        # (dernière page atteinte, parcours terminé, dernière page de la liste atteinte) du dernier parcours
+        with self._verrou:
+            ligne = self.connexion.execute(
+                "SELECT derniere_page, terminee, fin_atteinte FROM pagination WHERE categorie = ?", (categorie,),
+            ).fetchone()
+        if ligne is None:
+            return 0, False, False
+        return ligne[0], bool(ligne[1]), bool(ligne[2])
+
+    def noter_pagination(self, categorie, page, terminee=False, fin_atteinte=False):
+        # Appelé à chaque page (parcours en cours) puis à la fin du parcours (terminee=True)
+        with self._verrou:
+            self.connexion.execute(
+                "INSERT OR REPLACE INTO pagination (categorie, derniere_page, terminee, fin_atteinte, maj) VALUES (?, ?, ?, ?, ?)",
+                (categorie, page, int(terminee), int(fin_atteinte), time.time()),
+            )
+            self.connexion.commit()
+
+    def urls_a_scraper(self, categorie):
+        with self._verrou:
+            return [url for (url,) in self.connexion.execute(
+                "SELECT url FROM annonces WHERE categorie = ? AND statut != ? ORDER BY premiere_vue, id",
+                (categorie, OK),
+            )]
+
+    def est_fait(self, url):
+        with self._verrou:
+            ligne = self.connexion.execute("SELECT statut FROM annonces WHERE id = ?", (id_annonce(url),)).fetchone()
+        return ligne is not None and ligne[0] == OK
+
+    def enregistrer(self, categorie, ligne, statut=OK):
+        identifiant = id_annonce(ligne['url'])
+        if identifiant is None:
+            return
+        with self._verrou:
+            self.connexion.execute(
+                """INSERT INTO annonces (id, categorie, url, statut, tentatives, premiere_vue, dernier_scraping, donnees)
+                   VALUES (?, ?, ?, ?, 1, ?, ?, ?)
+                   ON CONFLICT(id) DO UPDATE SET statut = excluded.statut, tentatives = tentatives + 1,
+                       dernier_scraping = excluded.dernier_scraping, donnees = excluded.donnees""",
+                (identifiant, categorie, ligne['url'], statut, time.time(), time.time(), json.dumps(ligne, ensure_ascii=False)),
+            )
+            self.connexion.commit()
+
+    def lignes(self, categorie, statut=None):
+        # Annonces scrapées de la catégorie, runs précédents compris (générateur : mémoire constante).
+        # Sans verrou : à consommer avant de lancer des threads qui écrivent.
+        requete = "SELECT donnees FROM annonces WHERE categorie = ? AND donnees IS NOT NULL"
+        parametres = [categorie]
+        if statut is not None:
+            requete += " AND statut = ?"
+            parametres.append(statut)
+        for (donnees,) in self.connexion.execute(requete + " ORDER BY premiere_vue, id", parametres):
+            yield json.loads(donnees)
+
+    def fermer(self):
+        self.connexion.close()
+
+
+def statut_ligne(ligne, champs):
+    # Échec si aucun champ n'a pu être lu (page non chargée) : l'annonce sera retentée au prochain run
+    return ECHEC if len(champs_manquants(ligne, champs)) == len(champs) else OK
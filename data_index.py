@@ -0,0 +1,77 @@
+import numpy as np
+
+# --- Index des annonces pour les filtres du tableau de bord ---
+# Construit une fois par version des données (voir data_loader.index_donnees) :
+#   - colonnes numériques (prix, superficie, pièces) : positions triées par valeur,
+#     un intervalle [min, max] = deux recherches dichotomiques (np.searchsorted)
+#   - colonnes catégorielles (commune, ville) : codes entiers, comparaison vectorisée
+# Le filtrage renvoie les positions des lignes retenues ; seule la page affichée
+# est extraite du DataFrame et envoyée au navigateur.
+
+COLONNES_NUMERIQUES = ['prix', 'superficie', 'nombre_de_pieces', 'nombre_de_salles_de_bain']
+COLONNES_CATEGORIES = ['commune', 'ville']
+
+
+class IndexAnnonces:
+    def __init__(self, df):
+        self.df = df
+        self.nb_lignes = len(df)
+        self._tris = {}
+        for colonne in COLONNES_NUMERIQUES:
+            if colonne in df:
+                valeurs = df[colonne].to_numpy(dtype='float64', na_value=np.nan)
+                ordre = np.argsort(valeurs, kind='stable') # Les NA à la fin
+                ordre = ordre[:np.count_nonzero(~np.isnan(valeurs))]
+                self._tris[colonne] = (ordre, valeurs[ordre])
+        self._codes = {
+            colonne: df[colonne].cat.codes.to_numpy() for colonne in COLONNES_CATEGORIES if colonne in df
+        }
+
+    def valeurs(self, colonne):
+        # Valeurs proposées dans les filtres
+        if colonne in self._codes:
+            return list(self.df[colonne].cat.categories)
+        valeurs = np.unique(self._tris[colonne][1])
+        if self.df[colonne].dtype.kind in 'iu':
+            valeurs = valeurs.astype('int64')
+        return valeurs.tolist()
+
+    def bornes(self, colonne):
+        triees = self._tris[colonne][1]
+        return (triees[0].item(), triees[-1].item()) if len(triees) else (None, None)
+
+    def _intervalle(self, colonne, minimum, maximum):
+        ordre, triees = self._tris[colonne]
+        debut = 0 if minimum is None else np.searchsorted(triees, minimum, side='left')
+        fin = len(triees) if maximum is None else np.searchsorted(triees, maximum, side='right')
+        masque = np.zeros(self.nb_lignes, dtype=bool)
+        masque[ordre[debut:fin]] = True
+        return masque
+
+    def _choix(self, colonne, valeurs):
+        if colonne in self._codes:
+            codes = self.df[colonne].cat.categories.get_indexer(valeurs)
+            return np.isin(self._codes[colonne], codes[codes >= 0])
+        masque = np.zeros(self.nb_lignes, dtype=bool)
+        for valeur in valeurs:
+            masque |= self._intervalle(colonne, valeur, valeur)
+        return masque
+
+    def filtrer(self, intervalles=None, choix=None):
+        # 'intervalles' : {colonne: (min, max)}, None = pas de borne ; 'choix' : {colonne: [valeurs]}, [] = tout.
+        # Une ligne sans valeur (NA) est exclue dès qu'un filtre porte sur sa colonne.
+        masque = np.ones(self.nb_lignes, dtype=bool)
+        for colonne, (minimum, maximum) in (intervalles or {}).items():
+            if minimum is not None or maximum is not None:
+                masque &= self._intervalle(colonne, minimum, maximum)
+        for colonne, valeurs in (choix or {}).items():
+            if valeurs:
+                masque &= self._choix(colonne, valeurs)
+        return np.flatnonzero(masque)
+
+    def page(self, positions, numero, taille):
+        # numero à partir de 1
+        return self.df.iloc[positions[(numero - 1) * taille:numero * taille]]
+
+    def selection(self, positions):
+        return self.df.iloc[positions] if len(positions) < self.nb_lignes else self.df
@@ -0,0 +1,255 @@
+import functools
+import gzip
+import io
+import os
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+import streamlit as st
+
+from aggregates import chemin_agregats, compter, mettre_a_jour, statistiques
+from cleaning import DOSSIER_IMAGES
+from columnar_store import VERSION_NETTOYAGE, charger as charger_colonnes
+from data_index import IndexAnnonces
+from dedup_index import ids_annonces
+from search_index import IndexRecherche
+
+# --- Chargement des données du tableau de bord (data/*.csv) ---
+# Chaque fichier n'est parsé qu'une fois : le DataFrame est gardé en mémoire,
+# partagé par toutes les sessions et indexé par (chemin, date de modification,
+# taille). Une interaction dans la page ne relit donc plus les CSV, et un fichier
+# remplacé dans data/ est relu automatiquement.
+# st.cache_resource plutôt que st.cache_data : le DataFrame est renvoyé tel quel,
+# sans copie à chaque rerun (temps constant quelle que soit la taille des données).
+# Il est donc en LECTURE SEULE pour la page : filtrer ou trier crée une copie.
+# La page affiche les données nettoyées et typées (cleaning.py), lues depuis leur
+# copie Parquet (columnar_store.py, reconstruite si le CSV change), elles aussi en cache.
+# Les téléchargements servent les octets du fichier d'origine (rien n'est
+# re-sérialisé) ; les autres formats sont produits une fois par version du
+# fichier, et seulement au clic (st.download_button avec une fonction).
+# Les photos (image_store.py) sont montrées en miniatures locales, seulement pour
+# les lignes de la page affichée ; les reposts trouvés par photo (hash perceptuel)
+# sont dans la colonne 'repost_photo_de'. image_store n'est importé que si le stock
+# de photos existe : le tableau de bord ne dépend pas des modules de téléchargement.
+
+NB_VERSIONS_MAX = 16 # Versions de fichiers gardées en mémoire (anciennes mtimes comprises)
+NB_MINIATURES_MAX = 2000 # Miniatures gardées en mémoire (quelques Ko chacune), les moins récemment affichées sortent d'abord
+
+FORMATS = {
+    'CSV': {'extension': '.csv', 'mime': 'text/csv'},
+    'CSV (gzip)': {'extension': '.csv.gz', 'mime': 'application/gzip'},
+    'Parquet': {'extension': '.parquet', 'mime': 'application/vnd.apache.parquet'},
+}
+
+
+def signature(chemin):
+    infos = os.stat(chemin)
+    return infos.st_mtime_ns, infos.st_size
+
+
+def signature_dossier(dossier):
+    return tuple(sorted(
+        (nom, *signature(os.path.join(dossier, nom)))
+        for nom in os.listdir(dossier)
+        if os.path.isfile(os.path.join(dossier, nom))
+    ))
+
+
+@st.cache_resource(max_entries=NB_VERSIONS_MAX, show_spinner=False)
+def _lire_csv(chemin, signature):
+    return pd.read_csv(chemin)
+
+
+@st.cache_resource(max_entries=NB_VERSIONS_MAX, show_spinner=False)
+def _lire_propre(chemin, signature):
+    return charger_colonnes(chemin)
+
+
+@st.cache_resource(max_entries=NB_VERSIONS_MAX, show_spinner=False)
+def _reposts_photos(dossier, signature):
+    return _stock_images(dossier).reposts()
+
+
+@st.cache_resource(max_entries=NB_VERSIONS_MAX, show_spinner=False)
+def _avec_photos(chemin, signature, dossier, signature_photos):
+    # Mêmes lignes que _lire_propre (les positions de _recherche restent valables) et 'repost_photo_de'
+    df = _lire_propre(chemin, signature)
+    if signature_photos is None:
+        return df
+    reposts = _reposts_photos(dossier, signature_photos)
+    return df.assign(repost_photo_de=ids_annonces(df['url']).map(reposts).astype('Int64'))
+
+
+@st.cache_resource(max_entries=NB_VERSIONS_MAX, show_spinner=False)
+def _index(chemin, signature, dossier, signature_photos):
+    return IndexAnnonces(_avec_photos(chemin, signature, dossier, signature_photos))
+
+
+@st.cache_resource(max_entries=NB_VERSIONS_MAX, show_spinner=False)
+def _recherche(chemin, signature):
+    return IndexRecherche(_lire_propre(chemin, signature))
+
+
+@st.cache_resource(max_entries=NB_VERSIONS_MAX, show_spinner=False)
+def _statistiques(chemin, signature):
+    df = _lire_propre(chemin, signature)
+    try:
+        etat = mettre_a_jour(df, chemin_agregats(chemin), source=signature, version=VERSION_NETTOYAGE)
+    except OSError as e:
+        print(f"Impossible d'écrire {chemin_agregats(chemin)} : {e}")
+        etat = compter(df)
+    return statistiques(etat)
+
+
+@st.cache_resource
+def _signatures_vues():
+    # Dernière signature connue de chaque dossier, partagée par toutes les sessions
+    return {}
+
+
+@st.cache_resource(max_entries=NB_VERSIONS_MAX, show_spinner=False)
+def _octets(chemin, signature, format_fichier):
+    if format_fichier == 'CSV':
+        with open(chemin, 'rb') as f:
+            return f.read()
+    if format_fichier == 'CSV (gzip)':
+        return gzip.compress(_octets(chemin, signature, 'CSV'), mtime=0)
+    return exporter(_lire_csv(chemin, signature), format_fichier)
+
+
+@st.cache_resource(show_spinner=False)
+def _stock_images(dossier):
+    from image_store import StockImages # Seulement si le stock existe (voir signature_photos)
+    return StockImages(dossier)
+
+
+class CacheMiniatures:
+    # {url: data URI} borné (LRU), partagé par toutes les sessions : les pages affichées par
+    # plusieurs threads Streamlit à la fois passent par le verrou
+    def __init__(self, taille_max=NB_MINIATURES_MAX):
+        self.taille_max = taille_max
+        self._entrees = OrderedDict()
+        self._verrou = threading.Lock()
+
+    def lire(self, url):
+        with self._verrou:
+            photo = self._entrees.get(url)
+            if photo is not None:
+                self._entrees.move_to_end(url)
+            return photo
+
+    def ecrire(self, url, photo):
+        with self._verrou:
+            self._entrees[url] = photo
+            self._entrees.move_to_end(url)
+            while len(self._entrees) > self.taille_max:
+                self._entrees.popitem(last=False)
+
+    def clear(self):
+        with self._verrou:
+            self._entrees.clear()
+
+
+@st.cache_resource
+def _miniatures():
+    # Les photos pas encore téléchargées ne sont pas gardées : elles apparaîtront après image_store.py
+    return CacheMiniatures()
+
+
+def vider_cache():
+    _lire_csv.clear()
+    _lire_propre.clear()
+    _index.clear()
+    _recherche.clear()
+    _reposts_photos.clear()
+    _avec_photos.clear()
+    _statistiques.clear()
+    _octets.clear()
+    _miniatures().clear()
+
+
+def verifier_dossier(dossier):
+    # Invalidation explicite : un fichier ajouté, supprimé ou modifié dans le dossier vide le cache
+    actuelle = signature_dossier(dossier)
+    vues = _signatures_vues()
+    if vues.get(dossier, actuelle) != actuelle:
+        vider_cache()
+    vues[dossier] = actuelle
+
+
+def charger_csv(chemin):
+    return _lire_csv(chemin, signature(chemin))
+
+
+def signature_photos(dossier=DOSSIER_IMAGES):
+    # Version du stock de photos (index SQLite et son journal WAL), None s'il n'a pas été créé
+    if not os.path.isdir(dossier):
+        return None
+    return tuple(fichier for fichier in signature_dossier(dossier) if not fichier[0].endswith('-shm'))
+
+
+def charger_donnees(chemin):
+    # Données nettoyées (prix, superficie, pièces typés ; commune / ville ; URL d'image seule ; reposts par photo)
+    return _avec_photos(chemin, signature(chemin), DOSSIER_IMAGES, signature_photos())
+
+
+def index_donnees(chemin):
+    # Index des filtres (data_index.py) sur les données nettoyées ; index.df = ces données
+    return _index(chemin, signature(chemin), DOSSIER_IMAGES, signature_photos())
+
+
+def recherche_donnees(chemin):
+    # Index de recherche plein texte (search_index.py) ; positions dans charger_donnees(chemin)
+    return _recherche(chemin, signature(chemin))
+
+
+def statistiques_donnees(chemin):
+    # Statistiques du marché (aggregates.py), mises à jour avec les seules lignes ajoutées au fichier
+    return _statistiques(chemin, signature(chemin))
+
+
+def avec_miniatures(page, dossier=DOSSIER_IMAGES):
+    # Colonne 'photo' en tête : miniatures locales des lignes de la page, créées au premier affichage
+    if 'image' not in page or signature_photos(dossier) is None:
+        return page
+    from image_store import miniature_data_uri
+    miniatures = _miniatures()
+    photos = []
+    for url in page['image']:
+        photo = None
+        if isinstance(url, str):
+            photo = miniatures.lire(url)
+            if photo is None:
+                photo = miniature_data_uri(_stock_images(dossier), url)
+                if photo is not None:
+                    miniatures.ecrire(url, photo)
+        photos.append(photo)
+    return page.assign(photo=photos)[['photo', *page.columns]]
+
+
+def exporter_selection(index, positions, format_fichier):
+    return exporter(index.selection(positions), format_fichier)
+
+
+def exporter(df, format_fichier):
+    # Sérialisation d'un DataFrame (sous-ensemble filtré) : à appeler au clic seulement, voir telechargement()
+    if format_fichier == 'Parquet':
+        tampon = io.BytesIO()
+        df.to_parquet(tampon, index=False)
+        return tampon.getvalue()
+    donnees = df.to_csv(index=False).encode('utf-8')
+    return gzip.compress(donnees, mtime=0) if format_fichier == 'CSV (gzip)' else donnees
+
+
+def octets_fichier(chemin, format_fichier='CSV'):
+    return _octets(chemin, signature(chemin), format_fichier)
+
+
+def nom_telechargement(nom_fichier, format_fichier):
+    return os.path.splitext(nom_fichier)[0] + FORMATS[format_fichier]['extension']
+
+
+def telechargement(fonction, *args):
+    # Pour le paramètre 'data' de st.download_button : les octets ne sont produits qu'au clic
+    return functools.partial(fonction, *args)
@@ -0,0 +1,135 @@
+import sqlite3
+import threading
+import time
+
+import pandas as pd
+
+from crawl_store import REGEX_ID
+
+# --- Index des doublons (SQLite), commun à toutes les catégories et à tous les runs ---
+# Une ligne par annonce (identifiant numérique de l'URL) avec une empreinte de son
+# contenu (titre, prix, adresse, surface, pièces normalisés). Une même annonce vue sur
+# plusieurs pages, fichiers ou runs n'est comptée qu'une fois ; une annonce avec un
+# autre identifiant mais le même contenu qu'une annonce plus ancienne de la même
+# catégorie est un repost.
+# Alimenté par le crawler (coinafrique_extract.Resultats) et par la construction
+# des données du tableau de bord (columnar_store.construire).
+
+CHEMIN_DOUBLONS = 'coinafrique_doublons.sqlite3'
+
+
+def ids_annonces(urls):
+    # Version vectorisée de crawl_store.id_annonce
+    return urls.str.extract(REGEX_ID.pattern, expand=False).astype('Int64')
+
+
+def empreintes(df):
+    # 'df' nettoyé (cleaning.nettoyer) -> empreinte 64 bits du contenu de chaque ligne.
+    # Pas l'URL de la photo : chez coinafrique elle contient l'identifiant de l'annonce et la date
+    # d'envoi (3326162_uploaded_image1_1631200616.jpg), un repost n'aurait jamais la même.
+    # Les photos identiques sont retrouvées par leur hash perceptuel (image_store.py).
+    # Le titre vient du slug de l'URL sans l'identifiant (vente-villa-saly-aerodrome-4012858) :
+    # sans lui, deux terrains au même prix dans la même commune seraient confondus.
+    vide = pd.Series('', index=df.index, dtype='string')
+
+    def texte(colonne):
+        return df[colonne].astype('string').fillna('') if colonne in df else vide
+
+    normalise = pd.DataFrame({
+        'titre': texte('url').str.replace(r'^.*/annonce/[^/]+/', '', regex=True).str.replace(REGEX_ID.pattern, '', regex=True),
+        'prix': texte('prix'),
+        'adresse': df['adresse'].str.lower().str.replace(r'\s+', ' ', regex=True).str.strip().fillna('') if 'adresse' in df else vide,
+        'superficie': texte('superficie'),
+        'nombre_de_pieces': texte('nombre_de_pieces'),
+    }, index=df.index)
+    # Sans prix, trop d'annonces différentes se ressemblent : l'URL rend l'empreinte unique
+    if 'url' in df:
+        normalise['url'] = texte('url').where(normalise['prix'] == '', '')
+    return pd.Series(pd.util.hash_pandas_object(normalise, index=False).to_numpy().view('int64'), index=df.index)
+
+
+class IndexDoublons:
+    def __init__(self, chemin=CHEMIN_DOUBLONS):
+        self.connexion = sqlite3.connect(chemin, check_same_thread=False)
+        self._verrou = threading.Lock()
+        self.connexion.execute("PRAGMA journal_mode=WAL")
+        self.connexion.execute(
+            """CREATE TABLE IF NOT EXISTS annonces (
+                id INTEGER PRIMARY KEY,
+                categorie TEXT NOT NULL,
+                url TEXT NOT NULL,
+                empreinte INTEGER NOT NULL,
+                premiere_vue REAL NOT NULL,
+                derniere_vue REAL NOT NULL
+            )"""
+        )
+        self.connexion.execute("CREATE INDEX IF NOT EXISTS idx_annonces_empreinte ON annonces (empreinte)")
+        self.connexion.execute("CREATE INDEX IF NOT EXISTS idx_annonces_categorie_empreinte ON annonces (categorie, empreinte)")
+        self.connexion.commit()
+
+    def enregistrer(self, categorie, ids, urls, empreintes_contenu):
+        maintenant = time.time()
+        with self._verrou:
+            self.connexion.executemany(
+                """INSERT INTO annonces (id, categorie, url, empreinte, premiere_vue, derniere_vue)
+                   VALUES (?, ?, ?, ?, ?, ?)
+                   ON CONFLICT(id) DO UPDATE SET url = excluded.url, empreinte = excluded.empreinte,
+                       derniere_vue = excluded.derniere_vue""",
+                [(int(i), categorie, url, int(e), maintenant, maintenant) for i, url, e in zip(ids, urls, empreintes_contenu)],
+            )
+            self.connexion.commit()
+
+    def original(self, identifiant):
+        # Identifiant de la plus ancienne annonce de la catégorie au même contenu (lui-même si ce n'est pas un repost)
+        with self._verrou:
+            ligne = self.connexion.execute(
+                """SELECT b.id FROM annonces a JOIN annonces b ON b.categorie = a.categorie AND b.empreinte = a.empreinte
+                   WHERE a.id = ? ORDER BY b.premiere_vue, b.id LIMIT 1""",
+                (identifiant,),
+            ).fetchone()
+        return ligne[0] if ligne else None
+
+    def originaux(self, ids):
+        # {id: id de la plus ancienne annonce de la catégorie au même contenu} pour un lot d'identifiants, en une requête
+        ids = [int(identifiant) for identifiant in ids]
+        if not ids:
+            return {}
+        marques = ','.join('?' * len(ids))
+        with self._verrou:
+            lignes = self.connexion.execute(
+                f"""SELECT id, original FROM (
+                       SELECT a.id, FIRST_VALUE(b.id) OVER (PARTITION BY a.id ORDER BY b.premiere_vue, b.id) AS original
+                       FROM annonces a JOIN annonces b ON b.categorie = a.categorie AND b.empreinte = a.empreinte
+                       WHERE a.id IN ({marques})
+                   ) GROUP BY id""",
+                ids,
+            ).fetchall()
+        return dict(lignes)
+
+    def reposts(self, categorie=None):
+        # {id du repost: id de l'annonce d'origine}, d'une catégorie ou de toutes ;
+        # l'original est toujours cherché dans la catégorie du repost
+        filtre, parametres = ("WHERE categorie = ?", (categorie,)) if categorie is not None else ("", ())
+        with self._verrou:
+            lignes = self.connexion.execute(
+                f"""SELECT id, original FROM (
+                       SELECT id, FIRST_VALUE(id) OVER (PARTITION BY categorie, empreinte ORDER BY premiere_vue, id) AS original
+                       FROM annonces {filtre}
+                   ) WHERE id != original""",
+                parametres,
+            ).fetchall()
+        return dict(lignes)
+
+    def fermer(self):
+        self.connexion.close()
+
+
+def dedoublonner(df, categorie, index):
+    # Une ligne par annonce (la dernière vue) et colonne 'repost_de' : annonce d'origine d'un repost
+    ids = ids_annonces(df['url'])
+    garder = ids.isna() | ~ids.duplicated(keep='last')
+    df, ids = df[garder], ids[garder]
+    contenu = empreintes(df)
+    avec_id = ids.notna()
+    index.enregistrer(categorie, ids[avec_id], df['url'][avec_id], contenu[avec_id])
+    return df.assign(repost_de=ids.map(index.reposts(categorie)).astype('Int64')).reset_index(drop=True)
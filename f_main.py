@@ -1,6 +1,15 @@
 import streamlit as st
 import pandas as pd
+import matplotlib.pyplot as plt
+import numpy as np
+import io
 import os
+import time
+
+from data_loader import (
+    FORMATS, avec_miniatures, exporter_selection, index_donnees, nom_telechargement, octets_fichier, recherche_donnees, signature,
+    statistiques_donnees, telechargement, verifier_dossier, vider_cache,
+)
 
 # --- Configuration de la page Streamlit ---
 st.set_page_config(layout="wide")
@@ -21,6 +30,127 @@ st.markdown("Cette application présente des données immobilières locales et i
 
 ## Aperçu des Données Immobilières Collectées (via Web Scraper) :
 data_folder = "data"
+TAILLES_PAGE = [25, 50, 100, 250]
+NB_GROUPES_GRAPHIQUE = 15
+
+
+# --- Statistiques du marché : graphiques dessinés une fois par version des données (images PNG en cache) ---
+def _png(figure):
+    tampon = io.BytesIO()
+    figure.savefig(tampon, format='png', dpi=100)
+    plt.close(figure)
+    return tampon.getvalue()
+
+
+def _barres(stats, titre, etiquette, tri_numerique=False):
+    if tri_numerique:
+        stats = stats.assign(ordre=stats['groupe'].astype(float)).sort_values('ordre', ascending=False)
+    figure, axe = plt.subplots(figsize=(7, 0.35 * len(stats) + 1))
+    ecarts = [stats['mediane'] - stats['q25'], stats['q75'] - stats['mediane']]
+    axe.barh(stats['groupe'], stats['mediane'], xerr=ecarts, color="#4C72B0", ecolor="#999999")
+    axe.set_title(titre)
+    axe.set_xlabel(etiquette)
+    figure.tight_layout()
+    return _png(figure)
+
+
+@st.cache_resource(max_entries=48, show_spinner=False)
+def graphiques_marche(file_path, signature_fichier, transaction):
+    # Une transaction à la fois : loyers et prix de vente n'ont pas la même échelle
+    stats = statistiques_donnees(file_path)
+    stats = stats[(stats['transaction'] == transaction) & (stats['avec_valeur'] > 0)]
+    figures = []
+    prix = stats[stats['mesure'] == 'prix']
+    communes = prix[prix['dimension'] == 'commune'].nlargest(NB_GROUPES_GRAPHIQUE, 'annonces').sort_values('mediane')
+    if len(communes):
+        figures.append(_barres(communes, "Prix médian par commune (les plus représentées, q25-q75)", "CFA"))
+    pieces = prix[prix['dimension'] == 'nombre_de_pieces']
+    if len(pieces):
+        figures.append(_barres(pieces, "Prix médian par nombre de pièces (q25-q75)", "CFA", tri_numerique=True))
+    m2 = stats[(stats['mesure'] == 'prix_m2') & (stats['dimension'] == 'commune')]
+    m2 = m2[m2['avec_valeur'] >= 20].nlargest(NB_GROUPES_GRAPHIQUE, 'annonces').sort_values('mediane')
+    if len(m2):
+        figures.append(_barres(m2, "Prix médian au m² par commune (q25-q75)", "CFA / m²"))
+    villes = prix[prix['dimension'] == 'ville'].nlargest(NB_GROUPES_GRAPHIQUE, 'annonces').sort_values('annonces')
+    if len(villes):
+        figure, axe = plt.subplots(figsize=(7, 0.35 * len(villes) + 1))
+        axe.barh(villes['groupe'], villes['annonces'], color="#55A868")
+        axe.set_title("Nombre d'annonces par ville")
+        figure.tight_layout()
+        figures.append(_png(figure))
+    resume = prix[prix['dimension'] == 'tout']
+    return resume, figures
+
+
+def afficher_statistiques(file_path):
+    stats = statistiques_donnees(file_path)
+    totaux = stats[(stats['mesure'] == 'prix') & (stats['dimension'] == 'tout')].sort_values('annonces', ascending=False)
+    transactions = totaux['transaction'].tolist()
+    if not transactions:
+        return
+    transaction = transactions[0]
+    if len(transactions) > 1:
+        transaction = st.radio("Transaction", transactions, horizontal=True, key=f"transaction_{file_path}")
+    resume, figures = graphiques_marche(file_path, signature(file_path), transaction)
+    if len(resume):
+        ligne = resume.iloc[0]
+        colonnes_resume = st.columns(3)
+        colonnes_resume[0].metric("Annonces", f"{ligne['annonces']:,}".replace(",", " "))
+        colonnes_resume[1].metric("Avec prix", f"{ligne['avec_valeur']:,}".replace(",", " "))
+        colonnes_resume[2].metric("Prix médian", f"{ligne['mediane']:,.0f} CFA".replace(",", " "))
+    colonnes_graphiques = st.columns(2)
+    for i, image in enumerate(figures):
+        colonnes_graphiques[i % 2].image(image)
+
+
+# --- Recherche, filtres et pagination, évalués côté serveur (search_index.py, data_index.py) :
+# seule la page affichée est envoyée ---
+def afficher_donnees(index, recherche, filename):
+    df = index.df
+    requete = st.text_input(
+        "Recherche", placeholder="ex : Almadies 4 pièces, Keur Massar", key=f"recherche_{filename}"
+    )
+    intervalles, choix = {}, {}
+    colonnes_filtres = st.columns(4)
+    if 'prix' in df:
+        with colonnes_filtres[0]:
+            intervalles['prix'] = (
+                st.number_input("Prix min (CFA)", min_value=0, value=None, step=100000, key=f"prix_min_{filename}"),
+                st.number_input("Prix max (CFA)", min_value=0, value=None, step=100000, key=f"prix_max_{filename}"),
+            )
+    if 'superficie' in df:
+        with colonnes_filtres[1]:
+            intervalles['superficie'] = (
+                st.number_input("Superficie min (m²)", min_value=0, value=None, step=50, key=f"superficie_min_{filename}"),
+                st.number_input("Superficie max (m²)", min_value=0, value=None, step=50, key=f"superficie_max_{filename}"),
+            )
+    if 'commune' in df:
+        with colonnes_filtres[2]:
+            choix['commune'] = st.multiselect("Commune", index.valeurs('commune'), key=f"commune_{filename}")
+    if 'nombre_de_pieces' in df:
+        with colonnes_filtres[3]:
+            choix['nombre_de_pieces'] = st.multiselect(
+                "Nombre de pièces", index.valeurs('nombre_de_pieces'), key=f"pieces_{filename}"
+            )
+
+    debut = time.perf_counter()
+    positions = index.filtrer(intervalles, choix)
+    if requete.strip():
+        # Ordre de pertinence de la recherche, restreint aux annonces qui passent les filtres
+        resultats = recherche.chercher(requete)
+        positions = resultats[np.isin(resultats, positions)]
+    duree = (time.perf_counter() - debut) * 1000
+
+    colonne_taille, colonne_page = st.columns(2)
+    taille_page = colonne_taille.selectbox("Lignes par page", TAILLES_PAGE, key=f"taille_page_{filename}")
+    nb_pages = max(1, -(-len(positions) // taille_page))
+    page = min(colonne_page.number_input("Page", min_value=1, value=1, step=1, key=f"page_{filename}"), nb_pages)
+    st.caption(f"{len(positions)} annonces sur {len(df)} (filtrées en {duree:.1f} ms) — page {page}/{nb_pages}")
+    lignes = avec_miniatures(index.page(positions, page, taille_page))
+    configuration = {'photo': st.column_config.ImageColumn("Photo")} if 'photo' in lignes else None
+    st.dataframe(lignes, hide_index=True, column_config=configuration)
+    return positions
+
 
 # Dictionnaire des fichiers CSV à afficher
 csv_files_to_display = {
@@ -33,6 +163,11 @@ csv_files_to_display = {
 if not os.path.exists(data_folder):
     st.error(f"Le dossier '{data_folder}' est introuvable. Créez-le et placez-y vos fichiers CSV.")
 else:
+    # Les DataFrames sont en cache (voir data_loader.py) : relus seulement si un fichier de data/ change
+    verifier_dossier(data_folder)
+    if st.sidebar.button("Recharger les données"):
+        vider_cache()
+
     # Utilisation des onglets pour une meilleure présentation si nous avons plusieurs fichiers
     tabs = st.tabs(list(csv_files_to_display.keys()))
 
@@ -43,20 +178,35 @@ else:
             
             if os.path.exists(file_path):
                 try:
-                    df = pd.read_csv(file_path)
+                    index = index_donnees(file_path)
+                    df = index.df
                     st.write(f"Fichier **`{filename}`** chargé avec succès.")
-                    st.write(f"**Taille :** {len(df)} lignes, {len(df.columns)} colonnes.")
-                    st.dataframe(df.head(10)) # Affiche les 10 premières lignes
+                    st.write(f"**Taille :** {len(df)} annonces uniques, {len(df.columns)} colonnes.")
+                    if 'repost_de' in df:
+                        st.caption(f"{df['repost_de'].notna().sum()} reposts (même contenu qu'une annonce plus ancienne, colonne repost_de).")
+                    if 'repost_photo_de' in df:
+                        st.caption(f"{df['repost_photo_de'].notna().sum()} annonces avec la photo d'une annonce plus ancienne (colonne repost_photo_de).")
+                    positions = afficher_donnees(index, recherche_donnees(file_path), filename)
+                    with st.expander("Statistiques du marché"):
+                        afficher_statistiques(file_path)
                     
-                    # Bouton de téléchargement du fichier original
-                    csv_download_data = df.to_csv(index=False).encode('utf-8')
+                    # Bouton de téléchargement du fichier original (octets du fichier, produits au clic)
+                    format_fichier = st.radio("Format", list(FORMATS), horizontal=True, key=f"format_{filename}")
                     st.download_button(
                         label=f"Télécharger {filename}",
-                        data=csv_download_data,
-                        file_name=filename,
-                        mime="text/csv",
+                        data=telechargement(octets_fichier, file_path, format_fichier),
+                        file_name=nom_telechargement(filename, format_fichier),
+                        mime=FORMATS[format_fichier]['mime'],
                         key=f"download_{filename}"
                     )
+                    # Sélection filtrée : sérialisée seulement au clic
+                    st.download_button(
+                        label=f"Télécharger la sélection ({len(positions)} annonces nettoyées)",
+                        data=telechargement(exporter_selection, index, positions, format_fichier),
+                        file_name=nom_telechargement(f"selection_{filename}", format_fichier),
+                        mime=FORMATS[format_fichier]['mime'],
+                        key=f"download_selection_{filename}"
+                    )
                 except pd.errors.EmptyDataError:
                     st.warning(f"Le fichier '{filename}' est vide. Il n'y a pas de données à afficher.")
                 except Exception as e:
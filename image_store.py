@@ -0,0 +1,375 @@
+import argparse
+import asyncio
+import base64
+import hashlib
+import io
+import mimetypes
+import os
+import sqlite3
+import threading
+import time
+from urllib.parse import urlparse
+
+import aiohttp
+import pandas as pd
+from PIL import Image
+
+from cleaning import DOSSIER_DONNEES, DOSSIER_IMAGES
+from columnar_store import charger
+from dedup_index import ids_annonces
+from retry_scheduler import ECHECS_HOTE, LimiteurDebit, classer
+from static_extract import HEADERS, TIMEOUT
+
+# --- Photos des annonces : téléchargement concurrent, stockage par contenu, photos en double ---
+# Les URLs d'images des données (colonne 'image' de cleaning.py) sont téléchargées en
+# parallèle (connexions plafonnées au total et par hôte, débit limité par hôte).
+# Chaque fichier est rangé sous l'empreinte SHA-256 de ses octets :
+#   data/images/objets/3f/3fa2...e9.jpg
+# des octets identiques (même photo sur plusieurs annonces ou URLs) ne sont stockés qu'une fois.
+# L'index (data/images/images.sqlite3) relie chaque URL à son contenu et à son annonce, et
+# distingue les miniatures du site (.../thumb_3326179_...jpg) des photos en taille réelle.
+# Un hash perceptuel (dHash, 64 bits) de chaque contenu retrouve la même photo ré-encodée ou
+# redimensionnée : une annonce dont une photo ressemble à celle d'une annonce plus ancienne
+# (identifiant plus petit) est un repost probable, même si son texte a changé.
+# Les miniatures du tableau de bord sont créées au premier affichage, puis gardées sur disque.
+#
+#   python image_store.py                 # télécharge les photos de data/*.csv et cherche les reposts
+
+NOM_INDEX = 'images.sqlite3'
+CONCURRENCE = 16 # Connexions ouvertes au total
+CONNEXIONS_PAR_HOTE = 8
+DEBIT_PAR_HOTE = {'images.coinafrique.com': 10.0} # requêtes par seconde
+PREFIXE_MINIATURE = 'thumb_'
+EXTENSIONS = {'.jpg', '.jpeg', '.png', '.webp', '.gif'}
+TAILLE_MINIATURE = 160 # px, plus grand côté
+QUALITE_MINIATURE = 80
+SEUIL_DHASH = 4 # Bits d'écart max entre deux dHash de la même photo
+ANNONCES_MAX_PAR_PHOTO = 20 # Au-delà, la photo est un logo ou une image par défaut, pas un repost
+MASQUE_64 = (1 << 64) - 1
+
+
+def est_miniature(url):
+    return os.path.basename(urlparse(url).path).startswith(PREFIXE_MINIATURE)
+
+
+def url_originale(url):
+    # https://images.coinafrique.com/thumb_3326179_x.jpg -> https://images.coinafrique.com/3326179_x.jpg
+    parsed_url = urlparse(url)
+    dossier, nom = parsed_url.path.rsplit('/', 1)
+    if nom.startswith(PREFIXE_MINIATURE):
+        nom = nom[len(PREFIXE_MINIATURE):]
+    return parsed_url._replace(path=f"{dossier}/{nom}").geturl()
+
+
+def _extension(url, type_mime):
+    extension = os.path.splitext(urlparse(url).path)[1].lower()
+    if extension in EXTENSIONS:
+        return extension
+    return mimetypes.guess_extension((type_mime or '').split(';')[0].strip()) or '.bin'
+
+
+def dhash(image):
+    # Image réduite à 9x8 en niveaux de gris : un bit par pixel, 1 s'il est plus clair que son voisin de droite.
+    # Renvoyé signé (INTEGER SQLite).
+    pixels = list(image.convert('L').resize((9, 8), Image.LANCZOS).getdata())
+    valeur = 0
+    for ligne in range(8):
+        for colonne in range(8):
+            valeur = valeur << 1 | (pixels[ligne * 9 + colonne] > pixels[ligne * 9 + colonne + 1])
+    return valeur - (1 << 64) if valeur >> 63 else valeur
+
+
+def distance(a, b):
+    return bin((a ^ b) & MASQUE_64).count('1')
+
+
+def groupes_similaires(dhashes, seuil=SEUIL_DHASH):
+    # dhashes : {empreinte: dhash} -> groupes (ensembles d'empreintes) de photos à <= seuil bits d'écart.
+    # Principe des tiroirs : deux hashes aussi proches ont au moins une de leurs (seuil + 1) bandes
+    # de bits identique, on ne compare donc que les contenus qui partagent une bande.
+    nb_bandes = seuil + 1
+    largeur = -(-64 // nb_bandes)
+    parent = {empreinte: empreinte for empreinte in dhashes}
+
+    def racine(empreinte):
+        while parent[empreinte] != empreinte:
+            parent[empreinte] = parent[parent[empreinte]]
+            empreinte = parent[empreinte]
+        return empreinte
+
+    for bande in range(nb_bandes):
+        seaux = {}
+        for empreinte, valeur in dhashes.items():
+            seaux.setdefault((valeur & MASQUE_64) >> (bande * largeur) & ((1 << largeur) - 1), []).append(empreinte)
+        for membres in seaux.values():
+            for i, a in enumerate(membres):
+                for b in membres[i + 1:]:
+                    if racine(a) != racine(b) and distance(dhashes[a], dhashes[b]) <= seuil:
+                        parent[racine(a)] = racine(b)
+    groupes = {}
+    for empreinte in dhashes:
+        groupes.setdefault(racine(empreinte), set()).add(empreinte)
+    return [groupe for groupe in groupes.values() if len(groupe) > 1]
+
+
+class StockImages:
+    def __init__(self, dossier=DOSSIER_IMAGES):
+        self.dossier = dossier
+        os.makedirs(dossier, exist_ok=True)
+        self.connexion = sqlite3.connect(os.path.join(dossier, NOM_INDEX), check_same_thread=False)
+        self._verrou = threading.Lock() # Écritures depuis les threads du téléchargement et les sessions du tableau de bord
+        self.connexion.execute("PRAGMA journal_mode=WAL")
+        self.connexion.execute(
+            """CREATE TABLE IF NOT EXISTS contenus (
+                empreinte TEXT PRIMARY KEY,
+                extension TEXT NOT NULL,
+                octets INTEGER NOT NULL,
+                largeur INTEGER,
+                hauteur INTEGER,
+                dhash INTEGER
+            )"""
+        )
+        self.connexion.execute(
+            """CREATE TABLE IF NOT EXISTS images (
+                url TEXT PRIMARY KEY,
+                annonce INTEGER,
+                categorie TEXT,
+                miniature INTEGER NOT NULL,
+                originale TEXT NOT NULL,
+                empreinte TEXT,
+                erreur TEXT,
+                telechargee REAL NOT NULL
+            )"""
+        )
+        self.connexion.execute("CREATE INDEX IF NOT EXISTS idx_images_empreinte ON images (empreinte)")
+        self.connexion.commit()
+
+    def chemin_contenu(self, empreinte, extension):
+        return os.path.join(self.dossier, 'objets', empreinte[:2], empreinte + extension)
+
+    def _ecrire(self, chemin, donnees):
+        os.makedirs(os.path.dirname(chemin), exist_ok=True)
+        temporaire = f"{chemin}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temporaire, 'wb') as f:
+            f.write(donnees)
+        os.replace(temporaire, chemin)
+
+    def a_telecharger(self, urls):
+        # URLs jamais vues, ou en échec passager (timeout, 429, 5xx, réseau) la dernière fois
+        urls = list(dict.fromkeys(urls))
+        with self._verrou:
+            faites = {
+                url for url, erreur in self.connexion.execute("SELECT url, erreur FROM images")
+                if erreur not in ECHECS_HOTE
+            }
+        return [url for url in urls if url not in faites]
+
+    def enregistrer(self, url, annonce, categorie, donnees, type_mime=None):
+        # Renvoie l'empreinte du contenu ; dHash et dimensions seulement pour un contenu nouveau
+        empreinte = hashlib.sha256(donnees).hexdigest()
+        with self._verrou:
+            connu = self.connexion.execute("SELECT 1 FROM contenus WHERE empreinte = ?", (empreinte,)).fetchone()
+        if not connu:
+            extension = _extension(url, type_mime)
+            largeur = hauteur = valeur = None
+            try:
+                with Image.open(io.BytesIO(donnees)) as image:
+                    largeur, hauteur = image.size
+                    valeur = dhash(image)
+            except Exception as e:
+                print(f"  Image illisible ({url}) : {e}")
+            self._ecrire(self.chemin_contenu(empreinte, extension), donnees)
+            with self._verrou:
+                self.connexion.execute(
+                    "INSERT OR IGNORE INTO contenus (empreinte, extension, octets, largeur, hauteur, dhash) VALUES (?, ?, ?, ?, ?, ?)",
+                    (empreinte, extension, len(donnees), largeur, hauteur, valeur),
+                )
+        self._noter(url, annonce, categorie, empreinte, None)
+        return empreinte
+
+    def noter_echec(self, url, annonce, categorie, classe):
+        self._noter(url, annonce, categorie, None, classe)
+
+    def _noter(self, url, annonce, categorie, empreinte, erreur):
+        with self._verrou:
+            self.connexion.execute(
+                """INSERT INTO images (url, annonce, categorie, miniature, originale, empreinte, erreur, telechargee)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                   ON CONFLICT(url) DO UPDATE SET annonce = excluded.annonce, categorie = excluded.categorie,
+                       empreinte = excluded.empreinte, erreur = excluded.erreur, telechargee = excluded.telechargee""",
+                (url, annonce, categorie, est_miniature(url), url_originale(url), empreinte, erreur, time.time()),
+            )
+            self.connexion.commit()
+
+    def miniature(self, url, taille=TAILLE_MINIATURE):
+        # Chemin de la miniature locale de la photo (créée au premier appel), None si la photo n'est pas stockée
+        with self._verrou:
+            ligne = self.connexion.execute(
+                "SELECT c.empreinte, c.extension FROM images i JOIN contenus c ON c.empreinte = i.empreinte WHERE i.url = ?",
+                (url,),
+            ).fetchone()
+        if ligne is None:
+            return None
+        empreinte, extension = ligne
+        chemin = os.path.join(self.dossier, 'miniatures', f"{empreinte}_{taille}.jpg")
+        if not os.path.exists(chemin):
+            try:
+                with Image.open(self.chemin_contenu(empreinte, extension)) as image:
+                    image = image.convert('RGB')
+                    image.thumbnail((taille, taille))
+                    tampon = io.BytesIO()
+                    image.save(tampon, format='JPEG', quality=QUALITE_MINIATURE)
+            except Exception as e:
+                print(f"  Miniature impossible ({url}) : {e}")
+                return None
+            self._ecrire(chemin, tampon.getvalue())
+        return chemin
+
+    def reposts(self, seuil=SEUIL_DHASH, annonces_max=ANNONCES_MAX_PAR_PHOTO):
+        # {id d'annonce: id de l'annonce la plus ancienne avec une photo semblable}, toutes catégories confondues
+        with self._verrou:
+            dhashes = dict(self.connexion.execute("SELECT empreinte, dhash FROM contenus WHERE dhash IS NOT NULL"))
+            annonces_de = {}
+            for empreinte, annonce in self.connexion.execute(
+                "SELECT DISTINCT empreinte, annonce FROM images WHERE empreinte IS NOT NULL AND annonce IS NOT NULL"
+            ):
+                annonces_de.setdefault(empreinte, set()).add(annonce)
+        # Une même photo en un seul contenu (octets identiques) compte aussi
+        groupes = groupes_similaires(dhashes, seuil) + [{empreinte} for empreinte, annonces in annonces_de.items() if len(annonces) > 1]
+        originaux = {}
+        for groupe in groupes:
+            annonces = set().union(*(annonces_de.get(empreinte, set()) for empreinte in groupe))
+            if not 2 <= len(annonces) <= annonces_max:
+                continue
+            original = min(annonces)
+            for annonce in annonces - {original}:
+                originaux[annonce] = min(originaux.get(annonce, original), original)
+        return originaux
+
+    def compter(self):
+        with self._verrou:
+            (nb_urls, nb_miniatures, nb_echecs) = self.connexion.execute(
+                "SELECT COUNT(*), COALESCE(SUM(miniature), 0), COUNT(erreur) FROM images"
+            ).fetchone()
+            (nb_contenus, octets) = self.connexion.execute("SELECT COUNT(*), COALESCE(SUM(octets), 0) FROM contenus").fetchone()
+            (octets_urls,) = self.connexion.execute(
+                "SELECT COALESCE(SUM(c.octets), 0) FROM images i JOIN contenus c ON c.empreinte = i.empreinte"
+            ).fetchone()
+        return {
+            'urls': nb_urls, 'miniatures': nb_miniatures, 'echecs': nb_echecs, 'contenus': nb_contenus,
+            'octets': octets, 'octets_evites': octets_urls - octets,
+        }
+
+    def fermer(self):
+        self.connexion.close()
+
+
+# --- Téléchargement concurrent ---
+
+async def _telecharger_async(stock, images, concurrence, connexions_par_hote, debit_par_hote):
+    limiteurs = {hote: LimiteurDebit(debit) for hote, debit in debit_par_hote.items()}
+    nb_ok = 0
+    connecteur = aiohttp.TCPConnector(limit=concurrence, limit_per_host=connexions_par_hote)
+    async with aiohttp.ClientSession(headers=HEADERS, connector=connecteur, timeout=aiohttp.ClientTimeout(total=TIMEOUT)) as session:
+
+        async def telecharger(url, annonce, categorie):
+            nonlocal nb_ok
+            limiteur = limiteurs.get(urlparse(url).hostname)
+            try:
+                if limiteur:
+                    await limiteur.attendre()
+                async with session.get(url) as reponse:
+                    reponse.raise_for_status()
+                    donnees = await reponse.read()
+                    type_mime = reponse.headers.get('Content-Type')
+            except Exception as e:
+                print(f"  Erreur lors du téléchargement de {url} : {e!r}")
+                stock.noter_echec(url, annonce, categorie, classer(e))
+                return
+            # SHA-256, décodage et dHash hors de la boucle asyncio
+            await asyncio.to_thread(stock.enregistrer, url, annonce, categorie, donnees, type_mime)
+            nb_ok += 1
+
+        async def travailleur():
+            while True:
+                image = await file.get()
+                if image is None:
+                    return
+                await telecharger(*image)
+
+        # 'concurrence' travailleurs seulement (et non une tâche par image) : la mémoire reste
+        # bornée quel que soit le nombre de photos, le connecteur plafonne les connexions par hôte
+        file = asyncio.Queue()
+        for image in images:
+            file.put_nowait(image)
+        for _ in range(concurrence):
+            file.put_nowait(None)
+        await asyncio.gather(*(travailleur() for _ in range(concurrence)))
+    return nb_ok
+
+
+def telecharger_images(stock, images, concurrence=CONCURRENCE, connexions_par_hote=CONNEXIONS_PAR_HOTE, debit_par_hote=None):
+    # images : [(url, id d'annonce, catégorie)] ; seules les URLs pas encore stockées sont téléchargées
+    debit_par_hote = DEBIT_PAR_HOTE if debit_par_hote is None else debit_par_hote
+    a_faire = set(stock.a_telecharger(url for url, _, _ in images))
+    images = [image for image in dict((image[0], image) for image in images).values() if image[0] in a_faire]
+    if not images:
+        return 0
+    return asyncio.run(_telecharger_async(stock, images, concurrence, connexions_par_hote, debit_par_hote))
+
+
+def images_des_donnees(chemin_csv):
+    # [(url de l'image, id d'annonce, catégorie)] des données nettoyées d'un CSV
+    df = charger(chemin_csv, colonnes=['url', 'image'])
+    categorie = os.path.splitext(os.path.basename(chemin_csv))[0]
+    ids = ids_annonces(df['url'])
+    return [
+        (image, None if pd.isna(annonce) else int(annonce), categorie)
+        for image, annonce in zip(df['image'], ids)
+        if isinstance(image, str) and image.startswith('http')
+    ]
+
+
+# --- Tableau de bord ---
+
+def miniature_data_uri(stock, url, taille=TAILLE_MINIATURE):
+    # Miniature locale en data URI (st.column_config.ImageColumn), None si la photo n'est pas stockée
+    chemin = stock.miniature(url, taille) if isinstance(url, str) else None
+    if chemin is None:
+        return None
+    with open(chemin, 'rb') as f:
+        return "data:image/jpeg;base64," + base64.b64encode(f.read()).decode('ascii')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Téléchargement des photos des annonces et recherche des reposts par photo")
+    parser.add_argument('fichiers', nargs='*', help=f"CSV sources (par défaut : {DOSSIER_DONNEES}/*.csv)")
+    parser.add_argument('--dossier', default=DOSSIER_IMAGES, help=f"stock des images ('{DOSSIER_IMAGES}' par défaut)")
+    parser.add_argument('--concurrence', type=int, default=CONCURRENCE, help="connexions ouvertes au total")
+    parser.add_argument('--seuil', type=int, default=SEUIL_DHASH, help="bits d'écart max entre les dHash d'une même photo")
+    args = parser.parse_args(argv)
+    fichiers = args.fichiers or sorted(
+        os.path.join(DOSSIER_DONNEES, nom) for nom in os.listdir(DOSSIER_DONNEES) if nom.endswith('.csv')
+    )
+    stock = StockImages(args.dossier)
+    try:
+        images = [image for chemin_csv in fichiers for image in images_des_donnees(chemin_csv)]
+        debut = time.perf_counter()
+        nb_ok = telecharger_images(stock, images, concurrence=args.concurrence)
+        print(f"{nb_ok} image(s) téléchargée(s) en {time.perf_counter() - debut:.1f} s ({len(images)} URLs dans les données).")
+        compteurs = stock.compter()
+        print(
+            f"{compteurs['urls']} URLs ({compteurs['miniatures']} miniatures, {compteurs['echecs']} en échec)"
+            f" -> {compteurs['contenus']} contenus distincts, {compteurs['octets'] / 1e6:.1f} Mo"
+            f" ({compteurs['octets_evites'] / 1e6:.1f} Mo de doublons non stockés)."
+        )
+        reposts = stock.reposts(args.seuil)
+        print(f"{len(reposts)} annonce(s) avec une photo d'une annonce plus ancienne.")
+        for annonce, original in sorted(reposts.items())[:20]:
+            print(f"  {annonce} -> {original}")
+    finally:
+        stock.fermer()
+
+
+if __name__ == '__main__':
+    main()
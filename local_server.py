@@ -0,0 +1,78 @@
+import mimetypes
+import os
+import threading
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+# --- Doublure HTTP locale de sn.coinafrique.com ---
+# Sert des pages sauvegardées (listings et détails) pour tester les moteurs
+# de scraping hors ligne, sans solliciter le vrai site.
+# Organisation du dossier : /annonce/villas/vente-villa-2139366        -> annonce/villas/vente-villa-2139366.html
+#                           /categorie/villas?page=3                   -> categorie/villas__page=3.html
+# Les autres ressources (images, polices, scripts) suivent la même règle et sont
+# servies avec le type de leur extension (ex: /static/photo.jpg -> image/jpeg).
+
+
+def chemin_local(dossier, url):
+    parsed_url = urlparse(url)
+    nom = parsed_url.path.strip('/') or 'index'
+    if parsed_url.query:
+        nom += '__' + parsed_url.query.replace('&', '__')
+    return os.path.join(dossier, *nom.split('/')) + '.html'
+
+
+def sauvegarder_page(dossier, url, html):
+    # 'html' : texte, ou octets pour une ressource binaire
+    fichier = chemin_local(dossier, url)
+    os.makedirs(os.path.dirname(fichier), exist_ok=True)
+    if isinstance(html, bytes):
+        with open(fichier, 'wb') as f:
+            f.write(html)
+    else:
+        with open(fichier, 'w', encoding='utf-8') as f:
+            f.write(html)
+    return fichier
+
+
+def type_contenu(url):
+    type_mime = mimetypes.guess_type(urlparse(url).path)[0]
+    if type_mime is None or type_mime.startswith('text/'):
+        return f"{type_mime or 'text/html'}; charset=utf-8"
+    return type_mime
+
+
+def _creer_handler(dossier, latence):
+    class PagesSauvegardees(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if latence:
+                threading.Event().wait(latence)
+            fichier = chemin_local(dossier, self.path)
+            if not os.path.exists(fichier):
+                self.send_error(404)
+                return
+            with open(fichier, 'rb') as f:
+                contenu = f.read()
+            self.send_response(200)
+            self.send_header('Content-Type', type_contenu(self.path))
+            self.send_header('Content-Length', str(len(contenu)))
+            self.end_headers()
+            self.wfile.write(contenu)
+
+        def log_message(self, format, *args):
+            pass # Pas de log par requête
+
+    return PagesSauvegardees
+
+
+@contextmanager
+def servir_pages(dossier, port=0, latence=0.0):
+    # Démarre le serveur dans un thread et renvoie son URL de base (ex: http://127.0.0.1:54321)
+    serveur = ThreadingHTTPServer(('127.0.0.1', port), _creer_handler(dossier, latence))
+    thread = threading.Thread(target=serveur.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{serveur.server_address[1]}"
+    finally:
+        serveur.shutdown()
+        serveur.server_close()
@@ -0,0 +1,78 @@
+import csv
+import os
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# --- Écriture en flux des lignes scrapées ---
+# Les lignes sont écrites par lots pendant le crawl (CSV + row groups Parquet)
+# au lieu d'un DataFrame construit à la fin : mémoire constante, et le fichier
+# '.partiel' est lisible à tout moment. finaliser() renomme atomiquement les
+# fichiers partiels vers leur nom définitif.
+
+TAILLE_LOT = 100
+SUFFIXE_PARTIEL = '.partiel'
+NB_APERCU = 5
+
+
+class EcrivainFlux:
+    def __init__(self, chemin_csv, colonnes, chemin_parquet=None, taille_lot=TAILLE_LOT):
+        self.chemin_csv = chemin_csv
+        self.chemin_parquet = chemin_parquet
+        self.colonnes = list(colonnes)
+        self.taille_lot = taille_lot
+        self.nb_lignes = 0
+        self.apercu = [] # Les premières lignes, pour l'affichage de fin de run
+        self._lot = []
+
+        self._fichier_csv = open(chemin_csv + SUFFIXE_PARTIEL, 'w', newline='', encoding='utf-8')
+        self._csv = csv.DictWriter(self._fichier_csv, fieldnames=self.colonnes, extrasaction='ignore')
+        self._csv.writeheader()
+        self._schema = pa.schema([(colonne, pa.string()) for colonne in self.colonnes])
+        self._parquet = None
+        if chemin_parquet:
+            self._parquet = pq.ParquetWriter(chemin_parquet + SUFFIXE_PARTIEL, self._schema)
+
+    def ecrire(self, ligne):
+        self._lot.append(ligne)
+        self.nb_lignes += 1
+        if len(self.apercu) < NB_APERCU:
+            self.apercu.append(ligne)
+        if len(self._lot) >= self.taille_lot:
+            self.vider()
+
+    def vider(self):
+        if not self._lot:
+            return
+        self._csv.writerows(self._lot)
+        self._fichier_csv.flush()
+        os.fsync(self._fichier_csv.fileno())
+        if self._parquet is not None:
+            colonnes = {
+                colonne: [None if ligne.get(colonne) is None else str(ligne[colonne]) for ligne in self._lot]
+                for colonne in self.colonnes
+            }
+            # Un lot = un row group
+            self._parquet.write_table(pa.table(colonnes, schema=self._schema))
+        self._lot = []
+
+    def finaliser(self):
+        self.vider()
+        self._fichier_csv.close()
+        os.replace(self.chemin_csv + SUFFIXE_PARTIEL, self.chemin_csv)
+        if self._parquet is not None:
+            self._parquet.close()
+            os.replace(self.chemin_parquet + SUFFIXE_PARTIEL, self.chemin_parquet)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, type_exc, exc, tb):
+        # En cas d'erreur, on garde les fichiers '.partiel' tels quels
+        if type_exc is None:
+            self.finaliser()
+        else:
+            self.vider()
+            self._fichier_csv.close()
+            if self._parquet is not None:
+                self._parquet.close()
@@ -0,0 +1,104 @@
+import gzip
+import hashlib
+import json
+import os
+import time
+
+# --- Cache disque des pages HTML (listes et détails) ---
+# index/<sha256(url)>.json   : URL, date, ETag / Last-Modified, empreinte du contenu
+# contenus/<sha[:2]>/<sha>.html.gz : le HTML, adressé par son contenu (stocké une seule fois)
+# Une page est servie depuis le cache tant que son TTL n'est pas dépassé, puis
+# revalidée par une requête conditionnelle (304 => pas de re-téléchargement).
+# En mode 'rejouer', aucune requête réseau : tout vient du cache (corpus figé
+# pour re-parser une catégorie entière en quelques secondes).
+
+DOSSIER_CACHE = 'cache_pages'
+TTL_LISTE = 3600 # Les pages de liste changent vite
+TTL_DETAIL = 7 * 24 * 3600
+
+
+class PageAbsenteDuCache(LookupError):
+    pass
+
+
+def _empreinte(donnees):
+    return hashlib.sha256(donnees).hexdigest()
+
+
+def _ecrire_atomique(chemin, donnees):
+    os.makedirs(os.path.dirname(chemin), exist_ok=True)
+    temporaire = f"{chemin}.{os.getpid()}.tmp"
+    with open(temporaire, 'wb') as f:
+        f.write(donnees)
+    os.replace(temporaire, chemin)
+
+
+class CachePages:
+    def __init__(self, dossier=DOSSIER_CACHE, ttl_liste=TTL_LISTE, ttl_detail=TTL_DETAIL, rejouer=False):
+        self.dossier = dossier
+        self.ttl_liste = ttl_liste
+        self.ttl_detail = ttl_detail
+        self.rejouer = rejouer
+
+    def ttl(self, url):
+        return self.ttl_liste if '/categorie/' in url else self.ttl_detail
+
+    def _chemin_index(self, url):
+        return os.path.join(self.dossier, 'index', _empreinte(url.encode('utf-8')) + '.json')
+
+    def _chemin_contenu(self, empreinte):
+        return os.path.join(self.dossier, 'contenus', empreinte[:2], empreinte + '.html.gz')
+
+    def entree(self, url):
+        try:
+            with open(self._chemin_index(url), encoding='utf-8') as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def _contenu(self, entree):
+        with gzip.open(self._chemin_contenu(entree['contenu']), 'rt', encoding='utf-8') as f:
+            return f.read()
+
+    def lire(self, url):
+        # Le HTML si la page est fraîche (ou en mode rejouer), sinon None
+        entree = self.entree(url)
+        if entree is None:
+            if self.rejouer:
+                raise PageAbsenteDuCache(url)
+            return None
+        if self.rejouer or time.time() - entree['date'] < self.ttl(url):
+            return self._contenu(entree)
+        return None
+
+    def entetes_revalidation(self, url):
+        entree = self.entree(url) or {}
+        entetes = {}
+        if entree.get('etag'):
+            entetes['If-None-Match'] = entree['etag']
+        if entree.get('last_modified'):
+            entetes['If-Modified-Since'] = entree['last_modified']
+        return entetes
+
+    def revalidee(self, url):
+        # Réponse 304 : le contenu en cache est toujours bon, on repart pour un TTL
+        entree = self.entree(url)
+        entree['date'] = time.time()
+        _ecrire_atomique(self._chemin_index(url), json.dumps(entree).encode('utf-8'))
+        return self._contenu(entree)
+
+    def ecrire(self, url, html, entetes=None):
+        entetes = entetes or {}
+        donnees = html.encode('utf-8')
+        empreinte = _empreinte(donnees)
+        chemin_contenu = self._chemin_contenu(empreinte)
+        if not os.path.exists(chemin_contenu):
+            _ecrire_atomique(chemin_contenu, gzip.compress(donnees))
+        entree = {
+            'url': url,
+            'date': time.time(),
+            'contenu': empreinte,
+            'etag': entetes.get('ETag'),
+            'last_modified': entetes.get('Last-Modified'),
+        }
+        _ecrire_atomique(self._chemin_index(url), json.dumps(entree).encode('utf-8'))
@@ -0,0 +1,103 @@
+import multiprocessing as mp
+import os
+import queue
+
+from selenium.common.exceptions import WebDriverException
+
+from coinafrique_fields import ligne_vide
+from readiness import AttenteAdaptative
+from selenium_extract import PROFIL, creer_driver, scraper_detail_selenium
+
+# --- Pool de navigateurs Chrome headless dans des processus séparés ---
+# Les workers tirent les URLs d'une file partagée ; chaque driver est recyclé
+# après PAGES_PAR_DRIVER pages ou après un crash. Les lignes sont remises dans
+# l'ordre des URLs.
+
+PAGES_PAR_DRIVER = 50
+TENTATIVES_APRES_CRASH = 1
+
+# 'fork' sur Linux : les workers démarrent sans ré-importer selenium, pandas, etc.
+# 'spawn' ailleurs : les scripts n'appellent main() que sous leur garde __main__,
+# le ré-import du module principal dans chaque worker ne relance donc pas le crawl.
+_CONTEXTE = mp.get_context('fork' if 'fork' in mp.get_all_start_methods() else 'spawn')
+
+
+def _fermer(driver):
+    if driver is not None:
+        try:
+            driver.quit()
+        except Exception:
+            pass
+
+
+def _travailleur(taches, resultats, options_driver, pages_par_driver):
+    driver = None
+    pages = 0
+    attente = AttenteAdaptative() # Délais appris propres à ce worker
+    while True:
+        tache = taches.get()
+        if tache is None: # Sentinelle : plus d'URL à traiter
+            break
+        index, url, champs = tache
+        ligne = ligne_vide(url, champs)
+        for tentative in range(1 + TENTATIVES_APRES_CRASH):
+            try:
+                if driver is None:
+                    driver = creer_driver(**options_driver)
+                    pages = 0
+                ligne = scraper_detail_selenium(driver, url, champs, attente=attente)
+                pages += 1
+                break
+            except WebDriverException as e:
+                print(f"  [pid {os.getpid()}] Navigateur en échec sur {url} (tentative {tentative + 1}) : {e.msg}")
+                _fermer(driver)
+                driver = None
+            except Exception as e:
+                # Une autre erreur (driver introuvable, traitement d'un champ...) ne doit pas arrêter le worker :
+                # la ligne reste vide et les URLs suivantes de la file sont traitées
+                print(f"  [pid {os.getpid()}] Erreur sur {url} : {e!r}")
+                break
+        resultats.put((index, ligne))
+        if pages >= pages_par_driver:
+            _fermer(driver)
+            driver = None
+    _fermer(driver)
+    print(f"  [pid {os.getpid()}] {attente.rapport()}")
+
+
+def scraper_details_pool(urls, champs, nb_workers=None, pages_par_driver=PAGES_PAR_DRIVER, chemin_driver=None, headless=True,
+                         profil=PROFIL):
+    # 'champs' : spécification commune à toutes les URLs, ou fonction url -> spécification
+    champs_de = champs if callable(champs) else (lambda url: champs)
+    nb_workers = min(nb_workers or os.cpu_count() or 1, max(len(urls), 1))
+    taches = _CONTEXTE.Queue()
+    resultats = _CONTEXTE.Queue()
+    for index, url in enumerate(urls):
+        taches.put((index, url, champs_de(url)))
+    for _ in range(nb_workers):
+        taches.put(None)
+
+    options_driver = {'chemin_driver': chemin_driver, 'headless': headless, 'profil': profil}
+    workers = [
+        _CONTEXTE.Process(target=_travailleur, args=(taches, resultats, options_driver, pages_par_driver), daemon=True)
+        for _ in range(nb_workers)
+    ]
+    for worker in workers:
+        worker.start()
+
+    lignes = [None] * len(urls)
+    recues = 0
+    while recues < len(urls):
+        try:
+            index, ligne = resultats.get(timeout=5)
+        except queue.Empty:
+            if not any(worker.is_alive() for worker in workers):
+                print("  Erreur: tous les workers se sont arrêtés avant la fin.")
+                break
+            continue
+        lignes[index] = ligne
+        recues += 1
+
+    for worker in workers:
+        worker.join(timeout=10)
+    return [ligne if ligne is not None else ligne_vide(url, champs_de(url)) for url, ligne in zip(urls, lignes)]
@@ -0,0 +1,119 @@
+import time
+from collections import deque
+
+from selenium.common.exceptions import TimeoutException
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.ui import WebDriverWait
+
+from coinafrique_fields import SELECTEUR_TITRE
+
+# --- Attente adaptative à la place des time.sleep fixes ---
+# On attend exactement les sélecteurs dont les champs ont besoin, avec un délai
+# appris par sélecteur : tant qu'on a peu de mesures on garde TIMEOUT_MAX, ensuite
+# le délai devient MARGE x le 95e centile des temps d'apparition observés.
+# Un timeout n'entre pas dans les mesures (un sélecteur absent de la page, ex. pas de
+# photo, ne doit pas tirer le centile vers TIMEOUT_MAX). Si le site ralentit, les timeouts
+# s'enchaînent : après TIMEOUTS_AVANT_ELARGISSEMENT timeouts consécutifs sur un sélecteur,
+# son délai double (et double encore à chaque nouvelle série), jusqu'à la première apparition.
+# Le rapport compare le temps passé à attendre au temps passé à extraire.
+
+TIMEOUT_MAX = 15
+TIMEOUT_MIN = 2
+MARGE = 3.0
+MESURES_MIN = 5
+FENETRE = 100
+TIMEOUTS_AVANT_ELARGISSEMENT = 3
+INTERVALLE_SONDAGE = 0.1
+
+
+def selecteurs_requis(champs):
+    # Le titre (page chargée) puis le sélecteur principal des champs marqués 'attendre'
+    selecteurs = [SELECTEUR_TITRE]
+    for champ in champs:
+        if champ.get('attendre'):
+            selecteur = champ['strategies'][0]['css']
+            if selecteur not in selecteurs:
+                selecteurs.append(selecteur)
+    return selecteurs
+
+
+def _centile(valeurs, q):
+    valeurs = sorted(valeurs)
+    return valeurs[min(len(valeurs) - 1, int(q * len(valeurs)))]
+
+
+class AttenteAdaptative:
+    def __init__(self, timeout_max=TIMEOUT_MAX, timeout_min=TIMEOUT_MIN, marge=MARGE, limiteur=None):
+        # 'limiteur' : objet avec patienter() appelé avant chaque chargement de page (ex. work_queue.DebitPartage)
+        self.limiteur = limiteur
+        self.timeout_max = timeout_max
+        self.timeout_min = timeout_min
+        self.marge = marge
+        self.mesures = {} # sélecteur -> deque des temps d'apparition (s)
+        self.echecs = {}
+        self.consecutifs = {} # sélecteur -> timeouts depuis la dernière apparition
+        self.temps_navigation = 0.0
+        self.temps_attente = 0.0
+        self.temps_pages = 0.0
+        self.nb_pages = 0
+        self._debut_page = None
+
+    def timeout(self, selecteur):
+        mesures = self.mesures.get(selecteur)
+        if not mesures or len(mesures) < MESURES_MIN:
+            return self.timeout_max
+        timeout = max(self.timeout_min, self.marge * _centile(mesures, 0.95))
+        timeout *= 2 ** (self.consecutifs.get(selecteur, 0) // TIMEOUTS_AVANT_ELARGISSEMENT)
+        return min(self.timeout_max, timeout)
+
+    def attendre(self, driver, selecteur, tous=False):
+        condition = EC.presence_of_all_elements_located if tous else EC.presence_of_element_located
+        debut = time.perf_counter()
+        try:
+            WebDriverWait(driver, self.timeout(selecteur), poll_frequency=INTERVALLE_SONDAGE).until(
+                condition((By.CSS_SELECTOR, selecteur))
+            )
+            ok = True
+        except TimeoutException:
+            ok = False
+        duree = time.perf_counter() - debut
+        self.temps_attente += duree
+        if ok:
+            self.mesures.setdefault(selecteur, deque(maxlen=FENETRE)).append(duree)
+            self.consecutifs[selecteur] = 0
+        else:
+            self.echecs[selecteur] = self.echecs.get(selecteur, 0) + 1
+            self.consecutifs[selecteur] = self.consecutifs.get(selecteur, 0) + 1
+        return ok
+
+    def naviguer(self, driver, url):
+        # Clôt la page précédente et mesure le driver.get de la nouvelle
+        self.terminer()
+        if self.limiteur is not None:
+            self.limiteur.patienter()
+        self._debut_page = time.perf_counter()
+        driver.get(url)
+        self.temps_navigation += time.perf_counter() - self._debut_page
+        self.nb_pages += 1
+
+    def terminer(self):
+        if self._debut_page is not None:
+            self.temps_pages += time.perf_counter() - self._debut_page
+            self._debut_page = None
+
+    def rapport(self):
+        self.terminer()
+        temps_extraction = max(0.0, self.temps_pages - self.temps_navigation - self.temps_attente)
+        lignes = [
+            f"Pages : {self.nb_pages} | navigation : {self.temps_navigation:.1f} s"
+            f" | attente : {self.temps_attente:.1f} s | extraction : {temps_extraction:.1f} s",
+        ]
+        for selecteur in sorted(set(self.mesures) | set(self.echecs)):
+            mesures = self.mesures.get(selecteur, [])
+            mediane = f"{_centile(mesures, 0.5):.2f} s" if mesures else "-"
+            lignes.append(
+                f"  {selecteur} : médiane {mediane}, timeout actuel {self.timeout(selecteur):.1f} s,"
+                f" {self.echecs.get(selecteur, 0)} échec(s)"
+            )
+        return "\n".join(lignes)
@@ -0,0 +1,233 @@
+import asyncio
+import heapq
+import random
+import sys
+import threading
+import time
+from collections import Counter, deque
+from urllib.parse import urlparse
+
+import aiohttp
+import requests
+
+# --- Reprises des échecs : classification, délais exponentiels, disjoncteur par hôte ---
+# Chaque échec est classé :
+#   - 'timeout', 'limite' (429), 'serveur' (5xx), 'reseau' : passagers, l'URL est
+#     retentée plus tard avec un délai exponentiel (aléa compris, ou le Retry-After du serveur)
+#   - 'selecteur' : page chargée mais rien à lire (liste sans a.card-image, titre absent)
+#   - 'disparue' (404, 410) : l'annonce a été retirée, inutile d'insister
+#   - 'client' (autres 4xx), 'autre' : pas de nouvel essai par le même moteur
+# Une URL en échec n'occupe pas de worker : elle est mise de côté et retentée
+# dans une passe différée, quand son délai est écoulé.
+# Le disjoncteur suit les dernières requêtes de chaque hôte : si trop d'entre elles
+# échouent (timeouts, 429, 5xx), toutes les requêtes vers cet hôte attendent une pause,
+# doublée à chaque nouvelle ouverture.
+# Le limiteur de débit par hôte (LimiteurDebit) est ici aussi. Ce module n'importe pas
+# Selenium : image_store.py (et donc le tableau de bord) en dépend sans l'installer.
+
+TIMEOUT = 'timeout'
+LIMITE = 'limite'
+SERVEUR = 'serveur'
+RESEAU = 'reseau'
+SELECTEUR = 'selecteur'
+DISPARUE = 'disparue'
+CLIENT = 'client'
+AUTRE = 'autre'
+RETENTABLES = {TIMEOUT, LIMITE, SERVEUR, RESEAU, SELECTEUR}
+ECHECS_HOTE = {TIMEOUT, LIMITE, SERVEUR, RESEAU} # Comptent contre l'hôte dans le disjoncteur
+
+TENTATIVES_MAX = 3 # Nouveaux essais après le premier
+TENTATIVES_PAR_CLASSE = {SELECTEUR: 1} # Une page de liste vide est le plus souvent la vraie fin de la liste
+DELAI_BASE = 1.0 # s, doublé à chaque tentative
+DELAI_MAX = 60.0
+FENETRE_DISJONCTEUR = 20 # Dernières requêtes observées par hôte
+SEUIL_DISJONCTEUR = 0.5 # Part d'échecs qui ouvre le disjoncteur
+REQUETES_MIN_DISJONCTEUR = 5
+PAUSE_DISJONCTEUR = 10.0 # s, doublée à chaque ouverture successive
+PAUSE_MAX_DISJONCTEUR = 120.0
+
+
+def statut_http(erreur):
+    return getattr(erreur, 'status', None) or getattr(getattr(erreur, 'response', None), 'status_code', None)
+
+
+def classer(erreur):
+    statut = statut_http(erreur)
+    if statut in (404, 410):
+        return DISPARUE
+    if statut == 429:
+        return LIMITE
+    if statut and statut >= 500:
+        return SERVEUR
+    if statut and statut >= 400:
+        return CLIENT
+    # Avant les erreurs de connexion : certains timeouts (aiohttp, requests) en sont aussi.
+    # Une exception de Selenium n'existe que si Selenium est déjà chargé par l'appelant.
+    selenium = sys.modules.get('selenium.common.exceptions')
+    timeouts = (TimeoutError, requests.Timeout) + ((selenium.TimeoutException,) if selenium is not None else ())
+    if isinstance(erreur, timeouts):
+        return TIMEOUT
+    if isinstance(erreur, (ConnectionError, requests.ConnectionError, aiohttp.ClientConnectionError, aiohttp.ClientPayloadError)):
+        return RESEAU
+    return AUTRE
+
+
+class LimiteurDebit:
+    def __init__(self, requetes_par_seconde):
+        self.intervalle = 1.0 / requetes_par_seconde if requetes_par_seconde else 0.0
+        self._prochain_depart = 0.0
+        self._verrou = asyncio.Lock()
+
+    async def attendre(self):
+        # Réserve le prochain créneau libre puis dort jusqu'à lui
+        async with self._verrou:
+            maintenant = time.monotonic()
+            depart = max(maintenant, self._prochain_depart)
+            self._prochain_depart = depart + self.intervalle
+        if depart > maintenant:
+            await asyncio.sleep(depart - maintenant)
+
+
+def delai_impose(erreur):
+    # Retry-After (en secondes) d'une réponse 429 / 503, sinon None
+    entetes = getattr(erreur, 'headers', None) or getattr(getattr(erreur, 'response', None), 'headers', None) or {}
+    try:
+        return float(entetes.get('Retry-After'))
+    except (TypeError, ValueError):
+        return None
+
+
+def delai(tentative, base=DELAI_BASE, maximum=DELAI_MAX, hasard=random):
+    # Délai exponentiel avec aléa : entre la moitié et la totalité de base x 2^(tentative-1)
+    plafond = min(maximum, base * 2 ** (tentative - 1))
+    return plafond / 2 + hasard.uniform(0, plafond / 2)
+
+
+class Disjoncteur:
+    def __init__(self, hote, fenetre=FENETRE_DISJONCTEUR, seuil=SEUIL_DISJONCTEUR, requetes_min=REQUETES_MIN_DISJONCTEUR,
+                 pause=PAUSE_DISJONCTEUR, pause_max=PAUSE_MAX_DISJONCTEUR):
+        self.hote = hote
+        self.seuil = seuil
+        self.requetes_min = requetes_min
+        self.pause_initiale = pause
+        self.pause = pause
+        self.pause_max = pause_max
+        self.issues = deque(maxlen=fenetre) # True = échec
+        self.reouverture = 0.0 # time.monotonic() de fin de pause
+        self.nb_ouvertures = 0
+
+    def attente(self):
+        return max(0.0, self.reouverture - time.monotonic())
+
+    def noter(self, echec):
+        maintenant = time.monotonic()
+        if maintenant < self.reouverture:
+            return # Réponses de requêtes parties avant l'ouverture
+        self.issues.append(echec)
+        nb_echecs = sum(self.issues)
+        if len(self.issues) < self.requetes_min:
+            return
+        if nb_echecs / len(self.issues) >= self.seuil:
+            print(f"  Disjoncteur ouvert pour {self.hote} : {nb_echecs} échecs sur les {len(self.issues)} dernières"
+                  f" requêtes, pause de {self.pause:.0f} s.")
+            self.reouverture = maintenant + self.pause
+            self.pause = min(self.pause_max, self.pause * 2)
+            self.nb_ouvertures += 1
+            self.issues.clear() # Après la pause, une nouvelle fenêtre décide de rouvrir ou non
+        elif not nb_echecs:
+            self.pause = self.pause_initiale
+
+
+class Disjoncteurs:
+    # Un disjoncteur par hôte, partagé par les moteurs (thread de pagination et boucle asyncio)
+    def __init__(self, **options):
+        self.options = options
+        self.par_hote = {}
+        self._verrou = threading.Lock()
+
+    def _disjoncteur(self, url):
+        hote = urlparse(url).hostname
+        if hote not in self.par_hote:
+            self.par_hote[hote] = Disjoncteur(hote, **self.options)
+        return self.par_hote[hote]
+
+    def attente(self, url):
+        with self._verrou:
+            return self._disjoncteur(url).attente()
+
+    def noter(self, url, classe=None):
+        # 'classe' : classe de l'échec, None pour une réponse exploitable
+        with self._verrou:
+            self._disjoncteur(url).noter(classe in ECHECS_HOTE)
+
+    def nb_ouvertures(self):
+        return sum(disjoncteur.nb_ouvertures for disjoncteur in self.par_hote.values())
+
+
+class Reprises:
+    # Tentatives par URL et file des URLs mises de côté, par date du prochain essai
+    def __init__(self, tentatives_max=TENTATIVES_MAX, delai_base=DELAI_BASE, delai_max=DELAI_MAX, disjoncteurs=None,
+                 hasard=None, tentatives_par_classe=None):
+        self.tentatives_max = tentatives_max
+        self.tentatives_par_classe = TENTATIVES_PAR_CLASSE if tentatives_par_classe is None else tentatives_par_classe
+        self.delai_base = delai_base
+        self.delai_max = delai_max
+        self.disjoncteurs = Disjoncteurs() if disjoncteurs is None else disjoncteurs
+        self.hasard = hasard or random.Random()
+        self.tentatives = Counter()
+        self.classes = {} # url -> classe du dernier échec
+        self.abandons = Counter() # classe -> URLs abandonnées
+        self.reussites_apres_echec = 0
+        self._file = [] # tas de (échéance, url)
+        self._en_attente = set()
+
+    def echec(self, url, classe, erreur=None):
+        # Renvoie le délai avant un nouvel essai, ou None si l'URL est abandonnée
+        self.classes[url] = classe
+        maximum = self.tentatives_par_classe.get(classe, self.tentatives_max)
+        if classe not in RETENTABLES or self.tentatives[url] >= maximum:
+            self.abandons[classe] += 1
+            return None
+        self.tentatives[url] += 1
+        attente = delai(self.tentatives[url], self.delai_base, self.delai_max, self.hasard)
+        impose = delai_impose(erreur) if erreur is not None else None
+        return min(self.delai_max, max(attente, impose)) if impose else attente
+
+    def differer(self, url, classe, erreur=None):
+        # Met l'URL de côté pour la passe différée ; False si elle est abandonnée
+        attente = self.echec(url, classe, erreur)
+        if attente is None:
+            return False
+        heapq.heappush(self._file, (time.monotonic() + attente, url))
+        self._en_attente.add(url)
+        return True
+
+    def succes(self, url):
+        if url in self.classes:
+            self.reussites_apres_echec += 1
+            del self.classes[url]
+
+    def en_attente(self, url):
+        return url in self._en_attente
+
+    def __len__(self):
+        return len(self._file)
+
+    def attente(self):
+        # Secondes avant la prochaine URL à retenter
+        return max(0.0, self._file[0][0] - time.monotonic()) if self._file else 0.0
+
+    def dues(self):
+        # Les URLs dont le délai est écoulé, retirées de la file
+        maintenant = time.monotonic()
+        urls = []
+        while self._file and self._file[0][0] <= maintenant:
+            url = heapq.heappop(self._file)[1]
+            self._en_attente.discard(url)
+            urls.append(url)
+        return urls
+
+    def rapport(self):
+        abandons = ", ".join(f"{nombre} {classe}" for classe, nombre in self.abandons.most_common()) or "aucune"
+        return (f"{sum(self.tentatives.values())} nouvel(s) essai(s), {self.reussites_apres_echec} réussi(s)"
+                f" | URLs abandonnées : {abandons}")
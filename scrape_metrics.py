@@ -0,0 +1,175 @@
+import argparse
+import bisect
+import json
+import threading
+import time
+from collections import Counter
+
+from coinafrique_fields import VALEUR_MANQUANTE
+
+# --- Mesures par URL du crawl (JSONL) et résumé de fin de run ---
+# Une ligne JSON par page traitée et par moteur (une annonce reprise avec Selenium
+# après le moteur async a donc deux lignes) :
+#   {"t": 1760000000.0, "url": ..., "moteur": "async", "duree_ms": 84.2,
+#    "telechargement_ms": 80.1, "analyse_ms": 3.2,
+#    "champs": {"price": {"ms": 0.05, "strategie": 0}, "superficie": {"ms": 0.3, "strategie": 2}},
+#    "erreur": null, "issue": "ok"}
+# 'strategie' : rang de la stratégie de coinafrique_fields qui a donné la valeur
+# (0 = sélecteur principal, > 0 = fallback, null = champ manquant).
+# Les moteurs remplissent le dictionnaire 'mesure' qu'on leur passe ; le coût est
+# de quelques perf_counter par page et d'une écriture groupée par lot.
+#
+#   python scrape_metrics.py coinafrique_mesures.jsonl   # résumé d'un run passé
+
+CHEMIN_MESURES = 'coinafrique_mesures.jsonl'
+TAILLE_LOT = 100
+BORNES_MS = [50, 100, 250, 500, 1000, 2500, 5000, 10000] # Classes des histogrammes de latence
+LARGEUR_BARRE = 40
+
+
+def nom_erreur(e):
+    # Type de l'exception, avec le code HTTP s'il y en a un (ex: 'HTTPError 429')
+    statut = getattr(e, 'status', None) or getattr(getattr(e, 'response', None), 'status_code', None)
+    return f"{type(e).__name__} {statut}" if statut else type(e).__name__
+
+
+class Chrono:
+    # Ajoute la durée du bloc (ms) à mesure[cle] ; ne fait rien si 'mesure' est None
+    def __init__(self, mesure, cle):
+        self.mesure = mesure
+        self.cle = cle
+
+    def __enter__(self):
+        if self.mesure is not None:
+            self._debut = time.perf_counter()
+        return self
+
+    def __exit__(self, type_exc, exc, tb):
+        if self.mesure is not None:
+            self.mesure[self.cle] = self.mesure.get(self.cle, 0.0) + (time.perf_counter() - self._debut) * 1000
+        return False
+
+
+def _centile(valeurs, q):
+    valeurs = sorted(valeurs)
+    return valeurs[min(len(valeurs) - 1, int(q * len(valeurs)))]
+
+
+class MesuresCrawl:
+    # 'chemin' None : pas de fichier, seulement le résumé de fin de run
+    def __init__(self, chemin=CHEMIN_MESURES, taille_lot=TAILLE_LOT):
+        self.chemin = chemin
+        self.taille_lot = taille_lot
+        self.durees = {} # moteur -> durées (ms)
+        self.champs = {} # (moteur, champ) -> Counter(pages, manquants, fallbacks, ms)
+        self.erreurs = Counter() # (moteur, erreur) -> nombre
+        self.issues = Counter() # (moteur, issue) -> nombre
+        self._lot = []
+        self._verrou = threading.Lock() # La pagination tourne dans un autre thread que les workers
+        self._fichier = open(chemin, 'a', encoding='utf-8') if chemin else None
+
+    def debut(self, url, moteur):
+        return {'t': time.time(), 'url': url, 'moteur': moteur, '_debut': time.perf_counter()}
+
+    def terminer(self, mesure, ligne=None, champs=None):
+        # 'ligne' et 'champs' : résultat de l'extraction, pour l'issue et les champs manquants
+        mesure['duree_ms'] = (time.perf_counter() - mesure.pop('_debut')) * 1000
+        if mesure.get('erreur'):
+            mesure['issue'] = 'erreur'
+        elif ligne is not None and champs is not None:
+            complete = all(ligne.get(champ['nom'], VALEUR_MANQUANTE) != VALEUR_MANQUANTE for champ in champs)
+            mesure['issue'] = 'ok' if complete else 'incomplet'
+        else:
+            mesure.setdefault('issue', 'ok')
+        for cle, valeur in mesure.items():
+            if cle.endswith('_ms'):
+                mesure[cle] = round(valeur, 3)
+        for detail in (mesure.get('champs') or {}).values():
+            detail['ms'] = round(detail['ms'], 3)
+        with self._verrou:
+            self.ajouter(mesure)
+            if self._fichier is not None:
+                self._lot.append(json.dumps(mesure, ensure_ascii=False))
+                if len(self._lot) >= self.taille_lot:
+                    self._vider()
+
+    def ajouter(self, mesure):
+        # Agrège une mesure dans les compteurs du résumé (aussi utilisé pour relire un fichier JSONL)
+        moteur = mesure['moteur']
+        self.durees.setdefault(moteur, []).append(mesure['duree_ms'])
+        self.issues[moteur, mesure.get('issue', 'ok')] += 1
+        if mesure.get('erreur'):
+            self.erreurs[moteur, mesure['erreur']] += 1
+        for nom, detail in (mesure.get('champs') or {}).items():
+            compteur = self.champs.setdefault((moteur, nom), Counter())
+            compteur['pages'] += 1
+            compteur['manquants'] += detail['strategie'] is None
+            compteur['fallbacks'] += bool(detail['strategie'])
+            compteur['ms'] += detail['ms']
+
+    def _vider(self):
+        if self._lot:
+            self._fichier.write("\n".join(self._lot) + "\n")
+            self._fichier.flush()
+            self._lot = []
+
+    def fermer(self):
+        with self._verrou:
+            if self._fichier is not None:
+                self._vider()
+                self._fichier.close()
+                self._fichier = None
+
+    def histogramme(self, moteur):
+        classes = [0] * (len(BORNES_MS) + 1)
+        for duree in self.durees[moteur]:
+            classes[bisect.bisect_right(BORNES_MS, duree)] += 1
+        etiquettes = [f"< {borne} ms" for borne in BORNES_MS] + [f">= {BORNES_MS[-1]} ms"]
+        plus_grande = max(classes)
+        lignes = []
+        for etiquette, nombre in zip(etiquettes, classes):
+            if nombre:
+                barre = '#' * max(1, round(LARGEUR_BARRE * nombre / plus_grande))
+                lignes.append(f"    {etiquette:>11} {barre} {nombre}")
+        return lignes
+
+    def resume(self):
+        lignes = []
+        for moteur, durees in self.durees.items():
+            issues = ", ".join(f"{nombre} {issue}" for (m, issue), nombre in sorted(self.issues.items()) if m == moteur)
+            lignes.append(
+                f"{moteur} : {len(durees)} pages ({issues}) | p50 {_centile(durees, 0.5):.0f} ms"
+                f" | p95 {_centile(durees, 0.95):.0f} ms | max {max(durees):.0f} ms"
+            )
+            lignes.extend(self.histogramme(moteur))
+            for (m, nom), compteur in self.champs.items():
+                if m == moteur:
+                    lignes.append(
+                        f"    {nom} : manquant {compteur['manquants'] / compteur['pages']:.1%},"
+                        f" fallback {compteur['fallbacks'] / compteur['pages']:.1%},"
+                        f" {compteur['ms'] * 1000 / compteur['pages']:.0f} µs"
+                    )
+            for (m, erreur), nombre in self.erreurs.most_common():
+                if m == moteur:
+                    lignes.append(f"    erreur {erreur} : {nombre}")
+        return "\n".join(lignes)
+
+
+def lire(chemin):
+    mesures = MesuresCrawl(None)
+    with open(chemin, encoding='utf-8') as fichier:
+        for ligne in fichier:
+            if ligne.strip():
+                mesures.ajouter(json.loads(ligne))
+    return mesures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Résumé des mesures par URL d'un crawl coinafrique")
+    parser.add_argument('chemin', nargs='?', default=CHEMIN_MESURES, help=f"fichier JSONL ('{CHEMIN_MESURES}' par défaut)")
+    args = parser.parse_args(argv)
+    print(lire(args.chemin).resume())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+import bisect
+import re
+import unicodedata
+
+import numpy as np
+import pandas as pd
+
+# --- Recherche plein texte dans les annonces ---
+# Index inversé construit une fois par version des données (voir
+# data_loader.recherche_donnees) : mot normalisé (minuscules, sans accents) ->
+# positions des annonces qui le contiennent, avec le poids du champ où il apparaît.
+# Champs indexés : type_annonce, adresse et le "slug" de l'URL
+# (/annonce/appartements/location-appartement-f5-keur-yoff-3326179).
+# Une requête garde les annonces qui contiennent tous ses mots (le dernier mot
+# peut être un début de mot : "Alma" trouve "Almadies"), classées par score
+# (somme des poids x rareté des mots).
+
+POIDS_CHAMPS = {'type_annonce': 3.0, 'adresse': 2.0, 'slug': 1.0}
+MOTS_VIDES = {'a', 'au', 'aux', 'de', 'des', 'du', 'en', 'et', 'la', 'le', 'les', 'l', 'd'}
+REGEX_MOT = r'[a-z0-9]+'
+
+
+def normaliser(texte):
+    texte = unicodedata.normalize('NFKD', texte).encode('ascii', 'ignore').decode('ascii')
+    return texte.lower()
+
+
+def mots(texte):
+    return [mot for mot in re.findall(REGEX_MOT, normaliser(texte)) if mot not in MOTS_VIDES]
+
+
+def _normaliser_serie(serie):
+    return serie.astype('string').str.normalize('NFKD').str.encode('ascii', 'ignore').str.decode('ascii').str.lower()
+
+
+def slug(urls):
+    # ".../annonce/villas/vente-villa-keur-massar-2139366" -> "vente-villa-keur-massar"
+    return urls.str.extract(r'/annonce/[^/]+/([^/?#]+?)(?:-\d+)?/?(?:[?#].*)?$', expand=False)
+
+
+class IndexRecherche:
+    def __init__(self, df):
+        self.nb_lignes = len(df)
+        champs = {'slug': slug(df['url'])} if 'url' in df else {}
+        champs.update({nom: df[nom] for nom in ('type_annonce', 'adresse') if nom in df})
+        morceaux = []
+        for nom, valeurs in champs.items():
+            jetons = _normaliser_serie(valeurs).str.findall(REGEX_MOT).explode().dropna()
+            morceaux.append(pd.DataFrame({
+                'mot': jetons.to_numpy(dtype=object),
+                'position': df.index.get_indexer(jetons.index),
+                'poids': POIDS_CHAMPS[nom],
+            }))
+        self._listes = {}
+        if morceaux:
+            tout = pd.concat(morceaux, ignore_index=True)
+            tout = tout[~tout['mot'].isin(MOTS_VIDES)]
+            # Un mot présent dans plusieurs champs d'une annonce garde le poids le plus fort
+            tout = tout.groupby(['mot', 'position'], sort=True)['poids'].max().reset_index()
+            debuts = np.flatnonzero(np.r_[True, tout['mot'].to_numpy()[1:] != tout['mot'].to_numpy()[:-1]])
+            fins = np.r_[debuts[1:], len(tout)]
+            positions, poids, mots_index = tout['position'].to_numpy(), tout['poids'].to_numpy(), tout['mot'].to_numpy()
+            for debut, fin in zip(debuts, fins):
+                self._listes[mots_index[debut]] = (positions[debut:fin], poids[debut:fin])
+        self.vocabulaire = sorted(self._listes)
+
+    def _scores(self, mot, prefixe=False):
+        # Score (poids du champ x idf) de chaque annonce pour le mot (ou le meilleur mot qui commence par lui), 0 sinon
+        if prefixe:
+            debut = bisect.bisect_left(self.vocabulaire, mot)
+            candidats = self.vocabulaire[debut:bisect.bisect_left(self.vocabulaire, mot + '\uffff')]
+        else:
+            candidats = [mot] if mot in self._listes else []
+        scores = np.zeros(self.nb_lignes)
+        for candidat in candidats:
+            positions, poids = self._listes[candidat]
+            idf = np.log(1 + self.nb_lignes / len(positions))
+            scores[positions] = np.maximum(scores[positions], poids * idf)
+        return scores
+
+    def chercher(self, requete, nb_max=None):
+        # Positions des annonces qui contiennent tous les mots, de la plus pertinente à la moins pertinente
+        mots_requete = mots(requete)
+        if not mots_requete:
+            return np.arange(self.nb_lignes)
+        scores = np.zeros(self.nb_lignes)
+        trouves = np.zeros(self.nb_lignes, dtype=np.int64)
+        for rang, mot in enumerate(mots_requete):
+            scores_mot = self._scores(mot, prefixe=rang == len(mots_requete) - 1)
+            scores += scores_mot
+            trouves += scores_mot > 0
+        resultats = np.flatnonzero(trouves == len(mots_requete))
+        resultats = resultats[np.argsort(-scores[resultats], kind='stable')]
+        return resultats if nb_max is None else resultats[:nb_max]
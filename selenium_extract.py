@@ -0,0 +1,168 @@
+import os
+
+from selenium import webdriver
+from selenium.common.exceptions import TimeoutException
+from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.chrome.service import Service
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.ui import WebDriverWait
+
+from coinafrique_fields import SELECTEUR_TITRE, extraire_ligne, ligne_vide
+from readiness import selecteurs_requis
+from scrape_metrics import Chrono
+
+# --- Moteur Selenium piloté par la spécification des champs ---
+# Même résultat que les blocs try/except des scripts *_extract.py, pour les
+# pages qui ont vraiment besoin d'un navigateur.
+
+UN_SEUL_SCRIPT = True # Tous les champs lus par un seul execute_script par page
+
+# --- Profils du navigateur ---
+# 'complet' : la page entière, comme un visiteur (chargement jusqu'à l'événement load).
+# 'leger'   : driver.get rend la main dès le DOM prêt (page_load_strategy 'eager') ;
+#             les champs encore absents sont attendus par readiness.py. Images, vidéos,
+#             polices et traqueurs ne sont pas téléchargés : l'image d'une annonce est
+#             lue dans l'attribut style, jamais affichée.
+PROFILS = ('leger', 'complet')
+PROFIL = 'leger'
+URLS_BLOQUEES = [ # Motifs de Network.setBlockedURLs (CDP), '*' = n'importe quels caractères
+    '*.jpg', '*.jpeg', '*.png', '*.gif', '*.webp', '*.svg', '*.ico',
+    '*.mp4', '*.webm', '*.mp3',
+    '*.woff', '*.woff2', '*.ttf', '*.otf', '*fonts.googleapis.com*', '*fonts.gstatic.com*',
+    '*google-analytics.com*', '*googletagmanager.com*', '*/gtag/js*', '*doubleclick.net*',
+    '*connect.facebook.net*', '*hotjar.com*',
+]
+PREFERENCES_LEGER = {
+    'profile.managed_default_content_settings.images': 2,
+    'profile.managed_default_content_settings.notifications': 2,
+}
+
+
+def creer_driver(chemin_driver=None, headless=True, profil=PROFIL):
+    if profil not in PROFILS:
+        raise ValueError(f"Profil de navigateur inconnu : {profil} (choix : {', '.join(PROFILS)})")
+    chrome_options = Options()
+    if headless:
+        chrome_options.add_argument("--headless=new")
+        chrome_options.add_argument("--disable-gpu")
+        chrome_options.add_argument("--no-sandbox")
+        chrome_options.add_argument("--disable-dev-shm-usage")
+    chrome_options.add_argument("--window-size=1920,1080") # Les span.qt sont dans .hide-on-med-and-down
+    if profil == 'leger':
+        chrome_options.page_load_strategy = 'eager'
+        chrome_options.add_experimental_option('prefs', PREFERENCES_LEGER)
+        chrome_options.add_argument("--blink-settings=imagesEnabled=false")
+    # Chemin du chromedriver local s'il existe (ex: C:\chrome-win64\...), sinon Selenium Manager le trouve
+    if chemin_driver and os.path.exists(chemin_driver):
+        service = Service(executable_path=chemin_driver)
+    else:
+        service = Service()
+    driver = webdriver.Chrome(service=service, options=chrome_options)
+    if profil == 'leger':
+        # Les préférences ne couvrent que les images : polices, médias et traqueurs bloqués au niveau réseau
+        driver.execute_cdp_cmd('Network.enable', {})
+        driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': URLS_BLOQUEES})
+    return driver
+
+
+# Octets reçus par la page courante (document + ressources), d'après la Resource Timing API.
+# Les requêtes bloquées n'apparaissent pas ; les ressources d'un autre domaine sans
+# Timing-Allow-Origin comptent pour 0.
+SCRIPT_OCTETS = """
+return performance.getEntriesByType('navigation').concat(performance.getEntriesByType('resource'))
+    .reduce((total, entree) => total + (entree.transferSize || 0), 0);
+"""
+
+
+def octets_page(driver):
+    return driver.execute_script(SCRIPT_OCTETS)
+
+
+def valeurs_brutes(driver, strategie):
+    if 'css' in strategie:
+        elements = driver.find_elements(By.CSS_SELECTOR, strategie['css'])[:1]
+    else:
+        elements = driver.find_elements(By.CSS_SELECTOR, strategie['css_tous'])
+    if 'attribut' in strategie:
+        return [element.get_attribute(strategie['attribut']) for element in elements]
+    return [element.text for element in elements]
+
+
+def extraire_champs(driver, url, champs, mesure=None):
+    # Un aller-retour WebDriver par sélecteur essayé
+    return extraire_ligne(url, champs, lambda strategie: valeurs_brutes(driver, strategie), mesure)
+
+
+# Lit dans la page, en un seul execute_script, les valeurs brutes de TOUTES les
+# stratégies (sélecteurs principaux et fallbacks) ; les règles de coinafrique_fields
+# sont ensuite appliquées en Python, à l'identique des autres moteurs.
+SCRIPT_VALEURS = """
+const requetes = arguments[0];
+const resultat = {};
+for (const [cle, requete] of Object.entries(requetes)) {
+    const elements = requete.tous
+        ? Array.from(document.querySelectorAll(requete.css))
+        : [document.querySelector(requete.css)].filter(element => element !== null);
+    resultat[cle] = elements.map(element => requete.attribut ? element.getAttribute(requete.attribut) : element.innerText);
+}
+return resultat;
+"""
+
+
+def _cle(strategie):
+    return '|'.join([strategie.get('css') or strategie['css_tous'], 'tous' if 'css_tous' in strategie else '', strategie.get('attribut') or ''])
+
+
+def requetes_script(champs):
+    requetes = {}
+    for champ in champs:
+        for strategie in champ['strategies']:
+            requetes[_cle(strategie)] = {
+                'css': strategie.get('css') or strategie['css_tous'],
+                'tous': 'css_tous' in strategie,
+                'attribut': strategie.get('attribut'),
+            }
+    return requetes
+
+
+def extraire_champs_script(driver, url, champs, mesure=None):
+    # Un seul aller-retour WebDriver : un objet JSON par annonce
+    with Chrono(mesure, 'script_ms'):
+        valeurs = driver.execute_script(SCRIPT_VALEURS, requetes_script(champs))
+    return extraire_ligne(url, champs, lambda strategie: valeurs.get(_cle(strategie), []), mesure)
+
+
+def scraper_detail_selenium(driver, url, champs, timeout=15, attente=None, un_seul_script=UN_SEUL_SCRIPT, mesure=None):
+    # Les erreurs du navigateur lui-même (crash, session perdue) sont propagées à l'appelant.
+    # 'mesure' (scrape_metrics) : temps de navigation, d'attente des sélecteurs et d'extraction
+    extraire = extraire_champs_script if un_seul_script else extraire_champs
+    if attente is not None:
+        with Chrono(mesure, 'navigation_ms'):
+            attente.naviguer(driver, url)
+        selecteurs = selecteurs_requis(champs)
+        with Chrono(mesure, 'attente_ms'):
+            titre_present = attente.attendre(driver, selecteurs[0])
+            if titre_present:
+                for selecteur in selecteurs[1:]:
+                    attente.attendre(driver, selecteur)
+        if not titre_present:
+            print(f"  Erreur: Le titre n'est pas présent pour {url}.")
+            if mesure is not None:
+                mesure['erreur'] = 'titre_absent'
+            return ligne_vide(url, champs)
+        return extraire(driver, url, champs, mesure)
+
+    with Chrono(mesure, 'navigation_ms'):
+        driver.get(url)
+    try:
+        with Chrono(mesure, 'attente_ms'):
+            WebDriverWait(driver, timeout).until(
+                EC.presence_of_element_located((By.CSS_SELECTOR, SELECTEUR_TITRE))
+            )
+    except TimeoutException:
+        print(f"  Erreur: Le titre n'est pas présent pour {url}.")
+        if mesure is not None:
+            mesure['erreur'] = 'titre_absent'
+        return ligne_vide(url, champs)
+    return extraire(driver, url, champs, mesure)
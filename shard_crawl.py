@@ -0,0 +1,329 @@
+import argparse
+import glob
+import json
+import multiprocessing as mp
+import os
+import socket
+import time
+from urllib.parse import urljoin, urlparse
+
+from requests.adapters import HTTPAdapter
+
+from async_extract import scraper_details
+from coinafrique_extract import (
+    CHEMIN_DRIVER, CONCURRENCE, LIRE_CARTES, PAGES_MAX, REQUETES_PAR_SECONDE, SCRIPT_UNIQUE, TAILLE_LOT_SORTIE,
+    Navigateur, get_page_url, lire_page_liste, scraper_avec_navigateur,
+)
+from coinafrique_fields import BASE_URL, CATEGORIES, champs_manquants, colonnes, completer_ligne, ligne_vide
+from crawl_store import id_annonce
+from output_sink import SUFFIXE_PARTIEL, EcrivainFlux
+from page_cache import DOSSIER_CACHE, CachePages
+from retry_scheduler import DISPARUE, ECHECS_HOTE, Reprises
+from scrape_metrics import MesuresCrawl
+from selenium_extract import PROFIL, PROFILS
+from static_extract import creer_session
+from work_queue import CHEMIN_FILE, DETAILS, DUREE_BAIL, LISTE, Bail, DebitPartage, FileTravail, cle_liste
+
+# --- Crawl réparti : coordinateur, workers et fusion des shards ---
+# 1. Le coordinateur découpe les pages de liste de chaque catégorie en plages
+#    (unités 'liste') dans la file partagée (work_queue.py).
+# 2. Les workers, autant qu'on veut et sur autant de machines qui voient la file,
+#    prennent les unités avec un bail. Une unité 'liste' publie une unité 'details'
+#    par page de liste ; chaque unité terminée écrit son shard : <clé de l'unité>.jsonl.
+#    Une unité reprise après un bail expiré réécrit le même shard.
+# 3. La fusion relit les shards dans l'ordre de leurs noms, garde pour chaque annonce
+#    la ligne la plus complète et écrit les fichiers de chaque catégorie, triés par
+#    identifiant : mêmes shards => mêmes fichiers, quel que soit l'ordre des workers.
+# Le débit (--debit, requêtes par seconde vers le site) est un plafond global : toutes les
+# requêtes de tous les workers (pages de liste, détails async, Selenium) réservent leur
+# créneau dans la file partagée. Ajouter des workers n'augmente pas la charge sur le site.
+#
+#   python shard_crawl.py coordonner villas terrains --pages 50
+#   python shard_crawl.py worker --processus 4      # sur chaque machine
+#   python shard_crawl.py etat
+#   python shard_crawl.py fusionner
+
+DOSSIER_SHARDS = 'shards'
+TAILLE_PLAGE = 5 # Pages de liste par unité
+ATTENTE_FILE = 5.0 # s entre deux essais quand toutes les unités restantes sont prises par d'autres workers
+
+
+class PageEnEchec(RuntimeError):
+    # Page de liste en échec passager (timeout, 429, 5xx) : l'unité retourne dans la file
+    pass
+
+
+def _hors_ligne(cache):
+    return cache is not None and cache.rejouer
+
+
+class AdaptateurLimite(HTTPAdapter):
+    # Chaque requête de la session (moteur statique des pages de liste) prend un créneau du débit partagé
+    def __init__(self, debit, **options):
+        super().__init__(**options)
+        self.debit = debit
+
+    def send(self, request, **options):
+        self.debit.patienter()
+        return super().send(request, **options)
+
+
+def coordonner(file, categories, max_pages, taille_plage=TAILLE_PLAGE):
+    unites = []
+    for categorie in categories:
+        for premier in range(1, max_pages + 1, taille_plage):
+            dernier = min(max_pages, premier + taille_plage - 1)
+            unites.append((cle_liste(categorie, premier, dernier), LISTE, categorie, premier, dernier, {}))
+    nouvelles = file.ajouter(unites)
+    print(f"{nouvelles} plage(s) de pages de liste ajoutée(s) à la file ({len(unites) - nouvelles} déjà présente(s)).")
+    return nouvelles
+
+
+# --- Worker ---
+
+def traiter_liste(unite, file, session, navigateur, cache=None, mesures=None, lire_cartes=LIRE_CARTES):
+    # Renvoie les lignes complètes dès la carte ; les autres annonces partent dans les unités 'details'
+    categorie = unite['categorie']
+    champs = CATEGORIES[categorie]['champs']
+    champs_carte = CATEGORIES[categorie].get('champs_carte') if lire_cartes else None
+    reprises = None if _hors_ligne(cache) else Reprises()
+    lignes = []
+    for page in range(unite['premier'], unite['dernier'] + 1):
+        url_page = get_page_url(urljoin(BASE_URL, CATEGORIES[categorie]['chemin']), page)
+        print(f"\n --- [{categorie}] Page {page} : {url_page} ---")
+        urls_page, cartes, classe = lire_page_liste(categorie, url_page, session, navigateur, cache, champs_carte, mesures, reprises)
+        if not urls_page:
+            if classe in ECHECS_HOTE:
+                raise PageEnEchec(f"page {page} en échec ({classe})")
+            annulees = file.clore_listes(categorie, page)
+            print(f"  Aucune annonce sur la page {page}. Fin des pages de {categorie} ({annulees} plage(s) suivante(s) annulée(s)).")
+            break
+        a_detailler = []
+        incompletes = {}
+        for url in urls_page:
+            if url in cartes:
+                ligne = completer_ligne(ligne_vide(url, champs), cartes[url])
+                if not champs_manquants(ligne, champs):
+                    lignes.append(ligne)
+                    continue
+                incompletes[url] = ligne
+            a_detailler.append(url)
+        nouvelles = file.publier_details(categorie, page, a_detailler, incompletes)
+        print(f"  {len(urls_page)} annonces sur la page ({len(urls_page) - len(a_detailler)} complètes sur leur carte,"
+              f" {nouvelles} à scraper en détail).")
+    return lignes
+
+
+def traiter_details(unite, navigateur, cache=None, mesures=None, concurrence=CONCURRENCE, debit=None,
+                    script_unique=SCRIPT_UNIQUE):
+    # Moteur async d'abord, Selenium pour les annonces encore incomplètes (jamais hors ligne).
+    # 'debit' : work_queue.DebitPartage de l'hôte (sinon le débit par défaut de async_extract, propre au processus)
+    champs = CATEGORIES[unite['categorie']]['champs']
+    urls = unite['charge']['urls']
+    cartes = unite['charge']['cartes']
+    reprises = None if _hors_ligne(cache) else Reprises()
+    lignes = scraper_details(
+        urls, champs, mesures, concurrence=concurrence, limiteurs={debit.hote: debit} if debit is not None else None,
+        cache=cache, reprises=reprises,
+    )
+    resultat = []
+    for url, ligne in zip(urls, lignes):
+        ligne = completer_ligne(ligne, cartes.get(url))
+        retiree = reprises is not None and reprises.classes.get(url) == DISPARUE
+        if champs_manquants(ligne, champs) and not retiree and not _hors_ligne(cache):
+            ligne = completer_ligne(scraper_avec_navigateur(navigateur, url, champs, script_unique, mesures), ligne)
+        resultat.append(ligne)
+    completes = sum(not champs_manquants(ligne, champs) for ligne in resultat)
+    print(f"  {len(resultat)} annonces scrapées en détail ({completes} complètes).")
+    return resultat
+
+
+def ecrire_shard(dossier, cle, lignes):
+    # Fichier partiel puis renommage atomique : un shard présent est toujours complet
+    chemin = os.path.join(dossier, f"{cle}.jsonl")
+    with open(chemin + SUFFIXE_PARTIEL, 'w', encoding='utf-8') as fichier:
+        for ligne in lignes:
+            fichier.write(json.dumps(ligne, ensure_ascii=False) + "\n")
+        fichier.flush()
+        os.fsync(fichier.fileno())
+    os.replace(chemin + SUFFIXE_PARTIEL, chemin)
+    return chemin
+
+
+def travailler(chemin_file=CHEMIN_FILE, dossier=DOSSIER_SHARDS, nom=None, chemin_driver=CHEMIN_DRIVER, headless=True,
+               profil=PROFIL, concurrence=CONCURRENCE, requetes_par_seconde=REQUETES_PAR_SECONDE, lire_cartes=LIRE_CARTES,
+               cache=None, attente_file=ATTENTE_FILE, duree_bail=DUREE_BAIL):
+    # Prend des unités jusqu'à ce que la file soit vide ; attend tant que d'autres workers en ont en cours
+    # (une plage de pages de liste peut encore publier des unités de détails, un bail peut expirer)
+    nom = nom or f"{socket.gethostname()}-{os.getpid()}"
+    os.makedirs(dossier, exist_ok=True)
+    file = FileTravail(chemin_file, duree_bail=duree_bail)
+    site = urlparse(BASE_URL)
+    debit = DebitPartage(file, site.hostname, requetes_par_seconde)
+    session = creer_session()
+    session.mount(f"{site.scheme}://{site.netloc}", AdaptateurLimite(debit))
+    navigateur = Navigateur(chemin_driver, headless, profil, limiteur=debit)
+    mesures = MesuresCrawl(None if _hors_ligne(cache) else os.path.join(dossier, f"mesures-{nom}.jsonl"))
+    nb_unites = 0
+    try:
+        while True:
+            unite = file.prendre(nom)
+            if unite is None:
+                if not file.reste():
+                    break
+                time.sleep(attente_file)
+                continue
+            print(f"\n=== [{nom}] Unité {unite['cle']} (prise {unite['tentative']}) ===")
+            try:
+                with Bail(file, unite['cle'], nom) as bail:
+                    if unite['type'] == LISTE:
+                        lignes = traiter_liste(unite, file, session, navigateur, cache, mesures, lire_cartes)
+                    else:
+                        lignes = traiter_details(unite, navigateur, cache, mesures, concurrence, debit)
+                if bail.perdu:
+                    print(f"  Bail perdu : l'unité {unite['cle']} a été reprise par un autre worker, résultat ignoré.")
+                    continue
+                ecrire_shard(dossier, unite['cle'], lignes)
+                file.terminer(unite['cle'], nom)
+                nb_unites += 1
+            except Exception as e:
+                print(f"  Erreur sur l'unité {unite['cle']} : {e!r}. Retour dans la file.")
+                file.rendre(unite['cle'], nom, repr(e))
+    finally:
+        navigateur.fermer()
+        mesures.fermer()
+        file.fermer()
+    print(f"\n--- [{nom}] {nb_unites} unité(s) traitée(s) ---")
+    if mesures.durees:
+        print(mesures.resume())
+    return nb_unites
+
+
+def _processus_worker(options):
+    travailler(**options)
+
+
+def lancer_workers(nb_processus, **options):
+    # Plusieurs workers sur cette machine, chacun avec sa connexion à la file
+    if nb_processus <= 1:
+        travailler(**options)
+        return
+    nom = options.pop('nom', None) or f"{socket.gethostname()}-{os.getpid()}"
+    processus = [
+        mp.Process(target=_processus_worker, args=({**options, 'nom': f"{nom}-{rang}"},))
+        for rang in range(1, nb_processus + 1)
+    ]
+    for p in processus:
+        p.start()
+    for p in processus:
+        p.join()
+
+
+# --- Fusion ---
+
+def _lignes_shards(dossier, categorie):
+    chemins = sorted(glob.glob(os.path.join(dossier, f"{categorie}-{LISTE}-*.jsonl"))
+                     + glob.glob(os.path.join(dossier, f"{categorie}-{DETAILS}-*.jsonl")))
+    for chemin in chemins:
+        with open(chemin, encoding='utf-8') as fichier:
+            for ligne in fichier:
+                if ligne.strip():
+                    yield json.loads(ligne)
+
+
+def fusionner(categories, dossier=DOSSIER_SHARDS, dossier_sortie='.', taille_lot=TAILLE_LOT_SORTIE):
+    # Une ligne par annonce : la plus complète, à égalité celle du premier shard (ordre des noms)
+    nb_lignes = {}
+    for categorie in categories:
+        champs = CATEGORIES[categorie]['champs']
+        meilleures = {} # id d'annonce -> (champs manquants, ligne)
+        for ligne in _lignes_shards(dossier, categorie):
+            cle = id_annonce(ligne['url']) or ligne['url']
+            manquants = len(champs_manquants(ligne, champs))
+            if cle not in meilleures or manquants < meilleures[cle][0]:
+                meilleures[cle] = (manquants, ligne)
+        if not meilleures:
+            print(f"Aucun shard pour {categorie}.")
+            continue
+        lignes = sorted((ligne for _, ligne in meilleures.values()), key=lambda ligne: (id_annonce(ligne['url']) or 0, ligne['url']))
+        with EcrivainFlux(
+            os.path.join(dossier_sortie, f"{categorie}_coinafrique.csv"), colonnes(champs),
+            chemin_parquet=os.path.join(dossier_sortie, f"{categorie}_coinafrique.parquet"), taille_lot=taille_lot,
+        ) as sortie:
+            for ligne in lignes:
+                sortie.ecrire(ligne)
+        nb_lignes[categorie] = sortie.nb_lignes
+        print(f"{sortie.nb_lignes} lignes sauvegardées dans {sortie.chemin_csv} et {sortie.chemin_parquet}")
+    return nb_lignes
+
+
+def afficher_etat(file):
+    for (type_unite, statut), nombre in file.compter().items():
+        print(f"{type_unite:>8} {statut:<9} {nombre}")
+    for cle, tentatives, erreur in file.echecs():
+        print(f"  échec : {cle} ({tentatives} prises) : {erreur}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Crawl réparti de sn.coinafrique.com (file d'unités de travail avec baux)")
+    parser.add_argument('--file', default=CHEMIN_FILE, help=f"base SQLite de la file partagée ('{CHEMIN_FILE}' par défaut)")
+    parser.add_argument('--shards', default=DOSSIER_SHARDS, help=f"dossier des sorties des unités ('{DOSSIER_SHARDS}' par défaut)")
+    commandes = parser.add_subparsers(dest='commande', required=True)
+
+    coordinateur = commandes.add_parser('coordonner', help="découper les pages de liste en unités de travail")
+    coordinateur.add_argument('categories', nargs='*', help=f"catégories parmi {', '.join(CATEGORIES)} (toutes par défaut)")
+    coordinateur.add_argument('--pages', type=int, default=PAGES_MAX, help=f"pages de liste par catégorie (max {PAGES_MAX}, par défaut)")
+    coordinateur.add_argument('--plage', type=int, default=TAILLE_PLAGE, help="pages de liste par unité")
+
+    worker = commandes.add_parser('worker', help="traiter des unités jusqu'à ce que la file soit vide")
+    worker.add_argument('--nom', help="nom du worker (machine-pid par défaut)")
+    worker.add_argument('--processus', type=int, default=1, help="workers lancés sur cette machine")
+    worker.add_argument('--bail', type=float, default=DUREE_BAIL, help="durée des baux (s) : délai avant qu'une unité d'un worker mort soit reprise")
+    worker.add_argument('--concurrence', type=int, default=CONCURRENCE, help="pages de détail en parallèle par worker")
+    worker.add_argument('--debit', type=float, default=REQUETES_PAR_SECONDE,
+                        help="requêtes par seconde vers le site, tous workers confondus (0 : sans limite)")
+    worker.add_argument('--visible', action='store_true', help="afficher le navigateur (mode non headless)")
+    worker.add_argument('--profil', choices=PROFILS, default=PROFIL, help="profil du navigateur")
+    worker.add_argument('--cache', nargs='?', const=DOSSIER_CACHE, help=f"cache disque des pages HTML ('{DOSSIER_CACHE}' par défaut)")
+    worker.add_argument('--rejouer', action='store_true', help="hors ligne : tout depuis le cache")
+
+    fusion = commandes.add_parser('fusionner', help="écrire les fichiers des catégories à partir des shards")
+    fusion.add_argument('categories', nargs='*', help="catégories à fusionner (celles de la file par défaut)")
+    fusion.add_argument('--partiel', action='store_true', help="fusionner même s'il reste des unités à traiter")
+
+    commandes.add_parser('etat', help="unités par type et statut")
+    args = parser.parse_args(argv)
+
+    if args.commande == 'worker':
+        cache = None
+        if args.cache or args.rejouer:
+            cache = CachePages(args.cache or DOSSIER_CACHE, rejouer=args.rejouer)
+        lancer_workers(
+            args.processus, chemin_file=args.file, dossier=args.shards, nom=args.nom, headless=not args.visible,
+            profil=args.profil, concurrence=args.concurrence, requetes_par_seconde=args.debit, cache=cache,
+            duree_bail=args.bail,
+        )
+        return
+
+    file = FileTravail(args.file)
+    try:
+        if args.commande == 'coordonner':
+            categories = args.categories or list(CATEGORIES)
+            inconnues = [categorie for categorie in categories if categorie not in CATEGORIES]
+            if inconnues:
+                parser.error(f"catégories inconnues : {', '.join(inconnues)}")
+            coordonner(file, categories, min(max(args.pages, 1), PAGES_MAX), max(args.plage, 1))
+        elif args.commande == 'etat':
+            afficher_etat(file)
+        else:
+            restantes = file.reste()
+            if restantes and not args.partiel:
+                parser.error(f"{restantes} unité(s) pas encore traitée(s) ; attendre les workers ou utiliser --partiel")
+            afficher_etat(file)
+            fusionner(args.categories or file.categories(), args.shards)
+    finally:
+        file.fermer()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,110 @@
+import time
+from urllib.parse import urljoin
+
+import requests
+from bs4 import BeautifulSoup
+
+from coinafrique_fields import SELECTEUR_CARTE, SELECTEUR_LIENS, extraire_ligne
+from retry_scheduler import classer
+from scrape_metrics import Chrono
+
+# --- Moteur sans navigateur : requests + BeautifulSoup ---
+# Les champs lus par les scripts Selenium (p.price, span.qt, div.extra-info-ad-detail,
+# style de div.swiper-slide-active) sont présents dans le HTML rendu par le serveur :
+# un simple GET suffit pour la plupart des annonces.
+
+HEADERS = {
+    'User-Agent': (
+        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+        "(KHTML, like Gecko) Chrome/126.0 Safari/537.36"
+    ),
+    'Accept-Language': "fr-FR,fr;q=0.9",
+}
+
+TIMEOUT = 15
+
+
+def creer_session():
+    # Une seule session pour réutiliser les connexions (keep-alive) entre les annonces
+    session = requests.Session()
+    session.headers.update(HEADERS)
+    return session
+
+
+def telecharger_page(session, url, timeout=TIMEOUT, cache=None, disjoncteurs=None):
+    # 'cache' : page_cache.CachePages optionnel (page fraîche servie sans requête, sinon GET conditionnel)
+    # 'disjoncteurs' : retry_scheduler.Disjoncteurs optionnel (pause si l'hôte est en difficulté)
+    if cache is not None:
+        html = cache.lire(url)
+        if html is not None:
+            return html
+    entetes = cache.entetes_revalidation(url) if cache is not None else None
+    if disjoncteurs is not None:
+        time.sleep(disjoncteurs.attente(url))
+    try:
+        reponse = session.get(url, timeout=timeout, headers=entetes)
+        revalidee = cache is not None and reponse.status_code == 304
+        if not revalidee:
+            reponse.raise_for_status()
+    except Exception as e:
+        if disjoncteurs is not None:
+            disjoncteurs.noter(url, classer(e))
+        raise
+    # Une revalidation (304) est aussi une réponse saine de l'hôte pour le disjoncteur
+    if disjoncteurs is not None:
+        disjoncteurs.noter(url)
+    if revalidee:
+        return cache.revalidee(url)
+    if cache is not None:
+        cache.ecrire(url, reponse.text, reponse.headers)
+    return reponse.text
+
+
+def _texte(element, multiligne=False):
+    # Équivalent approximatif de WebElement.text
+    if multiligne:
+        return "\n".join(element.stripped_strings)
+    return " ".join(element.stripped_strings)
+
+
+def valeurs_brutes(soup, strategie):
+    if 'css' in strategie:
+        element = soup.select_one(strategie['css'])
+        elements = [element] if element is not None else []
+    else:
+        elements = soup.select(strategie['css_tous'])
+    if 'attribut' in strategie:
+        return [element.get(strategie['attribut']) for element in elements]
+    return [_texte(element, strategie.get('multiligne', False)) for element in elements]
+
+
+def parser_detail(html, url, champs, mesure=None):
+    with Chrono(mesure, 'analyse_ms'):
+        soup = BeautifulSoup(html, 'html.parser')
+    return extraire_ligne(url, champs, lambda strategie: valeurs_brutes(soup, strategie), mesure)
+
+
+def scraper_detail_statique(session, url, champs, cache=None, mesure=None, disjoncteurs=None):
+    with Chrono(mesure, 'telechargement_ms'):
+        html = telecharger_page(session, url, cache=cache, disjoncteurs=disjoncteurs)
+    return parser_detail(html, url, champs, mesure)
+
+
+def liens_listing(html, base_url):
+    # Liens des annonces d'une page de liste (a.card-image), en URLs absolues
+    return parser_liste(html, base_url)[0]
+
+
+def parser_liste(html, base_url, champs_carte=None):
+    # Liens de la page de liste et, si 'champs_carte', les lignes lues sur les cartes ({url: ligne})
+    soup = BeautifulSoup(html, 'html.parser')
+    liens = [urljoin(base_url, lien['href']) for lien in soup.select(SELECTEUR_LIENS) if lien.get('href')]
+    cartes = {}
+    if champs_carte:
+        for carte in soup.select(SELECTEUR_CARTE):
+            lien = carte.select_one(SELECTEUR_LIENS)
+            if lien is None or not lien.get('href'):
+                continue
+            url = urljoin(base_url, lien['href'])
+            cartes[url] = extraire_ligne(url, champs_carte, lambda strategie: valeurs_brutes(carte, strategie))
+    return liens, cartes
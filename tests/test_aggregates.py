@@ -0,0 +1,83 @@
+import pandas as pd
+import pytest
+
+import aggregates
+from aggregates import compter, mettre_a_jour, statistiques
+from cleaning import nettoyer
+
+BASE = 'https://sn.coinafrique.com/annonce/villas'
+
+
+def donnees(lignes):
+    return pd.DataFrame(lignes, columns=['url', 'transaction', 'prix', 'commune']).astype(
+        {'transaction': 'category', 'prix': 'Int64', 'commune': 'category'}
+    )
+
+
+VILLAS = donnees([
+    (f"{BASE}/vente-villa-saly-1", 'vente', 90000000, 'Saly'),
+    (f"{BASE}/vente-villa-mbour-2", 'vente', 60000000, 'Mbour'),
+    (f"{BASE}/location-villa-ouakam-3", 'location', 1000000, 'Ouakam'),
+    (f"{BASE}/location-villa-ngor-4", 'location', 1500000, 'Ngor'),
+    (f"{BASE}/vente-villa-thies-5", 'vente', 40000000, 'Thiès'),
+])
+
+
+def mediane(etat, transaction):
+    stats = statistiques(etat)
+    ligne = stats[(stats['transaction'] == transaction) & (stats['mesure'] == 'prix') & (stats['dimension'] == 'tout')]
+    return ligne['mediane'].iloc[0]
+
+
+@pytest.fixture
+def comptages(monkeypatch):
+    # Nombre de lignes agrégées à chaque appel de compter
+    appels = []
+
+    def compter_espion(df):
+        appels.append(len(df))
+        return compter(df)
+
+    monkeypatch.setattr(aggregates, 'compter', compter_espion)
+    return appels
+
+
+def test_vente_et_location_separees():
+    etat = compter(VILLAS)
+    assert mediane(etat, 'vente') == 60000000
+    assert mediane(etat, 'location') == 1000000
+
+
+def test_transaction_lue_dans_le_titre():
+    propre = nettoyer(pd.DataFrame({'url': [
+        f"{BASE}/location-villa-4-pieces-ouakam-10", f"{BASE}/vente-villas-6-pieces-rufisque-11",
+        f"{BASE}/villa-a-vendre-saly-12", f"{BASE}/villa-f5-dakar-13",
+    ]}))
+    assert propre['transaction'].astype('string').tolist() == ['location', 'vente', 'vente', pd.NA]
+
+
+def test_prix_corrige_sur_place(tmp_path, comptages):
+    chemin = tmp_path / 'villas.parquet'
+    mettre_a_jour(VILLAS, chemin, source=[1, 100], version=1)
+    corrige = VILLAS.assign(prix=pd.array([1] * len(VILLAS), dtype='Int64'))
+    etat = mettre_a_jour(corrige, chemin, source=[2, 100], version=1)
+    assert mediane(etat, 'vente') == 1
+    assert comptages == [5, 5]
+
+
+def test_lignes_ajoutees_seules_agregees(tmp_path, comptages):
+    chemin = tmp_path / 'villas.parquet'
+    mettre_a_jour(VILLAS.iloc[:3], chemin, source=[1, 60], version=1)
+    etat = mettre_a_jour(VILLAS, chemin, source=[2, 100], version=1)
+    assert comptages == [3, 2]
+    pd.testing.assert_frame_equal(statistiques(etat), statistiques(compter(VILLAS)))
+
+
+def test_etat_reutilise_puis_recalcule(tmp_path, comptages):
+    chemin = tmp_path / 'villas.parquet'
+    mettre_a_jour(VILLAS, chemin, source=[1, 100], version=1)
+    mettre_a_jour(VILLAS, chemin, source=[1, 100], version=1)
+    assert comptages == [5]
+    # Nouveau nettoyage : tout est recompté, même si la source n'a pas changé
+    mettre_a_jour(VILLAS, chemin, source=[1, 100], version=2)
+    assert comptages == [5, 5]
@@ -0,0 +1,53 @@
+import os
+
+import pytest
+
+from async_extract import scraper_details
+from benchmark import categorie_de, generer_corpus
+from coinafrique_fields import CATEGORIES, VALEUR_MANQUANTE, ligne_vide
+from local_server import servir_pages
+from static_extract import creer_session, scraper_detail_statique
+
+SITE = 'https://sn.coinafrique.com'
+RACINE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def champs_de(url):
+    return CATEGORIES[categorie_de(url)]['champs']
+
+
+@pytest.fixture(scope='module')
+def corpus(tmp_path_factory):
+    # Pages de détail au balisage coinafrique, remplies avec les lignes de data/*.csv
+    dossier = str(tmp_path_factory.mktemp('corpus'))
+    dossier_courant = os.getcwd()
+    os.chdir(RACINE)
+    try:
+        chemins = generer_corpus(dossier, nb_pages=12)
+    finally:
+        os.chdir(dossier_courant)
+    with servir_pages(dossier) as base:
+        yield base, chemins
+
+
+def test_memes_lignes_que_le_moteur_sequentiel(corpus):
+    base, chemins = corpus
+    urls = [SITE + chemin for chemin in chemins]
+    session = creer_session()
+    sequentielles = []
+    for chemin, url in zip(chemins, urls):
+        ligne = scraper_detail_statique(session, base + chemin, champs_de(url))
+        sequentielles.append({**ligne, 'url': url})
+
+    lignes = scraper_details(urls, champs_de, base_url=base, concurrence=4, debit_par_hote={})
+    assert lignes == sequentielles
+    assert all(ligne['adresse'] != VALEUR_MANQUANTE for ligne in lignes) # Pages réellement lues
+
+
+def test_page_absente_ligne_vide_a_sa_place(corpus):
+    base, chemins = corpus
+    absente = f"{SITE}/annonce/villas/vente-villa-absente-999"
+    urls = [SITE + chemins[0], absente, SITE + chemins[1]]
+    lignes = scraper_details(urls, champs_de, base_url=base, debit_par_hote={})
+    assert [ligne['url'] for ligne in lignes] == urls
+    assert lignes[1] == ligne_vide(absente, champs_de(absente))
@@ -0,0 +1,20 @@
+import pytest
+
+from coinafrique_fields import CATEGORIES, extraire_ligne
+
+URL = 'https://sn.coinafrique.com/annonce/appartements/location-appartement-3'
+
+
+@pytest.mark.parametrize('titre, pieces', [
+    ("Appartement 3 pièces Ouakam", '3'),
+    ("Appartement 4 PIECES Mermoz", '4'),
+    ("Studio 1 piece Yoff", '1'),
+    ("Appartement 2 chambres Almadies", '2'),
+])
+def test_pieces_lues_dans_le_titre_de_la_carte(titre, pieces):
+    champs = CATEGORIES['appartements']['champs_carte']
+
+    def lire_valeurs(strategie):
+        return [titre] if strategie['css'] == "p.ad__card-description" else []
+
+    assert extraire_ligne(URL, champs, lire_valeurs)['nombre_de_pieces'] == pieces
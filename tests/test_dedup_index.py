@@ -0,0 +1,42 @@
+import pandas as pd
+
+from dedup_index import IndexDoublons, dedoublonner
+
+BASE = 'https://sn.coinafrique.com/annonce'
+
+
+def annonces(lignes):
+    return pd.DataFrame(lignes, columns=['url', 'prix', 'nombre_de_pieces', 'superficie', 'adresse']).astype(
+        {'prix': 'Int64', 'nombre_de_pieces': 'Int64', 'superficie': 'float64'}
+    )
+
+
+def test_annonces_differentes_au_meme_prix_et_adresse():
+    index = IndexDoublons(':memory:')
+    df = dedoublonner(annonces([
+        (f"{BASE}/terrains/vente-terrain-300m-diamniadio-100", 7500000, None, 300.0, 'Diamniadio, Sénégal'),
+        (f"{BASE}/terrains/terrain-titre-foncier-diamniadio-101", 7500000, None, 300.0, 'Diamniadio, Sénégal'),
+    ]), 'terrains', index)
+    assert df['repost_de'].isna().all()
+
+
+def test_repost_meme_contenu_autre_identifiant():
+    index = IndexDoublons(':memory:')
+    dedoublonner(annonces([
+        (f"{BASE}/villas/vente-villa-saly-aerodrome-200", 90000000, 5, None, 'Saly, Mbour, Sénégal'),
+    ]), 'villas', index)
+    df = dedoublonner(annonces([
+        (f"{BASE}/villas/vente-villa-saly-aerodrome-250", 90000000, 5, None, 'Saly,  Mbour, Sénégal'),
+        (f"{BASE}/villas/vente-villa-thies-251", 90000000, 5, None, 'Thiès, Sénégal'),
+    ]), 'villas', index)
+    assert df['repost_de'].tolist() == [200, pd.NA]
+    assert index.originaux([250, 251]) == {250: 200, 251: 251}
+
+
+def test_reposts_cherches_dans_la_meme_categorie():
+    index = IndexDoublons(':memory:')
+    ligne = ('location-appartement-4-pieces-mamelles', 500000, 4, None, 'Mamelles, Dakar, Sénégal')
+    dedoublonner(annonces([(f"{BASE}/villas/{ligne[0]}-300", *ligne[1:])]), 'villas', index)
+    df = dedoublonner(annonces([(f"{BASE}/appartements/{ligne[0]}-301", *ligne[1:])]), 'appartements', index)
+    assert df['repost_de'].isna().all()
+    assert index.reposts() == {}
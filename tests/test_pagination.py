@@ -0,0 +1,81 @@
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+import coinafrique_extract
+from crawl_store import EtatCrawl
+
+BASE = 'https://sn.coinafrique.com/annonce/villas'
+
+
+class Site:
+    # Pages de liste simulées : page -> URLs des annonces ; 'crash' : page qui fait tomber le run
+    def __init__(self, pages):
+        self.pages = pages
+        self.lues = []
+        self.crash = None
+
+    def __call__(self, categorie, url_page, *args):
+        page = int(parse_qs(urlparse(url_page).query)['page'][0])
+        if page == self.crash:
+            raise KeyboardInterrupt
+        self.lues.append(page)
+        return list(self.pages.get(page, [])), {}, None
+
+
+@pytest.fixture
+def site(monkeypatch):
+    site = Site({page: [f"{BASE}/vente-villa-{page}-{page * 10 + i}" for i in range(2)] for page in range(1, 5)})
+    monkeypatch.setattr(coinafrique_extract, 'lire_page_liste', site)
+    return site
+
+
+def collecter(etat, max_pages=10):
+    coinafrique_extract.collecter_urls(['villas'], max_pages, etat, None, None, arret_si_page_connue=True)
+
+
+def etat_pagination(chemin):
+    etat = EtatCrawl(chemin)
+    try:
+        return etat.pagination('villas')
+    finally:
+        etat.fermer()
+
+
+def test_reprise_apres_crash_pendant_la_pagination(site, tmp_path):
+    chemin = str(tmp_path / 'etat.sqlite3')
+    site.crash = 3
+    etat = EtatCrawl(chemin)
+    with pytest.raises(KeyboardInterrupt):
+        collecter(etat)
+    etat.fermer()
+    assert etat_pagination(chemin) == (2, False, False)
+
+    # La relance ne s'arrête pas sur la page 1, déjà connue : elle va jusqu'aux pages jamais vues
+    site.crash, site.lues = None, []
+    etat = EtatCrawl(chemin)
+    collecter(etat)
+    assert site.lues == [1, 2, 3, 4, 5]
+    assert len(etat.urls_a_scraper('villas')) == 8
+    assert etat.pagination('villas') == (4, True, True)
+
+
+def test_arret_sur_page_connue_apres_un_parcours_termine(site, tmp_path):
+    chemin = str(tmp_path / 'etat.sqlite3')
+    collecter(EtatCrawl(chemin))
+    site.pages[1] = [f"{BASE}/vente-villa-neuve-99"] + site.pages[1]
+    site.lues = []
+    etat = EtatCrawl(chemin)
+    collecter(etat)
+    assert site.lues == [1, 2]
+    assert etat.pagination('villas') == (4, True, True)
+
+
+def test_parcours_limite_par_max_pages(site, tmp_path):
+    # Un parcours arrêté à max_pages=2 n'autorise pas l'arrêt quand la limite augmente
+    chemin = str(tmp_path / 'etat.sqlite3')
+    collecter(EtatCrawl(chemin), max_pages=2)
+    site.lues = []
+    collecter(EtatCrawl(chemin), max_pages=10)
+    assert site.lues == [1, 2, 3, 4, 5]
+
@@ -0,0 +1,40 @@
+from selenium.common.exceptions import NoSuchElementException
+
+from readiness import MESURES_MIN, TIMEOUTS_AVANT_ELARGISSEMENT, AttenteAdaptative
+
+
+class Driver:
+    # Page simulée : les sélecteurs de 'presents' sont là tout de suite, les autres jamais
+    def __init__(self):
+        self.presents = set()
+
+    def find_element(self, par, selecteur):
+        if selecteur not in self.presents:
+            raise NoSuchElementException(selecteur)
+        return object()
+
+
+def test_timeouts_hors_des_mesures_et_elargissement_apres_une_serie():
+    attente = AttenteAdaptative(timeout_max=1.0, timeout_min=0.01)
+    driver = Driver()
+    driver.presents.add('p.price')
+    for _ in range(MESURES_MIN):
+        assert attente.attendre(driver, 'p.price')
+    assert attente.timeout('p.price') == 0.01
+
+    # Prix absent de quelques pages : pas de mesure au délai accordé, délai inchangé
+    driver.presents.clear()
+    for _ in range(TIMEOUTS_AVANT_ELARGISSEMENT - 1):
+        assert not attente.attendre(driver, 'p.price')
+    assert len(attente.mesures['p.price']) == MESURES_MIN
+    assert attente.timeout('p.price') == 0.01
+
+    # Une série de timeouts : le site ralentit, le délai double
+    assert not attente.attendre(driver, 'p.price')
+    assert attente.timeout('p.price') == 0.02
+    assert attente.echecs['p.price'] == TIMEOUTS_AVANT_ELARGISSEMENT
+
+    # Le sélecteur réapparaît : retour au délai appris
+    driver.presents.add('p.price')
+    assert attente.attendre(driver, 'p.price')
+    assert attente.timeout('p.price') == 0.01
@@ -0,0 +1,295 @@
+import asyncio
+import json
+import sqlite3
+import threading
+import time
+
+from crawl_store import id_annonce
+
+# --- File partagée d'unités de travail avec baux (SQLite) ---
+# Le crawl est découpé en unités : une plage de pages de liste d'une catégorie
+# ('liste'), ou les annonces d'une page de liste à scraper en détail ('details').
+# N'importe quel nombre de workers (processus, ou machines qui voient le même fichier)
+# prennent une unité à la fois avec un bail : tant qu'il le traite, le worker
+# renouvelle son bail ; s'il meurt, le bail expire et l'unité revient dans la file.
+# Chaque prise est une transaction BEGIN IMMEDIATE : deux workers ne prennent
+# jamais la même unité. Plusieurs machines : le fichier doit être sur un disque
+# partagé dont les verrous de fichiers sont fiables (pas de WAL sur un partage réseau).
+# Le plafond de requêtes par hôte est lui aussi dans la file (table 'debit', voir DebitPartage) :
+# il vaut pour l'ensemble des workers, pas pour chacun. Les créneaux sont datés avec
+# l'horloge de chaque machine, qui doivent donc être synchronisées (NTP).
+
+CHEMIN_FILE = 'coinafrique_file.sqlite3'
+
+LISTE = 'liste'
+DETAILS = 'details'
+
+A_FAIRE = 'a_faire'
+EN_COURS = 'en_cours'
+FAIT = 'fait'
+ECHEC = 'echec'
+
+DUREE_BAIL = 120.0 # s sans renouvellement avant qu'une unité soit reprise par un autre worker
+TENTATIVES_MAX = 3 # Prises d'une unité (baux expirés compris) avant de la marquer en échec
+
+
+def cle_liste(categorie, premier, dernier):
+    # Clés utilisables comme noms de fichiers (sorties des shards)
+    return f"{categorie}-liste-{premier:04d}-{dernier:04d}"
+
+
+def cle_details(categorie, page):
+    return f"{categorie}-details-{page:04d}"
+
+
+class FileTravail:
+    def __init__(self, chemin=CHEMIN_FILE, duree_bail=DUREE_BAIL, tentatives_max=TENTATIVES_MAX, wal=True):
+        # isolation_level=None : les transactions sont ouvertes à la main (BEGIN IMMEDIATE)
+        self.connexion = sqlite3.connect(chemin, timeout=60, isolation_level=None, check_same_thread=False)
+        self.duree_bail = duree_bail
+        self.tentatives_max = tentatives_max
+        self._verrou = threading.Lock() # Le renouvellement des baux tourne dans un thread (voir Bail)
+        if wal:
+            self.connexion.execute("PRAGMA journal_mode=WAL")
+        self.connexion.execute(
+            """CREATE TABLE IF NOT EXISTS unites (
+                cle TEXT PRIMARY KEY,
+                type TEXT NOT NULL,
+                categorie TEXT NOT NULL,
+                premier INTEGER NOT NULL,
+                dernier INTEGER NOT NULL,
+                charge TEXT NOT NULL,
+                statut TEXT NOT NULL DEFAULT 'a_faire',
+                worker TEXT,
+                bail_expire REAL,
+                tentatives INTEGER NOT NULL DEFAULT 0,
+                erreur TEXT,
+                creee REAL NOT NULL,
+                terminee REAL
+            )"""
+        )
+        self.connexion.execute("CREATE INDEX IF NOT EXISTS idx_unites_statut ON unites (statut, type)")
+        # Annonces déjà confiées à une unité de détails : une annonce vue sur deux pages
+        # de liste (la pagination se décale pendant le crawl) n'est scrapée qu'une fois
+        self.connexion.execute(
+            """CREATE TABLE IF NOT EXISTS annonces (
+                id INTEGER PRIMARY KEY,
+                unite TEXT NOT NULL
+            )"""
+        )
+        # Prochain créneau libre de chaque hôte, tous workers confondus
+        self.connexion.execute(
+            """CREATE TABLE IF NOT EXISTS debit (
+                hote TEXT PRIMARY KEY,
+                prochain_depart REAL NOT NULL
+            )"""
+        )
+
+    def _transaction(self, requetes):
+        # Exécute requetes(connexion) dans une transaction qui verrouille la base en écriture
+        with self._verrou:
+            self.connexion.execute("BEGIN IMMEDIATE")
+            try:
+                resultat = requetes(self.connexion)
+            except BaseException:
+                self.connexion.execute("ROLLBACK")
+                raise
+            self.connexion.execute("COMMIT")
+        return resultat
+
+    def ajouter(self, unites):
+        # unites : [(cle, type, categorie, premier, dernier, charge)] ; une clé déjà connue est ignorée,
+        # un coordinateur peut donc être relancé sans dupliquer le travail. Renvoie le nombre d'unités créées.
+        maintenant = time.time()
+
+        def requetes(connexion):
+            avant = connexion.total_changes
+            connexion.executemany(
+                "INSERT OR IGNORE INTO unites (cle, type, categorie, premier, dernier, charge, creee) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [(cle, type_unite, categorie, premier, dernier, json.dumps(charge, ensure_ascii=False), maintenant)
+                 for cle, type_unite, categorie, premier, dernier, charge in unites],
+            )
+            return connexion.total_changes - avant
+
+        return self._transaction(requetes)
+
+    def publier_details(self, categorie, page, urls, cartes=None):
+        # Crée l'unité de détails d'une page de liste avec ses annonces encore jamais confiées.
+        # 'cartes' : lignes incomplètes lues sur les cartes ({url: ligne}), reprises au scraping du détail.
+        cle = cle_details(categorie, page)
+        cartes = cartes or {}
+
+        def requetes(connexion):
+            if connexion.execute("SELECT 1 FROM unites WHERE cle = ?", (cle,)).fetchone():
+                return 0 # Page déjà publiée par un worker dont le bail a expiré
+            nouvelles = []
+            for url in urls:
+                identifiant = id_annonce(url)
+                if identifiant is None:
+                    continue
+                if connexion.execute("INSERT OR IGNORE INTO annonces (id, unite) VALUES (?, ?)", (identifiant, cle)).rowcount:
+                    nouvelles.append(url)
+            if nouvelles:
+                charge = {'urls': nouvelles, 'cartes': {url: cartes[url] for url in nouvelles if url in cartes}}
+                connexion.execute(
+                    "INSERT INTO unites (cle, type, categorie, premier, dernier, charge, creee) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (cle, DETAILS, categorie, page, page, json.dumps(charge, ensure_ascii=False), time.time()),
+                )
+            return len(nouvelles)
+
+        return self._transaction(requetes)
+
+    def prendre(self, worker):
+        # L'unité libre la plus ancienne (ou dont le bail a expiré), détails d'abord pour vider
+        # la file au plus tôt ; None s'il n'y en a pas. Renvoie un dict avec la charge décodée.
+        def requetes(connexion):
+            maintenant = time.time()
+            # Unités abandonnées trop de fois : en échec, pour que les workers puissent s'arrêter
+            connexion.execute(
+                """UPDATE unites SET statut = ?, erreur = COALESCE(erreur, 'bail expiré'), bail_expire = NULL
+                   WHERE statut = ? AND bail_expire < ? AND tentatives >= ?""",
+                (ECHEC, EN_COURS, maintenant, self.tentatives_max),
+            )
+            ligne = connexion.execute(
+                """SELECT cle, type, categorie, premier, dernier, charge, tentatives FROM unites
+                   WHERE statut = ? OR (statut = ? AND bail_expire < ?)
+                   ORDER BY type = ?, categorie, premier LIMIT 1""",
+                (A_FAIRE, EN_COURS, maintenant, LISTE),
+            ).fetchone()
+            if ligne is None:
+                return None
+            connexion.execute(
+                "UPDATE unites SET statut = ?, worker = ?, bail_expire = ?, tentatives = tentatives + 1 WHERE cle = ?",
+                (EN_COURS, worker, maintenant + self.duree_bail, ligne[0]),
+            )
+            cle, type_unite, categorie, premier, dernier, charge, tentatives = ligne
+            return {
+                'cle': cle, 'type': type_unite, 'categorie': categorie, 'premier': premier, 'dernier': dernier,
+                'charge': json.loads(charge), 'tentative': tentatives + 1,
+            }
+
+        return self._transaction(requetes)
+
+    def _si_bail(self, cle, worker, requete, parametres):
+        # Exécute la requête seulement si le worker tient encore le bail de l'unité
+        def requetes(connexion):
+            return connexion.execute(
+                requete + " WHERE cle = ? AND statut = ? AND worker = ?", (*parametres, cle, EN_COURS, worker),
+            ).rowcount == 1
+
+        return self._transaction(requetes)
+
+    def renouveler(self, cle, worker):
+        # False si le bail a été perdu (expiré puis pris par un autre worker)
+        return self._si_bail(cle, worker, "UPDATE unites SET bail_expire = ?", (time.time() + self.duree_bail,))
+
+    def terminer(self, cle, worker):
+        return self._si_bail(cle, worker, "UPDATE unites SET statut = ?, bail_expire = NULL, terminee = ?", (FAIT, time.time()))
+
+    def rendre(self, cle, worker, erreur):
+        # Échec du traitement : l'unité revient dans la file, ou passe en échec après TENTATIVES_MAX prises
+        return self._si_bail(
+            cle, worker,
+            "UPDATE unites SET statut = CASE WHEN tentatives >= ? THEN ? ELSE ? END, bail_expire = NULL, erreur = ?",
+            (self.tentatives_max, ECHEC, A_FAIRE, erreur),
+        )
+
+    def clore_listes(self, categorie, page):
+        # Dernière page de la catégorie atteinte : les plages de pages suivantes ne sont pas parcourues
+        def requetes(connexion):
+            return connexion.execute(
+                "UPDATE unites SET statut = ?, terminee = ? WHERE type = ? AND categorie = ? AND premier > ? AND statut = ?",
+                (FAIT, time.time(), LISTE, categorie, page, A_FAIRE),
+            ).rowcount
+
+        return self._transaction(requetes)
+
+    def reserver_creneau(self, hote, intervalle):
+        # Réserve le prochain créneau libre de l'hôte (un créneau tous les 'intervalle' s pour toute la file) ;
+        # renvoie l'attente (s) avant d'envoyer la requête
+        def requetes(connexion):
+            maintenant = time.time()
+            ligne = connexion.execute("SELECT prochain_depart FROM debit WHERE hote = ?", (hote,)).fetchone()
+            depart = max(maintenant, ligne[0]) if ligne else maintenant
+            connexion.execute("INSERT OR REPLACE INTO debit (hote, prochain_depart) VALUES (?, ?)", (hote, depart + intervalle))
+            return depart - maintenant
+
+        return self._transaction(requetes)
+
+    def reste(self):
+        # Unités pas encore terminées (libres ou en cours) : un worker sans unité attend tant qu'il en reste
+        with self._verrou:
+            (nombre,) = self.connexion.execute(
+                "SELECT COUNT(*) FROM unites WHERE statut IN (?, ?)", (A_FAIRE, EN_COURS),
+            ).fetchone()
+        return nombre
+
+    def compter(self):
+        # {(type, statut): nombre}
+        with self._verrou:
+            return {
+                (type_unite, statut): nombre for type_unite, statut, nombre in self.connexion.execute(
+                    "SELECT type, statut, COUNT(*) FROM unites GROUP BY type, statut ORDER BY type, statut",
+                )
+            }
+
+    def categories(self):
+        with self._verrou:
+            return [categorie for (categorie,) in self.connexion.execute("SELECT DISTINCT categorie FROM unites ORDER BY categorie")]
+
+    def echecs(self):
+        with self._verrou:
+            return self.connexion.execute(
+                "SELECT cle, tentatives, erreur FROM unites WHERE statut = ? ORDER BY cle", (ECHEC,),
+            ).fetchall()
+
+    def fermer(self):
+        self.connexion.close()
+
+
+class Bail:
+    # Renouvelle le bail d'une unité en tâche de fond pendant son traitement ;
+    # 'perdu' est vrai si un renouvellement a échoué (l'unité a été reprise ailleurs)
+    def __init__(self, file, cle, worker, intervalle=None):
+        self.file = file
+        self.cle = cle
+        self.worker = worker
+        self.intervalle = file.duree_bail / 3 if intervalle is None else intervalle
+        self.perdu = False
+        self._arret = threading.Event()
+        self._thread = threading.Thread(target=self._renouveler, daemon=True)
+
+    def _renouveler(self):
+        while not self._arret.wait(self.intervalle):
+            if not self.file.renouveler(self.cle, self.worker):
+                self.perdu = True
+                return
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, type_exc, exc, tb):
+        self._arret.set()
+        self._thread.join()
+        return False
+
+
+class DebitPartage:
+    # Plafond de requêtes par seconde vers un hôte, commun à tous les workers de la file.
+    # Même interface que retry_scheduler.LimiteurDebit (attendre) ; patienter pour le code synchrone
+    # (moteur statique, Selenium). Chaque requête réserve son créneau dans une transaction.
+    def __init__(self, file, hote, requetes_par_seconde):
+        self.file = file
+        self.hote = hote
+        self.intervalle = 1.0 / requetes_par_seconde if requetes_par_seconde else 0.0
+
+    def patienter(self):
+        if self.intervalle:
+            time.sleep(self.file.reserver_creneau(self.hote, self.intervalle))
+
+    async def attendre(self):
+        # La transaction SQLite (qui peut attendre le verrou d'un autre worker) tourne hors de la boucle
+        if self.intervalle:
+            attente = await asyncio.get_running_loop().run_in_executor(None, self.file.reserver_creneau, self.hote, self.intervalle)
+            await asyncio.sleep(attente)